@@ -0,0 +1,70 @@
+"""Prices leveling for many realms in one run.
+
+Jobs run in a pool of worker processes. Each worker builds its own `NexusHubApi` (and
+so uses its own per-realm price cache) and its own `Profession` for every (server,
+faction, profession) job it gets. A worker loads each profession's `RecipeTable` once,
+from its memory-mapped snapshot, and shares it between its jobs. Results are streamed
+as they finish, one JSON line per job, or collected into a cross-realm comparison table.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+import itertools
+import json
+import sys
+from typing import Iterable, List, Optional, TextIO
+
+from gold_amount import GoldAmount
+from nexushub_api import NexusHubApi
+from profession import PROFESSIONS
+
+
+def price_realm(server: str, faction: str, profession_name: str, target_level: int, cache_dir: str = "cache") -> dict:
+    result = {"server": server, "faction": faction, "profession": profession_name, "target_level": target_level}
+    # Progress messages from the API and the path computation must not end up in the result stream
+    with redirect_stdout(sys.stderr):
+        try:
+            api = NexusHubApi(server=server, faction=faction, cache_dir=cache_dir)
+            try:
+                profession = PROFESSIONS[profession_name](nexus_hub_api=api)
+                result["total_cost"] = profession.total_cost_to(target_level).to_copper()
+                result["path"] = [recipe.id for recipe in profession.cheapest_way_to(target_level)]
+            finally:
+                api.close()
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def run_batch(servers: Iterable[str], factions: Iterable[str], profession_names: Iterable[str], target_level: int = 450,
+              workers: Optional[int] = None, out: Optional[TextIO] = sys.stdout, cache_dir: str = "cache") -> List[dict]:
+    """Prices every (server, faction, profession) combination and returns the results.
+
+    If `out` is given, each result is written to it as a JSON line as soon as it is ready.
+    """
+    jobs = list(itertools.product(servers, factions, profession_names))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(price_realm, server, faction, name, target_level, cache_dir) for (server, faction, name) in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if out is not None:
+                out.write(json.dumps(result) + "\n")
+                out.flush()
+    return results
+
+
+def print_comparison(results: List[dict], out: TextIO = sys.stdout):
+    """Prints one table per profession, cheapest realm first, followed by any realm that failed."""
+    for profession_name in sorted({result["profession"] for result in results}):
+        rows = [result for result in results if result["profession"] == profession_name]
+        priced = sorted((result for result in rows if "error" not in result), key=lambda result: result["total_cost"])
+        print(f"{profession_name} (1-{rows[0]['target_level']})", file=out)
+        for rank, result in enumerate(priced, 1):
+            realm = f"{result['server']}-{result['faction']}"
+            print(f"{rank:4}. {realm:35} {str(GoldAmount.from_copper(result['total_cost'])):>16}", file=out)
+        for result in rows:
+            if "error" in result:
+                realm = f"{result['server']}-{result['faction']}"
+                print(f"    {realm:35} failed: {result['error']}", file=out)
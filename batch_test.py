@@ -0,0 +1,26 @@
+from batch import run_batch
+from nexushub_api import NexusHubApi
+from profession import Enchanting
+from test_helpers import realm_cache_dir
+import io
+import json
+import unittest
+
+
+class BatchTest(unittest.TestCase):
+
+    def test_matches_single_realm_run(self):
+        cache_dir = realm_cache_dir()
+        self.addCleanup(cache_dir.cleanup)
+        out = io.StringIO()
+        results = run_batch(["sulfuras"], ["horde"], ["enchanting"], target_level=300, workers=1, out=out, cache_dir=cache_dir.name)
+        self.assertEqual(results, [json.loads(line) for line in out.getvalue().splitlines()])
+
+        enchanting = Enchanting(nexus_hub_api=NexusHubApi("sulfuras", "horde", cache_dir=cache_dir.name))
+        [result] = results
+        self.assertEqual(result["total_cost"], enchanting.total_cost_to(300).to_copper())
+        self.assertEqual(result["path"], [recipe.id for recipe in enchanting.recipe_path[:300]])
+
+
+if __name__ == "__main__":
+    unittest.main()
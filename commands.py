@@ -0,0 +1,91 @@
+"""The read-only queries a computed `Profession` answers, shared by the CLI and the service."""
+
+import itertools
+import json
+import sys
+from typing import TextIO
+
+import planner
+import sensitivity
+from profession import Profession
+
+COMMANDS = ["reagents", "path", "total_cost", "plan", "sensitivity"]
+FORMATS = ["human-readable", "json"]
+
+
+def run_command(profession: Profession, command: str, from_level: int = 1, target_level: int = 450,
+                format: str = "human-readable", out: TextIO = None):
+    """Writes the answer to `command` for the levels `from_level`-`target_level` to `out` (stdout by default)."""
+    out = out or sys.stdout
+    if command not in COMMANDS:
+        raise ValueError(f"{command} is not a valid command. Valid commands: {COMMANDS}.")
+    if format not in FORMATS:
+        raise ValueError(f"{format} is not a valid format. Valid formats: {FORMATS}.")
+
+    if command == "reagents":
+        reagents = profession.reagents_required_between(from_level, target_level)
+        if format == "human-readable":
+            print(f"Reagents required from {from_level}-{target_level}", file=out)
+            for reagent, quantity in reagents.items():
+                print(f"{reagent.name} x{quantity}", file=out)
+        else:
+            print(json.dumps([
+                {
+                "id": reagent.id,
+                "price": reagent.price.to_copper(),
+                "name": reagent.name,
+                "quantity": quantity,
+                } for reagent, quantity in reagents.items()
+            ]), file=out)
+    elif command == "path":
+        if format == "human-readable":
+            profession.print_recipe_path(target_level, from_level=from_level, out=out, alternatives=True)
+        else:
+            path = profession.cheapest_way_to(target_level)[from_level-1:]
+            alternatives = profession.alternatives_to(target_level)[from_level-1:]
+            print(json.dumps({
+                skill_level: dict(recipe.__dict__(), alternatives=[
+                    {
+                    "id": candidate.id,
+                    "name": candidate.name,
+                    "cost_for_skillup": candidate.cost_for_skillup(level).to_copper(),
+                    } for candidate in candidates
+                ]) for skill_level, recipe, (level, candidates) in zip(itertools.count(from_level), path, alternatives)
+            }), file=out)
+    elif command == "total_cost":
+        total_cost = profession.total_cost_between(from_level, target_level)
+        if format == "human-readable":
+            print(f"It costs {total_cost} to go from {from_level}-{target_level}", file=out)
+        else:
+            print(json.dumps({"total_cost": total_cost.to_copper()}), file=out)
+    elif command == "plan":
+        optimal = planner.optimal_plan(profession, target_level)
+        greedy = planner.greedy_plan(profession, target_level)
+        if format == "human-readable":
+            print_plan(optimal, out)
+            print(f"Planner: expected cost {optimal.total_cost} in {optimal.elapsed * 1000:.1f}ms", file=out)
+            print(f"Greedy:  expected cost {greedy.total_cost} in {greedy.elapsed * 1000:.1f}ms", file=out)
+        else:
+            print(json.dumps({"planner": optimal.__dict__(), "greedy": greedy.__dict__()}), file=out)
+    elif command == "sensitivity":
+        results = sensitivity.reagent_sensitivity(profession, from_level, target_level)
+        if format == "human-readable":
+            print(f"Reagent prices driving the cost from {from_level}-{target_level}", file=out)
+            sensitivity.print_sensitivity(results, out)
+        else:
+            print(json.dumps([result.__dict__() for result in results]), file=out)
+
+
+def print_plan(plan: planner.Plan, out: TextIO):
+    """Prints the plan's steps, with consecutive crafts of the same recipe combined."""
+    segments = []
+    for skill_level, recipe in plan.steps:
+        cost = recipe.cost_for_skillup(skill_level)
+        if segments and segments[-1][2] is recipe and segments[-1][1] == skill_level:
+            start, _, _, crafts, total = segments[-1]
+            segments[-1] = (start, skill_level + recipe.nskillup, recipe, crafts + 1, total + cost)
+        else:
+            segments.append((skill_level, skill_level + recipe.nskillup, recipe, 1, cost))
+    for start, end, recipe, crafts, total in segments:
+        print(f"[{start:3}-{end:3}] {recipe.name[:35]:35} (x{crafts:2}). Expected cost = {total}", file=out)
+    print("="*10, file=out)
@@ -0,0 +1,80 @@
+"""Batched NumPy engine for the per-level cheapest recipe.
+
+Lays recipe prices and color thresholds out as arrays, evaluates the expected cost of
+every recipe at every skill level in one pass and takes the argmin per level. The
+result is the same as calling `Recipe.cost_for_skillup` for each candidate, including
+how `GoldAmount` floors fractional copper and how ties go to the earlier recipe.
+
+NumPy is optional and only imported once a `CostMatrix` is built;
+`numpy_available()` tells whether this engine can be used.
+"""
+
+import importlib.util
+from typing import Iterable, List, Optional
+
+from recipes import Recipe
+
+
+def numpy_available() -> bool:
+    return importlib.util.find_spec("numpy") is not None
+
+
+class CostMatrix:
+    recipes: List[Recipe]
+    max_level: int
+
+    def __init__(self, recipes: List[Recipe], broken_recipes: Iterable[int] = (), max_level: int = 450):
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("The numpy engine requires numpy (pip install numpy).")
+        self.recipes = recipes
+        self.max_level = max_level
+        broken_recipes = set(broken_recipes)
+
+        levels = np.arange(1, max_level, dtype=np.int64)[np.newaxis, :]
+        colors = np.array([recipe.colors[:4] for recipe in recipes], dtype=np.int64).reshape(-1, 4)
+        orange, yellow, gray = colors[:, 0:1], colors[:, 1:2], colors[:, 3:4]
+        prices = np.array([recipe.price.to_copper() for recipe in recipes], dtype=np.float64)[:, np.newaxis]
+        usable = np.array([recipe.id not in broken_recipes for recipe in recipes], dtype=bool)[:, np.newaxis]
+
+        # Same conditions as Recipe.can_use / Recipe.can_receive_skillup
+        self.candidates = usable & (levels > orange) & (levels < gray)
+        self.zero_width = self.candidates & (gray == yellow)
+        # Zero-width color windows divide by zero here; those cells are reported by
+        # cheapest_at if they are ever asked for, like the scalar code would.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            probability = np.where(levels == orange, 1.0, (gray - levels) / (gray - yellow))
+            raw = prices / probability
+            # GoldAmount.from_copper floors fractional copper
+            cost = np.floor(raw)
+        cost = np.where(probability == 0, 2**31 - 1, cost)
+        self.cost = np.where(self.candidates, cost, np.inf)
+        self.cheapest = np.argmin(self.cost, axis=0)
+        self.has_candidates = self.candidates.any(axis=0)
+        self.has_zero_width = self.zero_width.any(axis=0)
+
+    def cheapest_at(self, skill_levels: Iterable[int]) -> List[Optional[Recipe]]:
+        """Returns the cheapest candidate recipe for each skill level, or None where there is none."""
+        return [recipes[0] if recipes else None for recipes in self.cheapest_k_at(skill_levels, 1)]
+
+    def cheapest_k_at(self, skill_levels: Iterable[int], k: int) -> List[List[Recipe]]:
+        """Returns up to `k` of the cheapest candidate recipes for each skill level, cheapest first.
+
+        A stable sort of each level's costs keeps ties in recipe order, as `heapq.nsmallest` does.
+        """
+        import numpy as np
+
+        columns = np.array(list(skill_levels), dtype=np.int64) - 1
+        if k == 1:
+            ranked = self.cheapest[np.newaxis, columns]
+        else:
+            ranked = np.argsort(self.cost[:, columns], axis=0, kind="stable")[:k]
+        result: List[List[Recipe]] = []
+        for i, column in enumerate(columns):
+            if self.has_zero_width[column]:
+                recipe = self.recipes[self.zero_width[:, column].nonzero()[0][0]]
+                print(f"Failed to get level_up probability for {recipe.name}.")
+                raise ZeroDivisionError("division by zero")
+            result.append([self.recipes[row] for row in ranked[:, i] if self.candidates[row, column]])
+        return result
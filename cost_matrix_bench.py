@@ -0,0 +1,38 @@
+"""Timing comparison of the scalar and NumPy path engines.
+
+Builds `Enchanting` from the local price cache, then recomputes `recipe_path` with each
+engine. `--scale` repeats the recipe list to see how both engines grow with the number
+of recipes.
+
+    python cost_matrix_bench.py --server sulfuras --faction horde --scale 1 10 50
+"""
+
+import argparse
+import timeit
+
+from nexushub_api import NexusHubApi
+from profession import ENGINES, Enchanting, load_recipe_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare recipe path engines")
+    parser.add_argument("--server", type=str, default="sulfuras")
+    parser.add_argument("--faction", type=str, default="horde")
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    api = NexusHubApi(args.server, args.faction)
+    recipe_data = load_recipe_data(Enchanting.RECIPE_JSON_PATH)
+    print(f"{'recipes':>8} " + " ".join(f"{engine + ' (ms)':>12}" for engine in ENGINES) + f" {'speedup':>8}")
+    for scale in args.scale:
+        enchanting = Enchanting(nexus_hub_api=api, recipe_data=recipe_data * scale)
+        timings = {}
+        for engine in ENGINES:
+            enchanting.engine = engine
+            timings[engine] = min(timeit.repeat(enchanting.compute_recipe_path, number=1, repeat=args.repeat)) * 1000
+        print(f"{len(enchanting.recipes):8} " + " ".join(f"{timings[engine]:12.1f}" for engine in ENGINES) + f" {timings['scalar'] / timings['numpy']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Make-or-buy costs for reagents that can themselves be crafted.
+
+Recipe exports list what a recipe makes in `creates`: `[item_id, min_count, max_count]`,
+where a count of 0 means unknown and is read as 1.
+`CraftingGraph` links each such item to the recipes producing it. An item's effective
+cost is the lower of its market price and its cheapest craft: the effective costs of the
+craft's reagents divided by its average yield. Costs are evaluated depth first and
+memoized, so every item is priced once however many recipes use it.
+
+Crafts can form cycles, e.g. lesser and greater essences convert into each other. An
+item met again while its own cost is still being evaluated is priced at market there,
+which gives the right answer for such conversion pairs. Items that are never on sale
+(the market price is 0) can only be crafted, when a recipe for them is known.
+
+`MakeOrBuyPrices` wraps a `NexusHubApi` so that a `Profession` built on it sees
+effective costs, and expands crafted intermediates back into what has to be bought.
+
+The graph is built from the recipe lists in `data/*.json`, so it only knows the crafts
+of professions whose data is in that format. `data/engineering.json` is still a raw page
+export rather than a recipe list: until it is regenerated with `wowhead_ingest.py`,
+engineering intermediates are always bought, and loading the graph warns about it.
+"""
+
+import glob
+import json
+import math
+import sys
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from metrics import NULL_METRICS
+from nexushub_api import NexusHubApi, Reagent, ReagentRegistry
+
+UNAVAILABLE = float("inf")
+
+
+@dataclass
+class Craft:
+    recipe_id: int
+    name: str
+    item_id: int
+    yield_: float  # average number of items made per craft
+    reagents: List[Tuple[int, int]]  # (item_id, quantity)
+
+
+class CraftingGraph:
+    producers: Dict[int, List[Craft]]  # item_id: crafts making it
+    consumers: Dict[int, Set[int]]  # item_id: craftable items whose crafts use it
+    creates: Dict[int, int]  # recipe_id: item_id it makes
+
+    def __init__(self, recipes_json: Iterable[dict]):
+        self.producers = {}
+        self.consumers = {}
+        self.creates = {}
+        for recipe in recipes_json:
+            if not recipe.get("creates") or "reagents" not in recipe:
+                continue
+            item_id, min_count, max_count = (recipe["creates"] + [1, 1])[:3]
+            # Some exports list unknown counts as 0
+            craft = Craft(int(recipe["id"]), recipe["name"], item_id, max((min_count + max_count) / 2, 1),
+                          [(reagent_id, quantity) for reagent_id, quantity in recipe["reagents"]])
+            self.producers.setdefault(item_id, []).append(craft)
+            self.creates[craft.recipe_id] = item_id
+            for reagent_id, _ in craft.reagents:
+                self.consumers.setdefault(reagent_id, set()).add(item_id)
+
+    def closure(self, item_ids: Iterable[int]) -> Set[int]:
+        """Returns `item_ids` and every item their crafts use, directly or not."""
+        seen = set()
+        stack = list(item_ids)
+        while stack:
+            item_id = stack.pop()
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            for craft in self.producers.get(item_id, []):
+                stack.extend(reagent_id for reagent_id, _ in craft.reagents)
+        return seen
+
+    def dependents(self, item_ids: Iterable[int]) -> Set[int]:
+        """Returns `item_ids` and every item whose crafts use them, directly or not."""
+        seen = set()
+        stack = list(item_ids)
+        while stack:
+            item_id = stack.pop()
+            if item_id in seen:
+                continue
+            seen.add(item_id)
+            stack.extend(self.consumers.get(item_id, ()))
+        return seen
+
+
+def load_crafting_graph(paths: Optional[Iterable[str]] = None) -> CraftingGraph:
+    """Builds the graph from every recipe list in `data/*.json`.
+
+    Files in other formats are skipped with a warning, since their crafts are missing from the graph.
+    """
+    recipes = []
+    for path in sorted(paths if paths is not None else glob.glob("data/*.json")):
+        with open(path) as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            print(f"Warning: {path} is not a recipe list, so its crafts are left out of make-or-buy pricing. "
+                  f"Regenerate it with wowhead_ingest.py.", file=sys.stderr)
+            continue
+        recipes.extend(recipe for recipe in data if isinstance(recipe, dict))
+    return CraftingGraph(recipes)
+
+
+class MakeOrBuyPrices:
+    """Price source for a `Profession` that values every reagent at its effective cost.
+
+    Items in `made_on_path` are crafted by the leveling path itself (e.g. the runed rods
+    of required recipes) and paid for at that step, so later recipes use them at market
+    price instead of crafting them again.
+    """
+
+    def __init__(self, nexus_hub_api: NexusHubApi, graph: CraftingGraph, made_on_path: Iterable[int] = ()):
+        self.nexus_hub_api = nexus_hub_api
+        self.graph = graph
+        self.made_on_path = set(made_on_path)
+        self.metrics = getattr(nexus_hub_api, "metrics", NULL_METRICS)
+        self.server = nexus_hub_api.server
+        self.faction = nexus_hub_api.faction
+        # item_id: (effective cost in copper, cheapest craft or None to buy)
+        self.costs: Dict[int, Tuple[float, Optional[Craft]]] = {}
+        self.reagents = ReagentRegistry()
+
+    def prefetch(self, item_ids: Iterable[int], max_workers: Optional[int] = None):
+        self.nexus_hub_api.prefetch(self.graph.closure(item_ids), max_workers)
+
+    def get_item_price(self, item_id):
+        return self.get_item(item_id).price
+
+    def get_item_name(self, item_id):
+        return self.get_item(item_id).name
+
+    def get_item(self, item_id) -> Reagent:
+        cost, _ = self.evaluate(int(item_id))
+        # Never on sale and not craftable from anything on sale: priced at 0 as NexusHubApi does
+        return self.reagents.get(item_id, 0 if cost == UNAVAILABLE else int(cost), self.nexus_hub_api.get_item_name(item_id))
+
+    def market_price(self, item_id: int) -> float:
+        price = self.nexus_hub_api.get_item(item_id).price.to_copper()
+        return UNAVAILABLE if price == 0 and item_id in self.graph.producers else price
+
+    def evaluate(self, item_id: int, in_progress: Optional[Set[int]] = None) -> Tuple[float, Optional[Craft]]:
+        """Returns (effective cost, cheapest craft or None when buying is cheaper), memoized."""
+        if item_id in self.costs:
+            return self.costs[item_id]
+        in_progress = in_progress if in_progress is not None else set()
+        if item_id in self.made_on_path:
+            self.costs[item_id] = (self.nexus_hub_api.get_item(item_id).price.to_copper(), None)
+            return self.costs[item_id]
+        best = (self.market_price(item_id), None)
+        if item_id in in_progress:
+            return best
+        in_progress.add(item_id)
+        for craft in self.graph.producers.get(item_id, []):
+            cost = sum(self.evaluate(reagent_id, in_progress)[0] * quantity for reagent_id, quantity in craft.reagents) / craft.yield_
+            if cost < best[0]:
+                best = (cost, craft)
+        in_progress.discard(item_id)
+        self.costs[item_id] = best
+        return best
+
+    def invalidate(self, item_ids: Iterable[int]) -> Set[int]:
+        """Forgets the costs that depend on `item_ids`; returns the items whose effective cost may have changed."""
+        affected = self.graph.dependents(item_ids)
+        for item_id in affected:
+            self.costs.pop(item_id, None)
+        return affected
+
+    def expand(self, reagents: Dict[Reagent, int]) -> Dict[Reagent, int]:
+        """Replaces crafted intermediates by the reagents bought to craft them, at market price."""
+        bought: Dict[Reagent, int] = {}
+        for reagent, quantity in reagents.items():
+            self.expand_item(reagent.id, quantity, bought, set())
+        return bought
+
+    def expand_item(self, item_id: int, quantity: int, bought: Dict[Reagent, int], crafting: Set[int]):
+        _, craft = self.evaluate(item_id)
+        if craft is None or item_id in crafting:
+            reagent = self.nexus_hub_api.get_item(item_id)
+            bought[reagent] = bought.get(reagent, 0) + quantity
+            return
+        crafts = math.ceil(quantity / craft.yield_)
+        for reagent_id, reagent_quantity in craft.reagents:
+            self.expand_item(reagent_id, crafts * reagent_quantity, bought, crafting | {item_id})
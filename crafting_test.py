@@ -0,0 +1,97 @@
+from contextlib import redirect_stderr
+from crafting import CraftingGraph, MakeOrBuyPrices, load_crafting_graph
+from gold_amount import GoldAmount
+from nexushub_api import Reagent
+from profession import Profession
+import io
+import json
+import os
+import tempfile
+import unittest
+
+
+class PriceListApi:
+    """Prices items from a dict; items not in it cost 0, as if never on sale."""
+
+    server = "test"
+    faction = "horde"
+
+    def __init__(self, prices):
+        self.prices = prices
+
+    def prefetch(self, item_ids, max_workers=None):
+        pass
+
+    def get_item(self, item_id):
+        return Reagent(id=item_id, price=GoldAmount.from_copper(self.prices.get(item_id, 0)), name=f"Item {item_id}")
+
+    def get_item_name(self, item_id):
+        return f"Item {item_id}"
+
+
+RECIPES = [
+    # 3 lesser (1) <-> 1 greater (2)
+    {"id": 10, "name": "Lesser to greater", "colors": [0, 0, 0, 0], "creates": [2, 1, 1], "reagents": [[1, 3]]},
+    {"id": 11, "name": "Greater to lesser", "colors": [0, 0, 0, 0], "creates": [1, 3, 3], "reagents": [[2, 1]]},
+    # A rod (3) that is never on sale, made from a greater and a bar (4)
+    {"id": 12, "name": "Rod", "colors": [0, 0, 0, 0], "creates": [3, 1, 1], "reagents": [[2, 1], [4, 2]]},
+    {"id": 13, "name": "Enchant", "colors": [0, 10, 20, 30], "reagents": [[3, 1], [1, 1]]},
+]
+
+
+class MakeOrBuyTest(unittest.TestCase):
+
+    def prices(self, market):
+        return MakeOrBuyPrices(PriceListApi(market), CraftingGraph(RECIPES))
+
+    def test_effective_costs(self):
+        prices = self.prices({1: 100, 2: 240, 4: 50})
+        # Three lessers cost more than a greater, but a third of a greater is cheaper than a lesser
+        self.assertEqual(prices.get_item(1).price.to_copper(), 80)
+        self.assertEqual(prices.get_item(2).price.to_copper(), 240)
+        self.assertEqual(prices.get_item(3).price.to_copper(), 340)
+        self.assertEqual(prices.evaluate(3)[1].recipe_id, 12)
+        self.assertEqual(prices.evaluate(4), (50, None))
+
+    def test_repricing_invalidates_dependents(self):
+        market = {1: 100, 2: 240, 4: 50}
+        prices = self.prices(market)
+        self.assertEqual(prices.get_item(3).price.to_copper(), 340)
+        market[4] = 10
+        self.assertEqual(prices.invalidate([4]), {3, 4})
+        self.assertEqual(prices.get_item(3).price.to_copper(), 260)
+
+    def test_expands_crafted_reagents(self):
+        prices = self.prices({1: 100, 2: 240, 4: 50})
+        expanded = {reagent.id: quantity for reagent, quantity in prices.expand({prices.get_item(3): 2, prices.get_item(1): 4}).items()}
+        # Two rods: 2 greaters and 4 bars; four lessers: ceil(4 / 3) greaters
+        self.assertEqual(expanded, {2: 4, 4: 4})
+
+    def test_profession_uses_effective_costs(self):
+        profession = Profession("test", PriceListApi({1: 100, 2: 240, 4: 50}), recipe_json_path=None, recipe_data=RECIPES[3:], make_or_buy=True)
+        # Swap in the test graph for the one read from data/ and reprice everything
+        profession.make_or_buy.graph = CraftingGraph(RECIPES)
+        profession.update_prices([1, 2, 3, 4])
+        self.assertEqual(profession.recipes[0].price.to_copper(), 420)
+        # Two crafts: 2 rods and 2 lessers, i.e. 2 + ceil(2 / 3) greaters and 4 bars
+        self.assertEqual({reagent.id: quantity for reagent, quantity in profession.reagents_required_to(3).items()}, {2: 3, 4: 4})
+
+
+class LoadCraftingGraphTest(unittest.TestCase):
+
+    def test_warns_about_files_that_are_not_recipe_lists(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            paths = [os.path.join(data_dir, name) for name in ("alchemy.json", "page.json")]
+            with open(paths[0], "w") as f:
+                json.dump([{"id": 1, "name": "Potion", "reagents": [[2, 1]], "creates": [3, 1, 1]}], f)
+            with open(paths[1], "w") as f:
+                json.dump({"props": {}}, f)
+            stderr = io.StringIO()
+            with redirect_stderr(stderr):
+                graph = load_crafting_graph(paths)
+        self.assertEqual(graph.creates, {1: 3})
+        self.assertIn("page.json is not a recipe list", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,14 @@
 from nexushub_api import NexusHubApi
 from profession import Engineering
+from test_helpers import realm_cache_dir
 import unittest
 
 class EngineeringTest(unittest.TestCase):
 
     def test_load(self):
-        engi = Engineering(nexus_hub_api=NexusHubApi("sulfuras", "horde"))
+        cache_dir = realm_cache_dir()
+        self.addCleanup(cache_dir.cleanup)
+        engi = Engineering(nexus_hub_api=NexusHubApi("sulfuras", "horde", cache_dir=cache_dir.name))
         self.assertGreater(len(engi.recipes), 0)
 
 
@@ -1,43 +1,83 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import math
 
-@dataclass(order=True)
 class GoldAmount:
-    gold: int
-    silver: int
-    copper: int
+    """An amount of money, stored as a single number of copper.
+
+    Gold, silver and copper are only split out when they are read or formatted, so
+    arithmetic is one integer operation and one small object per result.
+    """
+    __slots__ = ("value",)
+
+    value: int
+
+    def __init__(self, gold: int, silver: int, copper: int):
+        self.value = (gold * 10**4) + (silver * 10**2) + copper
 
     @staticmethod
     def from_copper(raw_value) -> GoldAmount:
-        # Convert copper to silver
-        silver = raw_value // 100
-        # Convert silver to gold
-        gold = silver // 100
-        # Calculate remaining silver and copper
-        silver %= 100
-        copper = raw_value % 100
-        # Return GoldAmount object
-        return GoldAmount(int(gold), int(silver), int(copper))
+        amount = GoldAmount.__new__(GoldAmount)
+        # Fractional copper (e.g. after division) is floored, as it always has been
+        amount.value = raw_value if type(raw_value) is int else math.floor(raw_value)
+        return amount
 
     def to_copper(self) -> int:
-        # Convert gold and silver to copper
-        return (self.gold * 10**4) + \
-            (self.silver * 10**2) +  \
-            (self.copper * 10**0)
-    
+        return self.value
+
+    @property
+    def gold(self) -> int:
+        return self.value // 10**4
+
+    @property
+    def silver(self) -> int:
+        return self.value // 10**2 % 100
+
+    @property
+    def copper(self) -> int:
+        return self.value % 100
+
     def __add__(self, other: GoldAmount) -> GoldAmount:
-        return GoldAmount.from_copper(
-            self.to_copper() + other.to_copper()
-        )
-    
+        return GoldAmount.from_copper(self.value + other.value)
+
     def __dict__(self):
-        return self.to_copper()
+        return self.value
 
     def __mul__(self, val: int) -> GoldAmount:
-        return GoldAmount.from_copper(self.to_copper() * val)
-    
+        return GoldAmount.from_copper(self.value * val)
+
     def __truediv__(self, val: float) -> GoldAmount:
-        return GoldAmount.from_copper(self.to_copper() / val)
+        return GoldAmount.from_copper(self.value / val)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GoldAmount):
+            return NotImplemented
+        return self.value == other.value
+
+    def __lt__(self, other: GoldAmount) -> bool:
+        if not isinstance(other, GoldAmount):
+            return NotImplemented
+        return self.value < other.value
+
+    def __le__(self, other: GoldAmount) -> bool:
+        if not isinstance(other, GoldAmount):
+            return NotImplemented
+        return self.value <= other.value
+
+    def __gt__(self, other: GoldAmount) -> bool:
+        if not isinstance(other, GoldAmount):
+            return NotImplemented
+        return self.value > other.value
+
+    def __ge__(self, other: GoldAmount) -> bool:
+        if not isinstance(other, GoldAmount):
+            return NotImplemented
+        return self.value >= other.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
+
+    def __reduce__(self):
+        return (GoldAmount.from_copper, (self.value,))
 
     def __str__(self) -> str:
         result = ""
@@ -0,0 +1,94 @@
+"""Microbenchmark for `GoldAmount` arithmetic.
+
+Compares the copper-backed `GoldAmount` against the previous dataclass layout (three
+fields, converted to copper and back on every operation) on the operations the
+profession code runs in its hot loops.
+
+    python gold_amount_bench.py --count 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+
+from gold_amount import GoldAmount
+
+
+@dataclass(order=True)
+class DataclassGoldAmount:
+    """The previous `GoldAmount`, kept here only as a baseline."""
+    gold: int
+    silver: int
+    copper: int
+
+    @staticmethod
+    def from_copper(raw_value) -> DataclassGoldAmount:
+        silver = raw_value // 100
+        gold = silver // 100
+        silver %= 100
+        copper = raw_value % 100
+        return DataclassGoldAmount(int(gold), int(silver), int(copper))
+
+    def to_copper(self) -> int:
+        return (self.gold * 10**4) + (self.silver * 10**2) + (self.copper * 10**0)
+
+    def __add__(self, other: DataclassGoldAmount) -> DataclassGoldAmount:
+        return DataclassGoldAmount.from_copper(self.to_copper() + other.to_copper())
+
+    def __mul__(self, val: int) -> DataclassGoldAmount:
+        return DataclassGoldAmount.from_copper(self.to_copper() * val)
+
+    def __truediv__(self, val: float) -> DataclassGoldAmount:
+        return DataclassGoldAmount.from_copper(self.to_copper() / val)
+
+
+def workloads(money_type, count: int):
+    amounts = [money_type.from_copper(i * 37) for i in range(count)]
+    zero = money_type.from_copper(0)
+    return {
+        # Recipe.price / Profession.total_cost_to: sum of price * quantity
+        "sum(price * qty)": lambda: sum((amount * 3 for amount in amounts), zero),
+        # Recipe.cost_for_skillup: price / probability
+        "price / probability": lambda: [amount / 0.45 for amount in amounts],
+        # Profession.cheapest_way_to_level_at: min over costs
+        "min()": lambda: min(amounts),
+    }
+
+
+def peak_allocation(money_type, count: int) -> int:
+    tracemalloc.start()
+    amounts = [money_type.from_copper(i * 37) for i in range(count)]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del amounts
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GoldAmount arithmetic")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    types = {"dataclass": DataclassGoldAmount, "copper-backed": GoldAmount}
+    print(f"{args.count:,} amounts, best of {args.repeat}")
+    print(f"{'operation':24} " + " ".join(f"{name + ' (ms)':>18}" for name in types) + f" {'speedup':>8}")
+    timings = {name: workloads(money_type, args.count) for name, money_type in types.items()}
+    for operation in timings["dataclass"]:
+        best = {name: min(timeit.repeat(timings[name][operation], number=1, repeat=args.repeat)) * 1000 for name in types}
+        print(f"{operation:24} " + " ".join(f"{best[name]:18.1f}" for name in types) + f" {best['dataclass'] / best['copper-backed']:7.1f}x")
+
+    print()
+    print(f"{'memory':24} " + " ".join(f"{name:>18}" for name in types))
+    sizes = {name: sys.getsizeof(money_type.from_copper(12345)) for name, money_type in types.items()}
+    print(f"{'bytes per object':24} " + " ".join(f"{sizes[name]:18}" for name in types))
+    peaks = {name: peak_allocation(money_type, args.count) for name, money_type in types.items()}
+    print(f"{'peak bytes allocated':24} " + " ".join(f"{peaks[name]:18,}" for name in types))
+
+
+if __name__ == "__main__":
+    main()
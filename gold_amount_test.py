@@ -0,0 +1,31 @@
+from gold_amount import GoldAmount
+import unittest
+
+class GoldAmountTest(unittest.TestCase):
+
+    def test_split(self):
+        amount = GoldAmount.from_copper(1234567)
+        self.assertEqual((amount.gold, amount.silver, amount.copper), (123, 45, 67))
+        self.assertEqual(amount, GoldAmount(123, 45, 67))
+        self.assertEqual(str(amount), "123g45s67cu")
+        self.assertEqual(str(GoldAmount.from_copper(5)), "5cu")
+
+    def test_arithmetic(self):
+        price = GoldAmount(1, 50, 0)
+        self.assertEqual((price + GoldAmount(0, 50, 1)).to_copper(), 20001)
+        self.assertEqual((price * 3).to_copper(), 45000)
+        # Fractional copper is floored
+        self.assertEqual((GoldAmount.from_copper(100) / 0.3).to_copper(), 333)
+
+    def test_ordering(self):
+        amounts = [GoldAmount(1, 0, 0), GoldAmount(0, 99, 99), GoldAmount(0, 0, 1)]
+        self.assertEqual(min(amounts), GoldAmount(0, 0, 1))
+        self.assertEqual(sorted(amounts)[-1], GoldAmount(1, 0, 0))
+        self.assertLess(GoldAmount(0, 99, 99), GoldAmount(1, 0, 0))
+        for compare in (lambda a, b: a < b, lambda a, b: a <= b, lambda a, b: a > b, lambda a, b: a >= b):
+            with self.assertRaises(TypeError):
+                compare(GoldAmount(0, 0, 1), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
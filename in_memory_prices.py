@@ -0,0 +1,45 @@
+"""Price provider that serves prices from memory, for benchmarks and offline runs.
+
+It answers the calls a `Profession` makes on a `NexusHubApi` (`prefetch`, `get_item`,
+...) without a cache file or the network, so professions of any size can be built
+and repriced quickly. Items without an explicit price get `default_price(item_id)`.
+"""
+
+from typing import Callable, Dict, Iterable, Optional
+
+from gold_amount import GoldAmount
+from nexushub_api import Reagent, ReagentRegistry
+
+
+class InMemoryPrices:
+
+    def __init__(self, prices: Optional[Dict[int, int]] = None, default_price: Callable[[int], int] = lambda item_id: 1,
+                 server: str = "memory", faction: str = "horde"):
+        self.prices = dict(prices or {})
+        self.default_price = default_price
+        self.server = server
+        self.faction = faction
+        self.reagents = ReagentRegistry()
+
+    def prefetch(self, item_ids: Iterable[int], max_workers: Optional[int] = None):
+        pass
+
+    def set_price(self, item_id: int, price: int):
+        """Changes an item's price; call `Profession.update_prices` on professions built from it."""
+        self.prices[int(item_id)] = price
+
+    def get_item_price(self, item_id) -> GoldAmount:
+        return self.get_item(item_id).price
+
+    def get_item_name(self, item_id) -> str:
+        return self.get_item(item_id).name
+
+    def get_item(self, item_id) -> Reagent:
+        item_id = int(item_id)
+        price = self.prices.get(item_id)
+        if price is None:
+            price = self.default_price(item_id)
+        return self.reagents.get(item_id, price, f"Item {item_id}")
+
+    def close(self):
+        pass
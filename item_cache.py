@@ -0,0 +1,167 @@
+"""Write-behind item cache.
+
+The cache lives in two files next to each other:
+
+- `<name>.json`: a compact snapshot, `{item_id: item_data}`, in the same format the
+  cache files have always used.
+- `<name>.log`: one JSON record per line, `[item_id, item_data]`, appended for every
+  item written since the last snapshot.
+
+Writing an item appends a single line instead of re-serializing the whole cache. The
+log is merged into the snapshot on `close()`, or once it has grown to `compact_ratio`
+times the snapshot's size (and at least `min_compact_bytes`). Compacting geometrically
+like this keeps the bytes written to fill a cache of n items O(n), where compacting
+every fixed number of records would rewrite the growing snapshot O(n) times. A torn
+final line (e.g. the process was killed mid-write) is dropped when the log is replayed.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterator, Optional
+
+from price_series import PriceSeries
+
+
+class ItemCache:
+    snapshot_path: str
+    log_path: str
+    data: Dict[str, dict]
+
+    def __init__(self, snapshot_path: str, compact_ratio: float = 1.0, min_compact_bytes: int = 1 << 16):
+        self.snapshot_path = snapshot_path
+        self.log_path = os.path.splitext(snapshot_path)[0] + ".log"
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self.data = self.load_snapshot()
+        self.snapshot_bytes = os.path.getsize(snapshot_path) if os.path.exists(snapshot_path) else 0
+        self.log_bytes = 0
+        self.pending = self.replay_log()
+        self.log_file = None
+        # Writes may come from a background refresh thread as well as the caller's
+        self.lock = threading.RLock()
+
+    def load_snapshot(self) -> Dict[str, dict]:
+        if not os.path.exists(self.snapshot_path):
+            return {}
+        with open(self.snapshot_path, "r") as f:
+            return json.load(f)
+
+    def replay_log(self) -> int:
+        """Applies the log on top of the snapshot and returns the number of records replayed.
+
+        Everything from the first unreadable line onwards is cut off the log, so the next
+        append starts on a clean line.
+        """
+        if not os.path.exists(self.log_path):
+            return 0
+        records = 0
+        valid_bytes = 0
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    item_id, item_data = json.loads(line)
+                except ValueError:
+                    break
+                self.data[str(item_id)] = item_data
+                valid_bytes += len(line)
+                records += 1
+        if valid_bytes != os.path.getsize(self.log_path):
+            with open(self.log_path, "r+b") as f:
+                f.truncate(valid_bytes)
+        self.log_bytes = valid_bytes
+        return records
+
+    def __contains__(self, item_id) -> bool:
+        return str(item_id) in self.data
+
+    def __getitem__(self, item_id) -> dict:
+        return self.data[str(item_id)]
+
+    def get(self, item_id, default: Optional[dict] = None) -> Optional[dict]:
+        return self.data.get(str(item_id), default)
+
+    def __setitem__(self, item_id, item_data: dict):
+        with self.lock:
+            # A new price keeps the item's history
+            history = self.data.get(str(item_id), {}).get("history")
+            if history is not None and "history" not in item_data:
+                item_data = {**item_data, "history": history}
+            self.data[str(item_id)] = item_data
+            if self.log_file is None:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                self.log_file = open(self.log_path, "a")
+            line = json.dumps([str(item_id), item_data]) + "\n"
+            self.log_file.write(line)
+            self.log_file.flush()
+            self.pending += 1
+            self.log_bytes += len(line)  # json.dumps escapes non-ASCII, so characters are bytes
+            if self.log_bytes >= max(self.min_compact_bytes, self.compact_ratio * self.snapshot_bytes):
+                self.compact()
+
+    def series(self, item_id) -> Optional[PriceSeries]:
+        """Returns the item's price history, kept as columns under its `history` key."""
+        item_data = self.data.get(str(item_id))
+        if item_data is None or "history" not in item_data:
+            return None
+        return PriceSeries.from_columns(item_data["history"])
+
+    def set_series(self, item_id, series: PriceSeries):
+        self[item_id] = {**self.data[str(item_id)], "history": series.to_columns()}
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def items(self):
+        return self.data.items()
+
+    def version(self) -> tuple:
+        """Returns a token that changes whenever the cache files on disk change."""
+        signature = []
+        for path in (self.snapshot_path, self.log_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def flush(self):
+        """Nothing to do: every write is already flushed to the log."""
+
+    def compact(self):
+        """Merges the log into a fresh snapshot, then empties the log."""
+        with self.lock:
+            if self.pending == 0:
+                return
+            # Replacing the snapshot is atomic; if we die before the log is removed, replaying
+            # it again on the next load is harmless.
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.data, f)
+            os.replace(tmp_path, self.snapshot_path)
+            self.snapshot_bytes = os.path.getsize(self.snapshot_path)
+            if self.log_file is not None:
+                self.log_file.close()
+                self.log_file = None
+            os.remove(self.log_path)
+            self.pending = 0
+            self.log_bytes = 0
+
+    def close(self):
+        with self.lock:
+            self.compact()
+            if self.log_file is not None:
+                self.log_file.close()
+                self.log_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,65 @@
+from item_cache import ItemCache
+import json
+import os
+import tempfile
+import unittest
+
+
+class ItemCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.path = os.path.join(self.cache_dir.name, "item_cache_test_horde.json")
+
+    def test_writes_are_appended_then_compacted(self):
+        cache = ItemCache(self.path)
+        cache[10940] = {"name": "Strange Dust", "marketValue": 1103}
+        cache[10938] = {"name": "Lesser Magic Essence", "marketValue": 4050}
+        self.assertFalse(os.path.exists(self.path))
+        with open(cache.log_path) as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        cache.close()
+        self.assertFalse(os.path.exists(cache.log_path))
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)["10940"]["marketValue"], 1103)
+
+    def test_compacts_when_log_outgrows_snapshot(self):
+        cache = ItemCache(self.path, compact_ratio=2, min_compact_bytes=0)
+        cache[1] = {"name": "a", "marketValue": 1}
+        self.assertTrue(os.path.exists(self.path))
+        self.assertFalse(os.path.exists(cache.log_path))
+        cache[2] = {"name": "b", "marketValue": 2}
+        self.assertTrue(os.path.exists(cache.log_path))
+        cache[3] = {"name": "c", "marketValue": 3}
+        self.assertFalse(os.path.exists(cache.log_path))
+        self.assertEqual(ItemCache(self.path).get(3), {"name": "c", "marketValue": 3})
+
+    def test_compactions_grow_geometrically(self):
+        cache = ItemCache(self.path, min_compact_bytes=0)
+        compactions = []
+        compact = cache.compact
+        cache.compact = lambda: compactions.append(cache.pending) or compact()
+        for item_id in range(2000):
+            cache[item_id] = {"name": f"Item {item_id}", "marketValue": item_id}
+        self.assertLess(len(compactions), 15)
+        self.assertEqual(len(ItemCache(self.path)), len(cache))
+
+    def test_recovers_from_torn_final_line(self):
+        cache = ItemCache(self.path)
+        cache[1] = {"name": "a", "marketValue": 1}
+        cache.log_file.write('["2", {"name": "b", "mark')
+        cache.log_file.close()
+
+        recovered = ItemCache(self.path)
+        self.assertIn(1, recovered)
+        self.assertNotIn(2, recovered)
+        recovered[3] = {"name": "c", "marketValue": 3}
+
+        reloaded = ItemCache(self.path)
+        self.assertEqual(sorted(reloaded), ["1", "3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,66 +1,172 @@
 import dataclasses
 from typing import Callable
+import commands
 from nexushub_api import NexusHubApi
-from profession import Enchanting, Engineering, Profession
+from metrics import NULL_METRICS, STATS_FORMATS, Metrics
+from price_series import parse_timestamp
+from profession import ENGINES, PROFESSIONS, TOP_K
 
-servers = NexusHubApi.fetch_servers()
 factions = ["horde", "alliance"]
-
-nexus_hub_api = NexusHubApi("sulfuras", "horde")
-professions = {
-    "enchanting": Enchanting,
-    "engineering": Engineering,
-}
+professions = PROFESSIONS
 
 import argparse
+from datetime import datetime, timezone
 import json
+import sys
 
 def main():
     parser = argparse.ArgumentParser(description='Select a server and a faction')
-    parser.add_argument('--server', type=str, default="faerlina", choices=servers)
+    # Servers are checked against data/servers.json after parsing, only by the commands that use them
+    parser.add_argument('--server', type=str, default="faerlina")
     parser.add_argument('--faction', type=str, default="horde", choices=factions)
     parser.add_argument('--profession', type=str, choices=professions.keys(), default="enchanting")
+    parser.add_argument('--from_level', type=int, default=1)
     parser.add_argument('--target_level', type=int, default=450)
-    parser.add_argument('--command', type=str, default="reagents", choices=["reagents", "path", "total_cost"])
-    parser.add_argument('--format', type=str, default="human-readable", choices=["human-readable", "json"])
+    parser.add_argument('--command', type=str, default="reagents", choices=commands.COMMANDS + ["batch", "serve", "import", "trend", "simulate", "queries"])
+    parser.add_argument('--format', type=str, default="human-readable", choices=commands.FORMATS)
+    parser.add_argument('--engine', type=str, default="scalar", choices=ENGINES)
+    parser.add_argument('--servers', type=str, nargs="+", default=None, help="Servers priced by --command batch (default: all)")
+    parser.add_argument('--factions', type=str, nargs="+", choices=factions, default=factions, help="Factions priced by --command batch")
+    parser.add_argument('--professions', type=str, nargs="+", choices=professions.keys(), default=list(professions), help="Professions priced by --command batch")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for --command batch (default: one per CPU)")
+    parser.add_argument('--port', type=int, default=8080, help="Port for --command serve")
+    parser.add_argument('--cache_size', type=int, default=8, help="Professions kept warm by --command serve and queries")
+    parser.add_argument('--cache_ttl_hours', type=float, default=None,
+                        help="Refresh cached prices older than this in the background (0 keeps them forever; default: 24 for serve and queries, 0 otherwise)")
+    parser.add_argument('--scan_file', type=str, default=None, help="Auction scan (CSV or JSON lines) for --command import")
+    parser.add_argument('--as_of', type=str, default=None, help="Price with the stored price history as of this time, e.g. 2023-02-26T00:00:00Z")
+    parser.add_argument('--make_or_buy', action="store_true", help="Price craftable reagents at the cheaper of buying and crafting them")
+    parser.add_argument('--stats', type=str, nargs="?", const="text", default=None, choices=STATS_FORMATS,
+                        help="Write timings, cache and API counters to stderr after the command (text or json)")
+    parser.add_argument('--alternatives', type=int, default=TOP_K, help="Cheapest recipes kept per skill level and shown by --command path")
+    parser.add_argument('--exclude', type=int, nargs="+", default=[], help="Recipe ids to leave out, e.g. when a reagent is sold out")
+    parser.add_argument('--days', type=int, default=7, help="Days covered by --command trend")
+    parser.add_argument('--runs', type=int, default=100_000, help="Levelings simulated by --command simulate")
+    parser.add_argument('--seed', type=int, default=None, help="Random seed for --command simulate")
     args = parser.parse_args()
 
-    profession = professions[args.profession](
-       nexus_hub_api=NexusHubApi(
+    if args.command == "batch":
+        import batch
+
+        servers = NexusHubApi.fetch_servers()
+        for server in args.servers or []:
+            if server not in servers:
+                parser.error(f"argument --servers: invalid choice: '{server}'")
+        results = batch.run_batch(
+            servers=args.servers or servers,
+            factions=args.factions,
+            profession_names=args.professions,
+            target_level=args.target_level,
+            workers=args.workers,
+            out=sys.stdout if args.format == "json" else None,
+        )
+        if args.format == "human-readable":
+            batch.print_comparison(results)
+        return
+
+    if args.command == "serve":
+        import service
+
+        service.serve(port=args.port, cache_size=args.cache_size, engine=args.engine, ttl=cache_ttl(args))
+        return
+
+    if args.command == "queries":
+        import query_stream
+        import service
+
+        # Each query's server is checked by the cache against the same list
+        servers = NexusHubApi.fetch_servers()
+        if args.server not in servers:
+            parser.error(f"argument --server: invalid choice: '{args.server}'")
+        warm = service.ProfessionCache(capacity=args.cache_size, engine=args.engine, ttl=cache_ttl(args))
+        warm.servers = servers
+        defaults = {
+            "server": args.server,
+            "faction": args.faction,
+            "profession": args.profession,
+            "from_level": args.from_level,
+            "target_level": args.target_level,
+            "format": "json",
+        }
+        try:
+            query_stream.answer_queries(sys.stdin, sys.stdout, warm, defaults)
+        finally:
+            warm.close()
+        return
+
+    if args.server not in NexusHubApi.fetch_servers():
+        parser.error(f"argument --server: invalid choice: '{args.server}'")
+    if args.from_level > args.target_level:
+        parser.error(f"argument --from_level: {args.from_level} is above --target_level {args.target_level}")
+    metrics = Metrics() if args.stats else NULL_METRICS
+    api = NexusHubApi(
         server=args.server,
         faction=args.faction,
-       ) 
+        ttl=cache_ttl(args),
+        metrics=metrics,
     )
 
-    if args.command == "reagents":
-        reagents = profession.reagents_required_to(args.target_level)
-        if args.format == "human-readable":
-            print(f"Reagents required from 1-{args.target_level}")
-            for reagent, quantity in reagents.items():
-                print(f"{reagent.name} x{quantity}")
-        else:
-            print(json.dumps([
-                {
-                "id": reagent.id,
-                "price": reagent.price.to_copper(),
-                "name": reagent.name,
-                "quantity": quantity,
-                } for reagent, quantity in reagents.items()
-            ]))
-    elif args.command == "path":
+    with metrics.phase("command"):
+        try:
+            run_realm_command(parser, args, api)
+        finally:
+            api.close()
+    if args.stats:
+        metrics.report(sys.stderr, args.stats)
+
+
+def run_realm_command(parser, args, api: NexusHubApi):
+    """Runs the commands that answer for a single realm."""
+    if args.command == "import":
+        import scan_import
+
+        if args.scan_file is None:
+            parser.error("--command import requires --scan_file")
+        imported = scan_import.import_scan(args.scan_file, api, scan_import.referenced_item_ids())
+        print(f"Imported {imported} prices from {args.scan_file} into {api.server}-{api.faction}")
+        return
+
+    if args.command == "trend":
+        import price_history
+
+        trend = price_history.cost_trend(professions[args.profession], api, args.target_level, args.days)
         if args.format == "human-readable":
-            profession.print_recipe_path(args.target_level)
+            for at, total_cost in trend:
+                print(f"{datetime.fromtimestamp(at, timezone.utc):%Y-%m-%d %H:%M}: {total_cost} to go from 1-{args.target_level}")
         else:
-            print(json.dumps({
-                skill_level: recipe.__dict__() for skill_level, recipe in enumerate(profession.recipe_path[:args.target_level], 1)
-            }))
+            print(json.dumps([{"at": at, "total_cost": total_cost.to_copper()} for at, total_cost in trend]))
+        return
 
-    if args.command == "total_cost":
+    prices = api if args.as_of is None else api.as_of(parse_timestamp(args.as_of))
+    profession = professions[args.profession](nexus_hub_api=prices, engine=args.engine, make_or_buy=args.make_or_buy, top_k=args.alternatives)
+    profession.exclude_recipes(args.exclude)
+
+    if args.command == "simulate":
+        import simulation
+
+        result = simulation.simulate(profession, args.from_level, args.target_level, runs=args.runs, seed=args.seed)
         if args.format == "human-readable":
-            print(f"It costs {profession.total_cost_to(args.target_level)} to go from 1-{args.target_level}")
+            simulation.print_simulation(result)
         else:
-            print({"total_cost": profession.total_cost_to(args.target_level).to_copper()})
+            print(json.dumps(result.__dict__()))
+        return
+
+    with api.metrics.phase("answer"):
+        commands.run_command(
+            profession,
+            command=args.command,
+            from_level=args.from_level,
+            target_level=args.target_level,
+            format=args.format,
+        )
+
 
+def cache_ttl(args):
+    # A one-shot command exits before a background refresh could finish, so it only refreshes if asked to
+    hours = args.cache_ttl_hours
+    if hours is None:
+        hours = 24 if args.command in ["serve", "queries"] else 0
+    return hours * 3600 if hours > 0 else None
 
 
 if __name__ == "__main__":
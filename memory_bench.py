@@ -0,0 +1,78 @@
+"""Memory footprint of many realms' professions in one process.
+
+Builds `--realms` copies of Enchanting, each on its own NexusHubApi, with prices read
+from one local JSON cache so nothing is fetched. Reports the memory each realm adds on
+top of the recipe table they all share (measured with tracemalloc, price cache
+included). `--copy_reagents` gives every recipe its own `Reagent` objects again, to
+compare against the interned registry.
+
+    python memory_bench.py --server sulfuras --realms 1 10 50
+"""
+
+import argparse
+import gc
+import tracemalloc
+
+from item_cache import ItemCache
+from nexushub_api import NexusHubApi, Reagent, ReagentRegistry
+from profession import Enchanting
+from recipe_table import load_recipe_table
+
+
+class CopyingRegistry(ReagentRegistry):
+    """A new `Reagent` for every lookup, as before reagents were interned."""
+
+    def get(self, item_id, price: int, name: str) -> Reagent:
+        return Reagent(id=int(item_id), price=price, name=name)
+
+
+class SharedCacheNexusHubApi(NexusHubApi):
+    """Reads any realm's prices from one JSON cache file and never fetches."""
+
+    def __init__(self, server: str, faction: str, cache_path: str, copy_reagents: bool):
+        super().__init__(server, faction, cache_backend="json")
+        self.source_cache_path = cache_path
+        if copy_reagents:
+            self.reagents = CopyingRegistry()
+
+    def load_cache(self):
+        return ItemCache(self.source_cache_path)
+
+    def fetch_data_from_api(self, item_id):
+        raise RuntimeError(f"Item {item_id} is not in {self.source_cache_path}")
+
+
+def measure(realms: int, cache_path: str, copy_reagents: bool) -> int:
+    """Returns the bytes allocated by building `realms` professions."""
+    gc.collect()
+    tracemalloc.start()
+    professions = [
+        Enchanting(nexus_hub_api=SharedCacheNexusHubApi(f"realm-{i}", "horde", cache_path, copy_reagents))
+        for i in range(realms)
+    ]
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del professions
+    return allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-realm memory of loaded professions")
+    parser.add_argument("--server", type=str, default="sulfuras")
+    parser.add_argument("--faction", type=str, default="horde")
+    parser.add_argument("--realms", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--copy_reagents", action="store_true")
+    args = parser.parse_args()
+
+    cache_path = NexusHubApi(args.server, args.faction).cache_path()
+    # Load the shared table outside the measurements
+    load_recipe_table(Enchanting.RECIPE_JSON_PATH)
+    print(f"{'realms':>6} {'total (KiB)':>12} {'per realm (KiB)':>16}")
+    for realms in args.realms:
+        allocated = measure(realms, cache_path, args.copy_reagents)
+        print(f"{realms:6} {allocated / 1024:12.0f} {allocated / 1024 / realms:16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Run metrics: wall time per phase, counters, latency histograms and per-level work.
+
+`NexusHubApi` and `Profession` report into the `Metrics` they are given (a profession
+uses its price source's). By default that is `NULL_METRICS`, whose methods do nothing,
+so instrumented code costs one no-op call when metrics are off.
+
+    python main.py --server sulfuras --command total_cost --stats
+    python main.py --server sulfuras --command total_cost --stats json
+"""
+
+from contextlib import contextmanager, nullcontext
+import json
+import threading
+import time
+from typing import Dict, List, TextIO
+
+# Upper bounds of the latency histogram buckets, in milliseconds; the last bucket is open
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+STATS_FORMATS = ["text", "json"]
+
+
+class Metrics:
+    enabled = True
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}  # name: seconds, summed over every time it ran
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, List[int]] = {}  # name: count per bucket of LATENCY_BUCKETS_MS, plus one
+        self.evaluated_by_level: Dict[int, int] = {}  # skill level: candidate recipes evaluated
+        # API fetches report from worker threads
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0) + elapsed
+
+    def count(self, name: str, n: int = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def observe(self, name: str, seconds: float):
+        """Adds one latency sample to the histogram `name`."""
+        milliseconds = seconds * 1000
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if milliseconds <= bound), len(LATENCY_BUCKETS_MS))
+        with self.lock:
+            histogram = self.histograms.setdefault(name, [0] * (len(LATENCY_BUCKETS_MS) + 1))
+            histogram[bucket] += 1
+
+    def evaluated(self, skill_level: int, candidates: int):
+        """Records that choosing the recipe for `skill_level` compared `candidates` recipes."""
+        self.evaluated_by_level[skill_level] = self.evaluated_by_level.get(skill_level, 0) + candidates
+
+    def __dict__(self):
+        return {
+            "phases": self.phases,
+            "counters": self.counters,
+            "histograms": {
+                name: {"buckets_ms": LATENCY_BUCKETS_MS, "counts": counts} for name, counts in self.histograms.items()
+            },
+            "recipes_evaluated": sum(self.evaluated_by_level.values()),
+            "recipes_evaluated_by_level": self.evaluated_by_level,
+        }
+
+    def report(self, out: TextIO, format: str = "text"):
+        if format not in STATS_FORMATS:
+            raise ValueError(f"{format} is not a valid stats format. Valid stats formats: {STATS_FORMATS}.")
+        if format == "json":
+            print(json.dumps(self.__dict__()), file=out)
+            return
+        print("Phases:", file=out)
+        for name, seconds in sorted(self.phases.items(), key=lambda phase: -phase[1]):
+            print(f"  {name:24} {seconds * 1000:10.1f}ms", file=out)
+        if self.counters:
+            print("Counters:", file=out)
+            for name, value in sorted(self.counters.items()):
+                print(f"  {name:24} {value:10}", file=out)
+        for name, counts in sorted(self.histograms.items()):
+            print(f"{name} (ms):", file=out)
+            bounds = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+            for bound, count in zip(bounds, counts):
+                if count:
+                    print(f"  {bound:>8} {count:8}", file=out)
+        if self.evaluated_by_level:
+            levels = len(self.evaluated_by_level)
+            total = sum(self.evaluated_by_level.values())
+            busiest = max(self.evaluated_by_level, key=self.evaluated_by_level.get)
+            print(f"Recipes evaluated: {total} over {levels} levels "
+                  f"(mean {total / levels:.1f}, most {self.evaluated_by_level[busiest]} at level {busiest})", file=out)
+
+
+class NullMetrics:
+    """Metrics that are not recorded."""
+
+    enabled = False
+    NO_PHASE = nullcontext()
+
+    def phase(self, name: str):
+        return self.NO_PHASE
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def observe(self, name: str, seconds: float):
+        pass
+
+    def evaluated(self, skill_level: int, candidates: int):
+        pass
+
+
+NULL_METRICS = NullMetrics()
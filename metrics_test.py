@@ -0,0 +1,65 @@
+from metrics import NULL_METRICS, Metrics
+from profession import Profession
+from test_helpers import FakeNexusHubApi, FixedPriceApi
+import io
+import json
+import tempfile
+import unittest
+
+
+class MetricsTest(unittest.TestCase):
+
+    def test_records_phases_counters_and_latencies(self):
+        metrics = Metrics()
+        with metrics.phase("work"):
+            pass
+        with metrics.phase("work"):
+            pass
+        metrics.count("hits")
+        metrics.count("hits", 2)
+        metrics.observe("latency", 0.0015)
+        metrics.observe("latency", 60)
+        self.assertIn("work", metrics.phases)
+        self.assertEqual(metrics.counters, {"hits": 3})
+        self.assertEqual(metrics.histograms["latency"][1], 1)
+        self.assertEqual(metrics.histograms["latency"][-1], 1)
+
+        out = io.StringIO()
+        metrics.report(out, "json")
+        self.assertEqual(json.loads(out.getvalue())["counters"], {"hits": 3})
+        with self.assertRaises(ValueError):
+            metrics.report(out, "xml")
+
+    def test_nexus_hub_api_counts_cache_and_requests(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        metrics = Metrics()
+        api = FakeNexusHubApi("test", "horde", cache_dir=cache_dir.name, metrics=metrics)
+        api.prefetch([1, 2])
+        api.get_item(1)
+        api.get_item(3)
+        api.close()
+        self.assertEqual(metrics.counters, {"prefetch_misses": 2, "prefetch_stale": 0, "cache_hits": 1, "cache_misses": 1, "api_requests": 3})
+        self.assertEqual(sum(metrics.histograms["api_latency"]), 3)
+        self.assertIn("cache_load", metrics.phases)
+
+    def test_profession_counts_recipes_evaluated_per_level(self):
+        api = FixedPriceApi()
+        api.metrics = Metrics()
+        profession = Profession("test", api, recipe_json_path=None, recipe_data=[
+            {"id": 1, "name": "Recipe 1", "colors": [0, 10, 20, 30], "reagents": [[1, 1]]},
+            {"id": 2, "name": "Recipe 2", "colors": [5, 10, 20, 30], "reagents": [[2, 1]]},
+        ])
+        profession.total_cost_to(20)
+        self.assertEqual(api.metrics.evaluated_by_level[3], 1)
+        self.assertEqual(api.metrics.evaluated_by_level[10], 2)
+        self.assertIn("recipe_path", api.metrics.phases)
+
+    def test_null_metrics_record_nothing(self):
+        with NULL_METRICS.phase("work"):
+            NULL_METRICS.count("hits")
+        self.assertFalse(NULL_METRICS.enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
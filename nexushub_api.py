@@ -1,22 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 import json
 import os
-from typing import Union
-import requests
+import queue
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Union
 
 from gold_amount import GoldAmount
+from item_cache import ItemCache
+from metrics import NULL_METRICS, Metrics, NullMetrics
+import price_store
+from price_series import PriceSeries, parse_timestamp
+
+CACHE_BACKENDS = ["json", "sqlite"]
 
 class NexusHubApi:
+    API_URL = "https://api.nexushub.co/wow-classic/v1"
+    MAX_WORKERS = 8
+    REFRESH_BATCH_SIZE = 32
+
     server: str
     faction: str
-    cache: dict
+    cache: Union[ItemCache, price_store.RealmPrices]
+    ttl: Optional[float] # seconds a cached price stays fresh, or None to keep prices forever
 
-    def __init__(self, server: str, faction: str):
+    def __init__(self, server: str, faction: str, api_url: str = API_URL, cache_dir: str = "cache", max_workers: int = MAX_WORKERS,
+                 ttl: Optional[float] = None, refresh_batch_size: int = REFRESH_BATCH_SIZE, cache_backend: str = "sqlite",
+                 metrics: Union[Metrics, NullMetrics] = NULL_METRICS):
         if faction not in ["horde", "alliance"]:
             raise ValueError(f"{faction} is not a valid faction. Valid factions: [\"horde\", \"alliance\"].")
+        if cache_backend not in CACHE_BACKENDS:
+            raise ValueError(f"{cache_backend} is not a valid cache backend. Valid cache backends: {CACHE_BACKENDS}.")
         self.server = server.lower()
         self.faction = faction.lower()
-        self.cache = self.load_cache()
+        self.api_url = api_url
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.refresh_batch_size = refresh_batch_size
+        self.cache_backend = cache_backend
+        self.metrics = metrics
+        # The cache file and the HTTP session are only opened once something needs them
+        self._cache = None
+        self._session = None
+        # Stale items waiting for the background refresher, which starts on first use
+        self._refresh_queue = queue.Queue()
+        self._refresh_pending = set()
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+        self._closed = threading.Event()
+        self._cache_closed = False
+        self.reagents = ReagentRegistry()
+
+    @property
+    def cache(self) -> Union[ItemCache, price_store.RealmPrices]:
+        if self._cache is None:
+            self._cache = self.load_cache()
+        return self._cache
+
+    @property
+    def session(self):
+        """One keep-alive session shared by every request, with a pooled connection per prefetch worker."""
+        if self._session is None:
+            # requests is slow to import, and a run with a warm cache never needs it
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            self._session.mount("http://", adapter)
+            self._session.mount("https://", adapter)
+        return self._session
 
     def get_item_price(self, item_id):
         return GoldAmount.from_copper(self.get_item(item_id).price)
@@ -24,50 +80,222 @@ class NexusHubApi:
     def get_item_name(self, item_id):
         return self.get_item(item_id).name
 
-    def get_item(self, item_id):
+    def get_item(self, item_id) -> "Reagent":
+        """Returns the one `Reagent` for `item_id`, updated to its current cached price."""
         item_data = self.get_item_data(item_id)
-        return Reagent(
-            id=item_id,
-            price=GoldAmount.from_copper(item_data["marketValue"]),
-            name=item_data["name"],
-        )
+        return self.reagents.get(item_id, item_data["marketValue"], item_data["name"])
 
     def get_item_data(self, item_id):
         """Returns a dictionary containing the `marketValue` and `name` fields for the given `itemId`.
 
         If the item data is not in the cache, fetches it from the API and updates the cache.
+        If it is cached but stale, returns it right away and refreshes it in the background.
         """
-        if str(item_id) in self.cache:
-            return self.cache[str(item_id)]
-        else:
+        item_data = self.cache.get(item_id)
+        if item_data is None:
+            self.metrics.count("cache_misses")
             # Fetch the data from the API and update the cache
-            api_data = self.fetch_data_from_api(item_id)  # replace with actual API call
-            if len(api_data["data"]) == 0:
-                cost = 0
-            else:
-                cost = api_data["data"][0]["marketValue"]
-            item_data = { "name": api_data["name"], "marketValue": cost}
-            self.cache[str(item_id)] = item_data
-            self.save_cache()
+            item_data = self.store_item_data(item_id, self.timed_fetch(item_id))
+            self.cache.flush()
+            print(f"Fetched data for {item_data['name']} ({item_id}) on {self.server}-{self.faction}")
+        elif self.is_stale(item_data):
+            self.metrics.count("stale_hits")
+            self.schedule_refresh([item_id])
+        else:
+            self.metrics.count("cache_hits")
+        return item_data
+
+    def prefetch(self, item_ids: Iterable[int], max_workers: Optional[int] = None):
+        """Fetches every item in `item_ids` that is not cached yet, `max_workers` at a time.
+
+        Cached items that are stale are handed to the background refresher instead.
+        """
+        missing = set()
+        stale = set()
+        for item_id in item_ids:
+            item_data = self.cache.get(item_id)
+            if item_data is None:
+                missing.add(int(item_id))
+            elif self.is_stale(item_data):
+                stale.add(int(item_id))
+        self.metrics.count("prefetch_misses", len(missing))
+        self.metrics.count("prefetch_stale", len(stale))
+        self.schedule_refresh(stale)
+        for item_id, item_data in self.fetch_many(missing, max_workers):
             print(f"Fetched data for {item_data['name']} ({item_id}) on {self.server}-{self.faction}")
-            return item_data
 
-    # TODO: delete cache if old
+    def fetch_many(self, item_ids: Iterable[int], max_workers: Optional[int] = None):
+        """Fetches and caches the given items concurrently, yielding (item_id, item_data) as each one arrives.
+
+        Raises `FetchError` once every item has been tried if any of them failed.
+        """
+        item_ids = sorted(item_ids)
+        if not item_ids:
+            return
+        self.session  # open the session here rather than racing to open it from the workers
+        failures = {}
+        with ThreadPoolExecutor(max_workers=max_workers or self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_unless_closed, item_id): item_id for item_id in item_ids}
+            try:
+                for future in as_completed(futures):
+                    item_id = futures[future]
+                    if future.exception() is not None:
+                        failures[item_id] = future.exception()
+                    elif future.result() is not None:
+                        yield item_id, self.store_item_data(item_id, future.result())
+            finally:
+                # Everything that arrived is written in one batch
+                with self.cache.lock:
+                    if not self._cache_closed:
+                        self.cache.flush()
+        # A failed item doesn't cost the others theirs
+        if failures:
+            raise FetchError(failures)
+
+    def store_item_data(self, item_id, api_data):
+        if len(api_data["data"]) == 0:
+            cost = 0
+            scanned_at = None
+        else:
+            cost = api_data["data"][0]["marketValue"]
+            scanned_at = api_data["data"][0].get("scannedAt")
+        item_data = { "name": api_data["name"], "marketValue": cost, "scannedAt": scanned_at, "fetchedAt": time.time()}
+        with self.cache.lock:
+            if self._cache_closed:
+                return item_data  # arrived after close(); there is nowhere left to keep it
+            self.cache[item_id] = item_data
+            self.add_history(item_id, PriceSeries.from_api_data(api_data["data"]))
+        return item_data
+
+    def add_history(self, item_id, series: PriceSeries):
+        """Merges newly seen scans into the item's stored price history."""
+        if len(series) == 0:
+            return
+        stored = self.cache.series(item_id)
+        self.cache.set_series(item_id, series if stored is None else stored.merge(series))
+
+    def as_of(self, at: float):
+        """Returns a view of these prices as they were at Unix time `at`, built from the stored price history."""
+        from price_history import HistoricalNexusHubApi
+
+        return HistoricalNexusHubApi(self, at)
+
+    def is_stale(self, item_data: dict) -> bool:
+        """Returns whether a cached price is older than the TTL.
+
+        Its age comes from when it was fetched, or else when it was scanned; entries
+        cached before either was recorded are always stale.
+        """
+        if self.ttl is None:
+            return False
+        updated_at = item_data.get("fetchedAt")
+        if updated_at is None and item_data.get("scannedAt"):
+            updated_at = parse_timestamp(item_data["scannedAt"])
+        return updated_at is None or time.time() - updated_at > self.ttl
+
+    def schedule_refresh(self, item_ids: Iterable[int]):
+        """Queues items for the background refresher, starting it if needed. Never blocks on the network."""
+        with self._refresh_lock:
+            if self._closed.is_set():
+                return
+            for item_id in item_ids:
+                if item_id not in self._refresh_pending:
+                    self._refresh_pending.add(item_id)
+                    self._refresh_queue.put(item_id)
+            if self._refresh_pending and self._refresher is None:
+                self._refresher = threading.Thread(target=self.refresh_stale_items, name=f"refresh-{self.server}-{self.faction}", daemon=True)
+                self._refresher.start()
+
+    def refresh_stale_items(self):
+        """Background worker: refetches queued items, at most `refresh_batch_size` at a time."""
+        while not self._closed.is_set():
+            batch = [self._refresh_queue.get()]
+            while len(batch) < self.refresh_batch_size:
+                try:
+                    batch.append(self._refresh_queue.get_nowait())
+                except queue.Empty:
+                    break
+            # close() wakes the refresher up with None
+            item_ids = [item_id for item_id in batch if item_id is not None]
+            try:
+                for _ in self.fetch_many(item_ids):
+                    pass
+            except Exception as e:
+                # Keep serving the stale prices; they will be queued again on next use
+                print(f"Failed to refresh prices on {self.server}-{self.faction}: {e}", file=sys.stderr)
+            finally:
+                with self._refresh_lock:
+                    self._refresh_pending.difference_update(batch)
+                for _ in batch:
+                    self._refresh_queue.task_done()
+        # Drop whatever was still queued when close() was called
+        while True:
+            try:
+                self._refresh_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._refresh_queue.task_done()
+
+    def wait_for_refresh(self):
+        """Blocks until every queued background refresh has finished."""
+        self._refresh_queue.join()
+
+    def fetch_unless_closed(self, item_id):
+        """`timed_fetch`, or None once the API is closed, so close() doesn't wait on requests not yet sent."""
+        if self._closed.is_set():
+            return None
+        return self.timed_fetch(item_id)
+
+    def timed_fetch(self, item_id):
+        """`fetch_data_from_api`, recorded in the `api_latency` histogram."""
+        start = time.perf_counter()
+        try:
+            return self.fetch_data_from_api(item_id)
+        finally:
+            self.metrics.observe("api_latency", time.perf_counter() - start)
+            self.metrics.count("api_requests")
+
     def load_cache(self):
-        """Loads the item cache from disk, or returns an empty dict if the file does not exist."""
-        cache_path = self.cache_path()
-        if not os.path.exists(cache_path):
-            return {}
-        with open(cache_path, "r") as f:
-            return json.load(f)
+        """Loads this realm's prices from disk.
+
+        With the "sqlite" backend they come from the price store shared by every realm,
+        which takes over the realm's JSON cache the first time it is opened. With "json",
+        items fetched later are appended to the JSON cache's log as they arrive.
+        """
+        with self.metrics.phase("cache_load"):
+            if self.cache_backend == "json":
+                return ItemCache(self.cache_path())
+            store = price_store.PriceStore(price_store.store_path(self.cache_dir))
+            if store.version(self.server, self.faction) == 0 and os.path.exists(self.cache_path()):
+                price_store.migrate_json_cache(store, self.cache_path())
+            return store.realm(self.server, self.faction)
 
     def save_cache(self):
-        """Saves the item cache to disk."""
-        with open(self.cache_path(), "w") as f:
-            json.dump(self.cache, f)
+        """Writes every item fetched so far to disk."""
+        self.cache.compact()
+
+    def close(self):
+        """Closes the cache and the session.
+
+        Refreshes that haven't started are dropped rather than waited for. Requests already
+        in flight are finished and cached first, so this waits for at most one request.
+        """
+        with self._refresh_lock:
+            self._closed.set()
+            refresher = self._refresher
+        if refresher is not None and refresher is not threading.current_thread() and refresher.is_alive():
+            self._refresh_queue.put(None)
+            refresher.join()
+        if self._cache is not None:
+            with self._cache.lock:
+                self._cache_closed = True
+                self._cache.close()
+        if self._session is not None:
+            self._session.close()
 
     def cache_path(self):
-        return f"cache/item_cache_{self.server}_{self.faction}.json"
+        """Path of this realm's JSON cache."""
+        return os.path.join(self.cache_dir, f"item_cache_{self.server}_{self.faction}.json")
 
     """
     Sample response:
@@ -88,7 +316,7 @@ class NexusHubApi:
     }
     """
     def fetch_data_from_api(self, item_id):
-        return requests.get(f"https://api.nexushub.co/wow-classic/v1/items/{self.server}-{self.faction}/{item_id}/prices").json()
+        return self.session.get(f"{self.api_url}/items/{self.server}-{self.faction}/{item_id}/prices").json()
 
     """
     Sample response:
@@ -106,17 +334,32 @@ class NexusHubApi:
     ]
     """
     @staticmethod
-    def fetch_servers():
+    def fetch_servers() -> List[str]:
+        """Returns the slug of every known server, downloading the server list once."""
         if not os.path.exists("data/servers.json"):
-            servers = requests.get(f"https://api.nexushub.co/wow-classic/v1/servers/full").json()
+            import requests
+
+            servers = requests.get(f"{NexusHubApi.API_URL}/servers/full").json()
             with open("data/servers.json", "w") as f:
                 json.dump(servers, f)
-            return servers
-        with open("data/servers.json", "r") as f:
-            return map(lambda x: x["slug"], json.load(f))
+        else:
+            with open("data/servers.json", "r") as f:
+                servers = json.load(f)
+        return [server["slug"] for server in servers]
+
+class FetchError(Exception):
+    """Some items of a `fetch_many` batch could not be fetched; the others were cached."""
+
+    def __init__(self, failures: Dict[int, BaseException]):
+        self.failures = failures
+        item_id, error = min(failures.items())
+        super().__init__(f"Failed to fetch {len(failures)} item(s), e.g. {item_id}: {type(error).__name__}: {error}")
+
 
 @dataclass
 class Reagent:
+    __slots__ = ("id", "price", "name")
+
     id: int
     price: GoldAmount
     name: str
@@ -139,3 +382,27 @@ class Reagent:
             price=GoldAmount.from_copper(int(json["data"][0]["marketValue"])),
             name=json["name"],
         )
+
+
+class ReagentRegistry:
+    """Interns reagents: one `Reagent` per item id, shared by every recipe that uses it.
+
+    A new price or name updates that object in place, so recipes see it too; their
+    `Recipe.price` still has to be recomputed (see `Profession.update_prices`).
+    """
+
+    def __init__(self):
+        self.reagents: Dict[int, Reagent] = {}
+
+    def get(self, item_id, price: int, name: str) -> Reagent:
+        item_id = int(item_id)
+        reagent = self.reagents.get(item_id)
+        if reagent is None:
+            reagent = self.reagents[item_id] = Reagent(id=item_id, price=price, name=name)
+        elif reagent.price.to_copper() != price or reagent.name != name:
+            reagent.price = GoldAmount.from_copper(price)
+            reagent.name = name
+        return reagent
+
+    def __len__(self) -> int:
+        return len(self.reagents)
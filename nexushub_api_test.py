@@ -0,0 +1,107 @@
+from nexushub_api import FetchError, NexusHubApi
+from test_helpers import FakeNexusHubApi
+import tempfile
+import threading
+import time
+import unittest
+
+
+class NexusHubApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_prefetch_only_fetches_missing_items(self):
+        api = FakeNexusHubApi("test", "horde", cache_dir=self.cache_dir.name, max_workers=4)
+        api.prefetch([1, 2, 3, 3])
+        api.prefetch([2, 3, 4])
+        self.assertEqual(sorted(api.requested), [1, 2, 3, 4])
+        self.assertEqual(api.get_item(4).price.to_copper(), 40)
+
+        reloaded = FakeNexusHubApi("test", "horde", cache_dir=self.cache_dir.name)
+        self.assertEqual(reloaded.get_item_name(1), "Item 1")
+        self.assertEqual(reloaded.requested, [])
+
+    def test_a_failed_item_does_not_drop_the_others(self):
+        api = FakeNexusHubApi("test", "horde", cache_dir=self.cache_dir.name, max_workers=4)
+        fetch = api.fetch_data_from_api
+
+        def fetch_data_from_api(item_id):
+            if item_id == 2:
+                raise ConnectionError("connection reset")
+            return fetch(item_id)
+
+        api.fetch_data_from_api = fetch_data_from_api
+        with self.assertRaises(FetchError) as raised:
+            api.prefetch([1, 2, 3, 4])
+        self.assertEqual(list(raised.exception.failures), [2])
+        self.assertEqual([item_id for item_id in [1, 2, 3, 4] if api.cache.get(item_id) is not None], [1, 3, 4])
+        api.close()
+
+    def test_stale_items_are_served_then_refreshed_in_background(self):
+        api = FakeNexusHubApi("test", "horde", cache_dir=self.cache_dir.name, ttl=60)
+        api.cache[1] = {"name": "Item 1", "marketValue": 5, "fetchedAt": time.time() - 120}
+        api.cache[2] = {"name": "Item 2", "marketValue": 7}  # cached before timestamps were kept
+        api.cache[3] = {"name": "Item 3", "marketValue": 9, "fetchedAt": time.time()}
+
+        self.assertEqual(api.get_item(1).price.to_copper(), 5)
+        api.prefetch([2, 3, 4])
+        self.assertEqual(api.requested.count(4), 1)  # never cached: fetched right away
+        api.wait_for_refresh()
+        self.assertEqual(sorted(api.requested), [1, 2, 4])
+        self.assertEqual(api.get_item(1).price.to_copper(), 10)
+        self.assertEqual(api.get_item(2).price.to_copper(), 20)
+        self.assertEqual(api.get_item(3).price.to_copper(), 9)
+        api.close()
+
+    def test_close_drops_queued_refreshes_and_keeps_those_in_flight(self):
+        api = FakeNexusHubApi("test", "horde", cache_dir=self.cache_dir.name, ttl=60, max_workers=1)
+        fetch = api.fetch_data_from_api
+        in_flight, release = threading.Event(), threading.Event()
+
+        def fetch_data_from_api(item_id):
+            in_flight.set()
+            release.wait()
+            return fetch(item_id)
+
+        api.fetch_data_from_api = fetch_data_from_api
+        for item_id in range(10):
+            api.cache[item_id] = {"name": f"Item {item_id}", "marketValue": 5}
+        api.prefetch(range(10))
+        self.assertTrue(in_flight.wait(5))
+        closer = threading.Thread(target=api.close)
+        closer.start()
+        # Only let the request finish once close() has started waiting on it
+        self.assertTrue(api._closed.wait(5))
+        release.set()
+        closer.join(5)
+        self.assertFalse(closer.is_alive())
+        self.assertFalse(api._refresher.is_alive())
+
+        reloaded = NexusHubApi("test", "horde", cache_dir=self.cache_dir.name)
+        refreshed = [item_id for item_id in range(10) if reloaded.cache.get(item_id).get("fetchedAt")]
+        self.assertEqual(len(api.requested), 1)
+        self.assertEqual(refreshed, api.requested)
+        reloaded.close()
+
+    def test_without_ttl_prices_never_expire(self):
+        api = FakeNexusHubApi("test", "horde", cache_dir=self.cache_dir.name)
+        api.cache[1] = {"name": "Item 1", "marketValue": 5}
+        api.get_item(1)
+        api.wait_for_refresh()
+        self.assertEqual(api.requested, [])
+
+    def test_reagents_are_interned(self):
+        api = FakeNexusHubApi("test", "horde", cache_dir=self.cache_dir.name)
+        reagent = api.get_item(1)
+        self.assertIs(api.get_item("1"), reagent)
+        api.cache[1] = {"name": "Item 1", "marketValue": 5}
+        self.assertIs(api.get_item(1), reagent)
+        self.assertEqual(reagent.price.to_copper(), 5)
+        self.assertEqual(len(api.reagents), 1)
+        api.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
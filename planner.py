@@ -0,0 +1,101 @@
+"""Globally cheapest leveling plan.
+
+`Profession.recipe_path` picks the cheapest recipe for each skill level on its own. The
+planner instead runs a shortest-path search over skill states 1..target: from skill `s`,
+crafting a candidate recipe costs its expected price at `s` (`Recipe.cost_for_skillup`)
+and moves to `s + nskillup`. Two rules keep plans valid:
+
+- at a `required_recipes` level, the required recipe is the only way forward;
+- a multi-point skillup may not jump over a required level.
+
+Levels where nothing can be crafted are skipped for free, as the greedy path skips them.
+Costs are compared in the same expected-cost terms for both, so the totals are directly
+comparable.
+"""
+
+from dataclasses import dataclass
+import time
+from typing import List, Tuple
+
+from gold_amount import GoldAmount
+from recipes import Recipe
+
+UNREACHABLE = float("inf")
+
+
+@dataclass
+class Plan:
+    steps: List[Tuple[int, Recipe]]  # (skill level the recipe is crafted at, recipe)
+    total_cost: GoldAmount  # expected cost, summed over steps
+    elapsed: float  # seconds spent computing the plan
+
+    def __dict__(self):
+        return {
+            "total_cost": self.total_cost.to_copper(),
+            "elapsed": self.elapsed,
+            "steps": [[skill_level, recipe.id] for skill_level, recipe in self.steps],
+        }
+
+
+def optimal_plan(profession, target: int = 450) -> Plan:
+    """Returns the plan from skill 1 to `target` with the lowest total expected cost."""
+    start = time.perf_counter()
+    required_levels = sorted(profession.required_recipes)
+    best = [UNREACHABLE] * (target + 1)
+    # previous[s] = (skill level the last step started at, recipe crafted there, or None for a free skip)
+    previous = [None] * (target + 1)
+    best[1] = 0
+    for skill_level in range(1, target):
+        if best[skill_level] == UNREACHABLE:
+            continue
+        for recipe, next_level in transitions(profession, skill_level, target, required_levels):
+            cost = best[skill_level] + (recipe.cost_for_skillup(skill_level).to_copper() if recipe else 0)
+            if cost < best[next_level]:
+                best[next_level] = cost
+                previous[next_level] = (skill_level, recipe)
+
+    steps = []
+    skill_level = target
+    while previous[skill_level] is not None:
+        skill_level, recipe = previous[skill_level]
+        if recipe is not None:
+            steps.append((skill_level, recipe))
+    steps.reverse()
+    total_cost = GoldAmount.from_copper(best[target] if best[target] != UNREACHABLE else 0)
+    return Plan(steps, total_cost, time.perf_counter() - start)
+
+
+def transitions(profession, skill_level: int, target: int, required_levels: List[int]):
+    """Yields (recipe, next skill level) for every move out of `skill_level`; recipe is None for a free skip."""
+    if skill_level in profession.required_recipes:
+        recipe = profession.recipe_by_id(profession.required_recipes[skill_level])
+        if recipe is not None:
+            yield recipe, min(skill_level + recipe.nskillup, target)
+            return
+    candidates = profession.possible_recipes(skill_level)
+    if not candidates:
+        yield None, skill_level + 1
+        return
+    # A step may land on the next required level, but not jump past it
+    next_required = next((level for level in required_levels if skill_level < level < target), None)
+    for recipe in candidates:
+        next_level = min(skill_level + recipe.nskillup, target)
+        if next_required is not None and next_level > next_required:
+            continue
+        yield recipe, next_level
+
+
+def greedy_plan(profession, target: int = 450) -> Plan:
+    """Returns the per-level cheapest choices up to `target` (what `recipe_path` holds) as a plan.
+
+    Each level is costed the same way as in `optimal_plan`.
+    """
+    start = time.perf_counter()
+    steps = []
+    for skill_level in range(1, target):
+        recipe = profession.cheapest_way_to_level_at(skill_level)
+        if recipe is not None:
+            steps.append((skill_level, recipe))
+    elapsed = time.perf_counter() - start
+    total_cost = sum(recipe.cost_for_skillup(skill_level).to_copper() for skill_level, recipe in steps)
+    return Plan(steps, GoldAmount.from_copper(total_cost), elapsed)
@@ -0,0 +1,40 @@
+from planner import greedy_plan, optimal_plan
+from profession import Profession
+from test_helpers import FixedPriceApi
+import unittest
+
+
+def recipe(id, price, colors, nskillup=1):
+    return {"id": id, "name": f"Recipe {id}", "colors": colors, "nskillup": nskillup, "reagents": [[id, price]]}
+
+
+class PlannerTest(unittest.TestCase):
+
+    def profession(self, recipes, required_recipes={}):
+        return Profession("test", FixedPriceApi(), recipe_json_path=None, recipe_data=recipes, required_recipes=required_recipes)
+
+    def test_prefers_multi_point_recipes_when_cheaper_overall(self):
+        profession = self.profession([
+            recipe(1, 100, [0, 20, 30, 40]),
+            recipe(2, 150, [0, 20, 30, 40], nskillup=2),
+        ])
+        greedy = greedy_plan(profession, target=11)
+        optimal = optimal_plan(profession, target=11)
+        self.assertEqual({step_recipe.id for _, step_recipe in greedy.steps}, {1})
+        self.assertEqual({step_recipe.id for _, step_recipe in optimal.steps}, {2})
+        self.assertLess(optimal.total_cost, greedy.total_cost)
+
+    def test_does_not_jump_past_required_recipes(self):
+        profession = self.profession([
+            recipe(1, 100, [0, 20, 30, 40]),
+            recipe(2, 150, [0, 20, 30, 40], nskillup=2),
+            recipe(3, 500, [0, 20, 30, 40]),
+        ], required_recipes={6: 3})
+        steps = optimal_plan(profession, target=11).steps
+        self.assertIn((6, profession.recipe_by_id(3)), steps)
+        for (skill_level, step_recipe), (next_level, _) in zip(steps, steps[1:]):
+            self.assertEqual(skill_level + step_recipe.nskillup, next_level)
+
+
+if __name__ == "__main__":
+    unittest.main()
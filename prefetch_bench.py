@@ -0,0 +1,96 @@
+"""Cold-start benchmark for `NexusHubApi.prefetch`.
+
+Serves fake NexusHub price responses from a local stub server with a fixed
+per-request latency, then builds `Enchanting` against an empty cache once per
+pool size.
+
+    python prefetch_bench.py --latency_ms 20 --pool_sizes 1 2 4 8 16
+"""
+
+import argparse
+import io
+import json
+import re
+import socket
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from nexushub_api import NexusHubApi
+from profession import Enchanting
+
+
+class StubNexusHubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    latency = 0.0
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; don't let Nagle hold the body back.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with StubNexusHubHandler.lock:
+            StubNexusHubHandler.connections += 1
+
+    def do_GET(self):
+        match = re.search(r"/items/[^/]+/(\d+)/prices", self.path)
+        if match is None:
+            self.send_error(404)
+            return
+        time.sleep(self.latency)
+        item_id = int(match.group(1))
+        body = json.dumps({
+            "itemId": item_id,
+            "name": f"Item {item_id}",
+            "data": [{"marketValue": item_id % 10000, "minBuyout": 0, "quantity": 1, "scannedAt": "2023-02-26T00:22:18.000Z"}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def cold_start(api_url: str, pool_size: int) -> float:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        api = NexusHubApi("stub", "horde", api_url=api_url, cache_dir=cache_dir, max_workers=pool_size)
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            Enchanting(nexus_hub_api=api)
+        elapsed = time.perf_counter() - start
+        api.close()
+        return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold-cache startup against a local stub server")
+    parser.add_argument("--latency_ms", type=float, default=20)
+    parser.add_argument("--pool_sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    StubNexusHubHandler.latency = args.latency_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubNexusHubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"Stub latency = {args.latency_ms}ms per request")
+    print(f"{'workers':>7} {'seconds':>8} {'speedup':>8} {'connections':>11}")
+    baseline = None
+    try:
+        for pool_size in args.pool_sizes:
+            StubNexusHubHandler.connections = 0
+            elapsed = cold_start(api_url, pool_size)
+            baseline = baseline or elapsed
+            print(f"{pool_size:7} {elapsed:8.3f} {baseline / elapsed:7.1f}x {StubNexusHubHandler.connections:11}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
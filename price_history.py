@@ -0,0 +1,70 @@
+"""Point-in-time views of a realm's prices, and cost trends built from them."""
+
+import time
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from gold_amount import GoldAmount
+from metrics import NULL_METRICS
+from nexushub_api import NexusHubApi, Reagent, ReagentRegistry
+
+DAY = 24 * 3600
+
+
+class HistoricalNexusHubApi:
+    """The prices of a `NexusHubApi` as they were at time `at`, for building a `Profession`.
+
+    Items with no scan at or before `at` keep their current cached price. `at` may be
+    moved; call `Profession.update_prices` with `changed_items` afterwards.
+    """
+
+    def __init__(self, nexus_hub_api: NexusHubApi, at: float):
+        self.nexus_hub_api = nexus_hub_api
+        self.at = at
+        self.server = nexus_hub_api.server
+        self.faction = nexus_hub_api.faction
+        self.metrics = getattr(nexus_hub_api, "metrics", NULL_METRICS)
+        # Separate from the api's own reagents, which keep their current prices
+        self.reagents = ReagentRegistry()
+
+    def prefetch(self, item_ids: Iterable[int], max_workers: Optional[int] = None):
+        self.nexus_hub_api.prefetch(item_ids, max_workers)
+
+    def get_item_price(self, item_id):
+        return self.get_item(item_id).price
+
+    def get_item_name(self, item_id):
+        return self.get_item(item_id).name
+
+    def get_item(self, item_id) -> Reagent:
+        current = self.nexus_hub_api.get_item(item_id)
+        series = self.nexus_hub_api.cache.series(item_id)
+        value = series.value_at(self.at) if series is not None else None
+        return self.reagents.get(item_id, current.price.to_copper() if value is None else value, current.name)
+
+    def changed_items(self, item_ids: Iterable[int], since: float) -> List[int]:
+        """Returns the items whose price at `at` differs from their price at `since`."""
+        changed = []
+        for item_id in item_ids:
+            series = self.nexus_hub_api.cache.series(item_id)
+            if series is not None and series.value_at(since) != series.value_at(self.at):
+                changed.append(item_id)
+        return changed
+
+
+def cost_trend(profession_factory: Callable, nexus_hub_api: NexusHubApi, target: int, days: int,
+               now: Optional[float] = None) -> List[Tuple[float, GoldAmount]]:
+    """Returns the total cost to reach `target` once a day over the last `days` days, oldest first.
+
+    `profession_factory` builds the profession from a price source, e.g. `Enchanting`.
+    The path is computed once, then only re-derived where a reagent's price moved.
+    """
+    now = time.time() if now is None else now
+    historical = HistoricalNexusHubApi(nexus_hub_api, now - days * DAY)
+    profession = profession_factory(historical)
+    trend = [(historical.at, profession.total_cost_to(target))]
+    for day in range(days - 1, -1, -1):
+        previous = historical.at
+        historical.at = now - day * DAY
+        profession.update_prices(historical.changed_items(list(profession.recipes_by_reagent), previous))
+        trend.append((historical.at, profession.total_cost_to(target)))
+    return trend
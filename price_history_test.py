@@ -0,0 +1,67 @@
+from price_history import DAY, cost_trend
+from price_series import PriceSeries
+from profession import Enchanting
+from test_helpers import OfflineNexusHubApi, realm_cache_dir
+import unittest
+
+STRANGE_DUST = 10940
+
+
+class PriceSeriesTest(unittest.TestCase):
+
+    def test_value_at(self):
+        series = PriceSeries([10.0, 20.0, 30.0], [100, 200, 300], [1, 2, 3])
+        self.assertIsNone(series.value_at(9.9))
+        self.assertEqual(series.value_at(10.0), 100)
+        self.assertEqual(series.value_at(29.9), 200)
+        self.assertEqual(series.value_at(1e12), 300)
+
+    def test_merge_sorts_and_prefers_newer_scans(self):
+        series = PriceSeries([10.0, 30.0], [100, 300], [1, 3]).merge(PriceSeries([20.0, 30.0], [200, 310], [2, 4]))
+        self.assertEqual(list(series.points()), [(10.0, 100, 1), (20.0, 200, 2), (30.0, 310, 4)])
+        self.assertEqual(PriceSeries.from_blobs(*series.to_blobs()), series)
+        self.assertEqual(PriceSeries.from_columns(series.to_columns()), series)
+
+    def test_from_api_data(self):
+        series = PriceSeries.from_api_data([
+            {"marketValue": 154358, "quantity": 574, "scannedAt": "2023-02-26T00:22:18.000Z"},
+            {"marketValue": 150000, "quantity": 600, "scannedAt": "2023-02-25T00:22:18.000Z"},
+        ])
+        self.assertEqual(list(series.values), [150000, 154358])
+
+
+class PriceHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = realm_cache_dir()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.api = OfflineNexusHubApi("sulfuras", "horde", cache_dir=self.cache_dir.name)
+        self.addCleanup(self.api.close)
+        self.now = 1_700_000_000.0
+        self.price = self.api.get_item(STRANGE_DUST).price.to_copper()
+        # Strange Dust cost ten times as much until two days ago
+        self.api.add_history(STRANGE_DUST, PriceSeries([self.now - 5 * DAY, self.now - 2 * DAY], [self.price * 10, self.price], [1, 1]))
+
+    def test_history_is_stored(self):
+        self.api.save_cache()
+        reloaded = OfflineNexusHubApi("sulfuras", "horde", cache_dir=self.cache_dir.name)
+        self.addCleanup(reloaded.close)
+        self.assertEqual(reloaded.cache.series(STRANGE_DUST).value_at(self.now - 3 * DAY), self.price * 10)
+
+    def test_as_of(self):
+        historical = self.api.as_of(self.now - 3 * DAY)
+        self.assertEqual(historical.get_item(STRANGE_DUST).price.to_copper(), self.price * 10)
+        self.assertEqual(historical.get_item(10938), self.api.get_item(10938))  # no history: current price
+        then = Enchanting(nexus_hub_api=historical).total_cost_to(100)
+        self.assertGreater(then, Enchanting(nexus_hub_api=self.api).total_cost_to(100))
+
+    def test_cost_trend_matches_fresh_computations(self):
+        trend = cost_trend(Enchanting, self.api, 100, days=4, now=self.now)
+        self.assertEqual([at for at, _ in trend], [self.now - day * DAY for day in range(4, -1, -1)])
+        for at, total_cost in trend:
+            self.assertEqual(total_cost, Enchanting(nexus_hub_api=self.api.as_of(at)).total_cost_to(100))
+        self.assertGreater(trend[0][1], trend[-1][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
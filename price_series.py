@@ -0,0 +1,76 @@
+"""Price history of one item, kept as columns.
+
+A `PriceSeries` keeps an item's auction scans as three parallel arrays (timestamps,
+market values and quantities) sorted by time, so the price at any moment is a binary
+search away and a whole series is stored as three blobs.
+"""
+
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+
+def parse_timestamp(scanned_at: str) -> float:
+    """Returns the Unix time of a `scannedAt` value such as "2023-02-26T00:22:18.000Z"."""
+    return datetime.fromisoformat(scanned_at.replace("Z", "+00:00")).timestamp()
+
+
+class PriceSeries:
+    __slots__ = ("timestamps", "values", "quantities")
+
+    def __init__(self, timestamps: Iterable[float] = (), values: Iterable[int] = (), quantities: Iterable[int] = ()):
+        self.timestamps = array("d", timestamps)
+        self.values = array("q", values)
+        self.quantities = array("q", quantities)
+
+    @staticmethod
+    def from_points(points: Iterable[Tuple[float, int, int]]) -> "PriceSeries":
+        """Builds a series from (timestamp, market value, quantity); the last point wins on equal timestamps."""
+        by_time = {timestamp: (value, quantity) for timestamp, value, quantity in points}
+        timestamps = sorted(by_time)
+        return PriceSeries(timestamps, (by_time[t][0] for t in timestamps), (by_time[t][1] for t in timestamps))
+
+    @staticmethod
+    def from_api_data(data: List[dict]) -> "PriceSeries":
+        """Builds a series from the `data` list of a NexusHub prices response."""
+        return PriceSeries.from_points(
+            (parse_timestamp(point["scannedAt"]), int(point["marketValue"]), int(point.get("quantity") or 0))
+            for point in data if point.get("scannedAt")
+        )
+
+    def points(self) -> Iterable[Tuple[float, int, int]]:
+        return zip(self.timestamps, self.values, self.quantities)
+
+    def merge(self, other: "PriceSeries") -> "PriceSeries":
+        """Returns the union of both series; `other` wins where both have a scan at the same time."""
+        return PriceSeries.from_points(list(self.points()) + list(other.points()))
+
+    def value_at(self, timestamp: float) -> Optional[int]:
+        """Returns the market value of the latest scan at or before `timestamp`, or None if there is none."""
+        i = bisect_right(self.timestamps, timestamp)
+        return self.values[i - 1] if i else None
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PriceSeries) and tuple(self.points()) == tuple(other.points())
+
+    def to_blobs(self) -> Tuple[bytes, bytes, bytes]:
+        return self.timestamps.tobytes(), self.values.tobytes(), self.quantities.tobytes()
+
+    @staticmethod
+    def from_blobs(timestamps: bytes, values: bytes, quantities: bytes) -> "PriceSeries":
+        series = PriceSeries()
+        series.timestamps.frombytes(timestamps)
+        series.values.frombytes(values)
+        series.quantities.frombytes(quantities)
+        return series
+
+    def to_columns(self) -> List[list]:
+        return [self.timestamps.tolist(), self.values.tolist(), self.quantities.tolist()]
+
+    @staticmethod
+    def from_columns(columns: List[list]) -> "PriceSeries":
+        return PriceSeries(*columns)
@@ -0,0 +1,286 @@
+"""SQLite price store shared by every realm.
+
+One database (in WAL mode, so readers never wait for a writer) holds the prices of all
+realms, keyed by (realm, faction, item_id). `RealmPrices` is the view `NexusHubApi` uses
+as its cache: it loads its realm with one primary-key range scan, looks up items other
+processes added since with an indexed point query, and batches its own writes into a
+single transaction per `flush_threshold` items.
+
+Existing `item_cache_<server>_<faction>.json` files are imported the first time their
+realm is opened, or all at once with
+
+    python price_store.py --cache_dir cache
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from item_cache import ItemCache
+from price_series import PriceSeries
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    realm TEXT NOT NULL,
+    faction TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    market_value INTEGER NOT NULL,
+    scanned_at TEXT,
+    fetched_at REAL,
+    PRIMARY KEY (realm, faction, item_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS price_history (
+    realm TEXT NOT NULL,
+    faction TEXT NOT NULL,
+    item_id INTEGER NOT NULL,
+    timestamps BLOB NOT NULL,
+    market_values BLOB NOT NULL,
+    quantities BLOB NOT NULL,
+    PRIMARY KEY (realm, faction, item_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS realm_versions (
+    realm TEXT NOT NULL,
+    faction TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (realm, faction)
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO prices (realm, faction, item_id, name, market_value, scanned_at, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (realm, faction, item_id) DO UPDATE SET
+    name = excluded.name, market_value = excluded.market_value, scanned_at = excluded.scanned_at, fetched_at = excluded.fetched_at
+"""
+
+UPSERT_HISTORY = """
+INSERT INTO price_history (realm, faction, item_id, timestamps, market_values, quantities) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (realm, faction, item_id) DO UPDATE SET
+    timestamps = excluded.timestamps, market_values = excluded.market_values, quantities = excluded.quantities
+"""
+
+COLUMNS = "item_id, name, market_value, scanned_at, fetched_at"
+
+
+def store_path(cache_dir: str) -> str:
+    return os.path.join(cache_dir, "prices.sqlite3")
+
+
+def to_item_data(row) -> dict:
+    _, name, market_value, scanned_at, fetched_at = row
+    return {"name": name, "marketValue": market_value, "scannedAt": scanned_at, "fetchedAt": fetched_at}
+
+
+class PriceStore:
+    path: str
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One connection per store, shared with the background refresher under a lock
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+
+    def load_realm(self, realm: str, faction: str) -> Dict[str, dict]:
+        with self.lock:
+            rows = self.connection.execute(f"SELECT {COLUMNS} FROM prices WHERE realm = ? AND faction = ?", (realm, faction)).fetchall()
+        return {str(row[0]): to_item_data(row) for row in rows}
+
+    def get(self, realm: str, faction: str, item_id: int) -> Optional[dict]:
+        with self.lock:
+            row = self.connection.execute(
+                f"SELECT {COLUMNS} FROM prices WHERE realm = ? AND faction = ? AND item_id = ?", (realm, faction, int(item_id))
+            ).fetchone()
+        return to_item_data(row) if row else None
+
+    def get_series(self, realm: str, faction: str, item_id: int) -> Optional[PriceSeries]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT timestamps, market_values, quantities FROM price_history WHERE realm = ? AND faction = ? AND item_id = ?",
+                (realm, faction, int(item_id)),
+            ).fetchone()
+        return PriceSeries.from_blobs(*row) if row else None
+
+    def upsert_many(self, realm: str, faction: str, items: Iterable[Tuple[int, dict]],
+                    series: Iterable[Tuple[int, PriceSeries]] = ()):
+        """Writes every (item_id, item_data) and (item_id, series) in one transaction and bumps the realm's version."""
+        rows = [
+            (realm, faction, int(item_id), item_data["name"], int(item_data["marketValue"]), item_data.get("scannedAt"), item_data.get("fetchedAt"))
+            for item_id, item_data in items
+        ]
+        history_rows = [(realm, faction, int(item_id), *item_series.to_blobs()) for item_id, item_series in series]
+        if not rows and not history_rows:
+            return
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.executemany(UPSERT, rows)
+                self.connection.executemany(UPSERT_HISTORY, history_rows)
+                self.connection.execute(
+                    "INSERT INTO realm_versions (realm, faction, version) VALUES (?, ?, 1) "
+                    "ON CONFLICT (realm, faction) DO UPDATE SET version = version + 1",
+                    (realm, faction),
+                )
+                self.connection.execute("COMMIT")
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+    def version(self, realm: str, faction: str) -> int:
+        with self.lock:
+            row = self.connection.execute("SELECT version FROM realm_versions WHERE realm = ? AND faction = ?", (realm, faction)).fetchone()
+        return row[0] if row else 0
+
+    def realm(self, realm: str, faction: str, flush_threshold: int = 256) -> "RealmPrices":
+        return RealmPrices(self, realm, faction, flush_threshold)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class RealmPrices:
+    """Item cache of one realm and faction, backed by a `PriceStore`.
+
+    Behaves like `ItemCache`: item ids may be given as int or str. Writes are buffered
+    until `flush()`, or until `flush_threshold` of them are pending.
+    """
+
+    def __init__(self, store: PriceStore, realm: str, faction: str, flush_threshold: int = 256):
+        self.store = store
+        self.realm = realm
+        self.faction = faction
+        self.flush_threshold = flush_threshold
+        self.data = store.load_realm(realm, faction)
+        self.pending: Dict[str, dict] = {}
+        # Price histories are larger and rarely needed, so they are only read on demand
+        self.history: Dict[str, PriceSeries] = {}
+        self.pending_history: Dict[str, PriceSeries] = {}
+        self.lock = threading.RLock()
+
+    def __contains__(self, item_id) -> bool:
+        return self.get(item_id) is not None
+
+    def __getitem__(self, item_id) -> dict:
+        item_data = self.get(item_id)
+        if item_data is None:
+            raise KeyError(item_id)
+        return item_data
+
+    def get(self, item_id, default: Optional[dict] = None) -> Optional[dict]:
+        item_data = self.data.get(str(item_id))
+        if item_data is None:
+            # Another process may have added it since this realm was loaded
+            item_data = self.store.get(self.realm, self.faction, item_id)
+            if item_data is None:
+                return default
+            self.data[str(item_id)] = item_data
+        return item_data
+
+    def __setitem__(self, item_id, item_data: dict):
+        with self.lock:
+            self.data[str(item_id)] = item_data
+            self.pending[str(item_id)] = item_data
+            if len(self.pending) >= self.flush_threshold:
+                self.flush()
+
+    def series(self, item_id) -> Optional[PriceSeries]:
+        """Returns the item's price history, or None if none was stored."""
+        series = self.history.get(str(item_id))
+        if series is None:
+            series = self.store.get_series(self.realm, self.faction, item_id)
+            if series is not None:
+                self.history[str(item_id)] = series
+        return series
+
+    def set_series(self, item_id, series: PriceSeries):
+        with self.lock:
+            self.history[str(item_id)] = series
+            self.pending_history[str(item_id)] = series
+
+    def update(self, items: Iterable[Tuple[int, dict]]):
+        """Writes many items in one batch."""
+        with self.lock:
+            for item_id, item_data in items:
+                self.data[str(item_id)] = item_data
+                self.pending[str(item_id)] = item_data
+            self.flush()
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def items(self):
+        return self.data.items()
+
+    def version(self) -> int:
+        return self.store.version(self.realm, self.faction)
+
+    def flush(self):
+        """Writes every buffered item to the store in one transaction."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            pending_history, self.pending_history = self.pending_history, {}
+            self.store.upsert_many(self.realm, self.faction, pending.items(), pending_history.items())
+
+    def compact(self):
+        self.flush()
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.store.close()
+
+
+def realm_of(json_cache_path: str) -> Tuple[str, str]:
+    """Returns (realm, faction) from an `item_cache_<server>_<faction>.json` file name."""
+    stem = os.path.splitext(os.path.basename(json_cache_path))[0]
+    realm, faction = stem[len("item_cache_"):].rsplit("_", 1)
+    return realm, faction
+
+
+def migrate_json_cache(store: PriceStore, json_cache_path: str) -> int:
+    """Copies one JSON item cache (snapshot and log) into the store; returns the number of items.
+
+    Items cached before fetch times were kept are stamped with the file's modification
+    time, the latest they can have been fetched, so they don't all count as stale.
+    """
+    realm, faction = realm_of(json_cache_path)
+    modified_at = os.path.getmtime(json_cache_path)
+    items = [
+        (item_id, item_data if item_data.get("fetchedAt") or item_data.get("scannedAt") else dict(item_data, fetchedAt=modified_at))
+        for item_id, item_data in ItemCache(json_cache_path).items()
+    ]
+    store.upsert_many(realm, faction, items)
+    return len(items)
+
+
+def migrate_json_caches(store: PriceStore, cache_dir: str) -> List[Tuple[str, int]]:
+    """Copies every JSON item cache in `cache_dir` into the store."""
+    migrated = []
+    for json_cache_path in sorted(glob.glob(os.path.join(cache_dir, "item_cache_*_*.json"))):
+        migrated.append((json_cache_path, migrate_json_cache(store, json_cache_path)))
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import JSON item caches into the SQLite price store")
+    parser.add_argument("--cache_dir", type=str, default="cache")
+    args = parser.parse_args()
+    store = PriceStore(store_path(args.cache_dir))
+    for json_cache_path, count in migrate_json_caches(store, args.cache_dir):
+        print(f"{json_cache_path}: {count} items")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from item_cache import ItemCache
+from price_store import PriceStore, migrate_json_caches, realm_of
+import os
+import tempfile
+import threading
+import unittest
+
+
+class PriceStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.path = os.path.join(self.cache_dir.name, "prices.sqlite3")
+
+    def item(self, price):
+        return {"name": f"Item {price}", "marketValue": price, "scannedAt": None, "fetchedAt": 1.0}
+
+    def test_realms_are_kept_apart(self):
+        store = PriceStore(self.path)
+        store.upsert_many("sulfuras", "horde", [(1, self.item(10))])
+        store.upsert_many("sulfuras", "alliance", [(1, self.item(20))])
+        self.assertEqual(store.get("sulfuras", "horde", 1)["marketValue"], 10)
+        self.assertEqual(store.load_realm("sulfuras", "alliance"), {"1": self.item(20)})
+        self.assertIsNone(store.get("faerlina", "horde", 1))
+        store.close()
+
+    def test_buffered_writes_reach_other_connections(self):
+        writer = PriceStore(self.path).realm("test", "horde", flush_threshold=2)
+        reader = PriceStore(self.path).realm("test", "horde")
+        writer[1] = self.item(10)
+        self.assertNotIn(1, reader)
+        writer["2"] = self.item(20)  # reaches the threshold
+        self.assertEqual(reader[2]["marketValue"], 20)
+        self.assertEqual(reader[1], self.item(10))
+        self.assertEqual(reader.version(), 1)
+        writer[1] = self.item(11)
+        writer.close()
+        self.assertEqual(reader.version(), 2)
+        self.assertEqual(PriceStore(self.path).realm("test", "horde")[1]["marketValue"], 11)
+        reader.close()
+
+    def test_concurrent_writers(self):
+        def write(realm):
+            prices = PriceStore(self.path).realm(realm, "horde", flush_threshold=10)
+            for item_id in range(100):
+                prices[item_id] = self.item(item_id)
+            prices.close()
+
+        threads = [threading.Thread(target=write, args=(f"realm{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store = PriceStore(self.path)
+        for i in range(4):
+            self.assertEqual(len(store.load_realm(f"realm{i}", "horde")), 100)
+            self.assertEqual(store.version(f"realm{i}", "horde"), 10)
+        store.close()
+
+    def test_migrates_json_caches(self):
+        json_path = os.path.join(self.cache_dir.name, "item_cache_old-realm_alliance.json")
+        with ItemCache(json_path) as cache:
+            cache[5] = self.item(50)
+        self.assertEqual(realm_of(json_path), ("old-realm", "alliance"))
+        store = PriceStore(self.path)
+        self.assertEqual(migrate_json_caches(store, self.cache_dir.name), [(json_path, 1)])
+        self.assertEqual(store.get("old-realm", "alliance", 5), self.item(50))
+        store.close()
+
+    def test_migration_stamps_items_without_timestamps(self):
+        json_path = os.path.join(self.cache_dir.name, "item_cache_old-realm_alliance.json")
+        with ItemCache(json_path) as cache:
+            cache[5] = {"name": "Item 50", "marketValue": 50}
+        os.utime(json_path, (1000, 1000))
+        store = PriceStore(self.path)
+        migrate_json_caches(store, self.cache_dir.name)
+        self.assertEqual(store.get("old-realm", "alliance", 5)["fetchedAt"], 1000)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
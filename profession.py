@@ -15,69 +15,267 @@ as configuration it takes:
     
 """
 
-from typing import Dict, List, Optional
+from array import array
+from bisect import bisect_right
+import heapq
+from typing import Dict, Iterable, List, Optional, Set, TextIO, Tuple
+from cost_matrix import CostMatrix
+from crafting import MakeOrBuyPrices, load_crafting_graph
+from metrics import NULL_METRICS
 from gold_amount import GoldAmount
 from nexushub_api import NexusHubApi, Reagent
+from recipe_table import RecipeTable, load_recipe_table
 from recipes import Recipe
 import json
+import recipe_snapshot
+
+
+ENGINES = ["scalar", "numpy"]
+# Candidates kept per skill level, so excluding recipes can fall back without recomputing
+TOP_K = 3
 
 
 class Profession:
     name: str
-    recipes: List[Recipe]
+    table: RecipeTable # the recipes' columns, shared with other realms' professions
+    recipes: List[Recipe] # one per table row, priced for this realm
     required_recipes: Dict[int,int] # skill_level: recipe.id
-    recipe_path: List[Recipe]
+    computed_path: List[Recipe] # recipe_path as far as it has been computed
+    step_by_level: Dict[int, int] # skill_level: index of its step in computed_path
+    next_level: int # first skill level not yet in computed_path
+    recipes_by_id: Dict[int, Recipe]
+    rows_by_level: Dict[int, array] # skill_level: rows of the recipes that can give a skillup there
+    recipes_by_reagent: Dict[int, List[Recipe]] # item_id: recipes using it
+    cost_prefix: List[int] # cost_prefix[k]: copper spent on the first k steps of recipe_path
+    reagent_prefix: Dict[int, Tuple[List[int], List[int]]] # item_id: (steps using it, running quantity)
+    reagents_by_id: Dict[int, Reagent] # item_id: latest Reagent seen for it
+    alternatives: Dict[int, List[Recipe]] # skill_level: up to top_k cheapest recipes there, cheapest first
+    excluded_recipes: Set[int] # recipe ids left out of the path after construction
 
-    def __init__(self, name: str, nexus_hub_api: NexusHubApi, recipe_json_path: str, broken_recipes: List[int]=[], required_recipes: Dict[int, int]=[]) -> None:
+    def __init__(self, name: str, nexus_hub_api: NexusHubApi, recipe_json_path: str, broken_recipes: List[int]=[], required_recipes: Dict[int, int]=[], engine: str = "scalar", recipe_data: Optional[list] = None, make_or_buy: bool = False, top_k: int = TOP_K) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"{engine} is not a valid engine. Valid engines: {ENGINES}.")
+        if top_k < 1:
+            raise ValueError(f"{top_k} is not a valid number of alternatives. It must be at least 1.")
         self.name = name
-        self.nexus_hub_api = nexus_hub_api
+        self.engine = engine
+        self.top_k = top_k
+        self.excluded_recipes = set()
+        # With make_or_buy, reagents are priced at the cheaper of buying and crafting them
+        self.make_or_buy = None
+        if make_or_buy:
+            graph = load_crafting_graph()
+            made_on_path = [graph.creates[recipe_id] for recipe_id in dict(required_recipes).values() if recipe_id in graph.creates]
+            self.make_or_buy = MakeOrBuyPrices(nexus_hub_api, graph, made_on_path)
+        self.nexus_hub_api = self.make_or_buy or nexus_hub_api
+        self.metrics = getattr(self.nexus_hub_api, "metrics", NULL_METRICS)
         self.required_recipes = required_recipes 
         self.broken_recipes = broken_recipes
-        with open(recipe_json_path) as f:
-            self.recipes = [recipe for recipe in (Recipe.from_json(recipe_data, nexus_hub_api) for recipe_data in json.load(f)) if recipe]
-        self.recipe_path = []
-        for i in range(1,450):
-            result = self.cheapest_way_to_level_at(i)
+        with self.metrics.phase("load_recipes"):
+            self.table = RecipeTable.from_json(recipe_data) if recipe_data is not None else load_recipe_table(recipe_json_path)
+        # Fetch all uncached prices in one concurrent batch before building recipes one by one
+        with self.metrics.phase("prefetch"):
+            self.nexus_hub_api.prefetch(self.table.reagent_ids())
+        with self.metrics.phase("build_recipes"):
+            self.recipes = [Recipe.from_table(self.table, row, self.nexus_hub_api) for row in range(len(self.table))]
+        with self.metrics.phase("build_indexes"):
+            self.recipes_by_id = {}
+            for recipe in self.recipes:
+                self.recipes_by_id.setdefault(recipe.id, recipe)
+            self.rows_by_level = self.table.rows_by_level(self.broken_recipes)
+            self.recipes_by_reagent = {
+                item_id: [self.recipes[row] for row in rows] for item_id, rows in self.table.rows_by_reagent().items()
+            }
+        # The path is computed level by level, only as far as queries need it
+        self.computed_path = []
+        self.step_by_level = {}
+        self.next_level = 1
+        self.alternatives = {}
+        self.reset_prefix_tables()
+
+    @property
+    def recipe_path(self) -> List[Recipe]:
+        """The cheapest recipe for every skill level from 1 to 449, skipping levels without one."""
+        self.extend_recipe_path(450)
+        return self.computed_path
+
+    def extend_recipe_path(self, steps: int):
+        """Computes skill levels until the path has `steps` steps or every level is computed.
+
+        The numpy engine evaluates all remaining levels in one batch instead.
+        """
+        while len(self.computed_path) < steps and self.next_level < 450:
+            self.append_path_steps(449 if self.engine == "numpy" else self.next_level)
+
+    def append_path_steps(self, last_level: int):
+        """Computes the skill levels from `next_level` to `last_level` onto the end of the path."""
+        for skill_level, recipe in self.compute_path_steps(self.next_level, last_level):
+            self.step_by_level[skill_level] = len(self.computed_path)
+            self.computed_path.append(recipe)
+        self.next_level = last_level + 1
+
+    def compute_recipe_path(self, first_level: int = 1, last_level: int = 449) -> List[Recipe]:
+        return [recipe for _, recipe in self.compute_path_steps(first_level, last_level)]
+
+    def compute_path_steps(self, first_level: int, last_level: int) -> List[Tuple[int, Recipe]]:
+        """Returns (skill_level, cheapest recipe) for each level in the range that has a recipe."""
+        skill_levels = range(first_level, last_level + 1)
+        with self.metrics.phase("recipe_path"):
+            if self.engine == "numpy":
+                matrix = CostMatrix(self.recipes, set(self.broken_recipes) | self.excluded_recipes)
+                batched = iter(matrix.cheapest_k_at([i for i in skill_levels if i not in self.required_recipes], self.top_k))
+                cheapest = []
+                for i in skill_levels:
+                    if i in self.required_recipes:
+                        self.alternatives[i] = self.required_alternatives(i)
+                    else:
+                        self.alternatives[i] = next(batched)
+                    cheapest.append(self.alternatives[i][0] if self.alternatives[i] else None)
+                    # The matrix evaluates every recipe at every level
+                    self.metrics.evaluated(i, 0 if i in self.required_recipes else len(self.recipes))
+            else:
+                cheapest = [self.cheapest_way_to_level_at(i) for i in skill_levels]
+        steps = []
+        for i, result in zip(skill_levels, cheapest):
             if result is None:
                 print("Failed to find a suitable recipe for level " + str(i))
                 continue
-            self.recipe_path.append(result)
+            steps.append((i, result))
+        return steps
+
+    def update_prices(self, item_ids: Iterable[int]) -> List[int]:
+        """Re-prices the recipes that use `item_ids` and recomputes only the levels they can affect.
+
+        New prices are read from the profession's NexusHubApi, so update its cache first.
+        `recipe_path` and the cumulative tables are updated in place. Returns the skill
+        levels whose cheapest recipe changed.
+        """
+        item_ids = set(item_ids)
+        if self.make_or_buy is not None:
+            # Crafted reagents made from these get new effective costs too
+            item_ids = self.make_or_buy.invalidate(item_ids)
+        affected = {}
+        for item_id in item_ids:
+            for recipe in self.recipes_by_reagent.get(item_id, []):
+                affected[id(recipe)] = recipe
+        for recipe in affected.values():
+            recipe.reagents = {self.nexus_hub_api.get_item(reagent.id): quantity for reagent, quantity in recipe.reagents.items()}
+            recipe.price = Recipe.price(recipe.reagents)
+        for item_id in item_ids & self.reagents_by_id.keys():
+            self.reagents_by_id[item_id] = self.nexus_hub_api.get_item(item_id)
+
+        # Only levels inside an affected recipe's window can change their choice
+        skill_levels = set()
+        for recipe in affected.values():
+            skill_levels.update(range(recipe.colors[0] + 1, min(recipe.colors[3], self.next_level)))
+        changed = []
+        for skill_level in sorted(skill_levels):
+            step = self.step_by_level.get(skill_level)
+            if step is None:
+                continue
+            cheapest = self.cheapest_way_to_level_at(skill_level)
+            if cheapest is not self.computed_path[step]:
+                self.computed_path[step] = cheapest
+                changed.append(skill_level)
 
-    def print_recipe_path(self, target: int):
-        print_combined_recipe(self.recipe_path[:target])
+        # Cumulative totals stay valid up to the first step that changed recipe or price
+        dirty_steps = [step for step, recipe in enumerate(self.computed_path) if id(recipe) in affected]
+        dirty_steps += [self.step_by_level[skill_level] for skill_level in changed]
+        if dirty_steps:
+            self.truncate_prefix_tables(min(dirty_steps))
+        return changed
+
+    def print_recipe_path(self, target: int, from_level: int = 1, out: Optional[TextIO] = None, alternatives: bool = False):
+        print_combined_recipe(self.cheapest_way_to(target)[from_level-1:], first_level=from_level, out=out,
+                              alternatives=self.alternatives_to(target)[from_level-1:] if alternatives else None)
 
     def cheapest_way_to_max(self) -> List[Recipe]:
         return self.cheapest_way_to(450)
 
     def cheapest_way_to(self, target: int) -> List[Recipe]:
-        return self.recipe_path[:target]
+        self.extend_recipe_path(target)
+        return self.computed_path[:target]
 
     def cheapest_way_to_level_at(self, skill_level) -> Recipe:
+        alternatives = self.cheapest_recipes_at(skill_level)
+        return alternatives[0] if alternatives else None
+
+    def cheapest_recipes_at(self, skill_level) -> List[Recipe]:
+        """Returns the `top_k` cheapest recipes at `skill_level`, cheapest first, and keeps them in `alternatives`."""
         if skill_level in self.required_recipes:
-            recipe_id = self.required_recipes[skill_level]
-            return self.recipe_by_id(recipe_id)
-        possible_recipes = self.possible_recipes(skill_level)
-        if len(possible_recipes) == 0:
-            return None
-        return min(possible_recipes, key=lambda recipe: recipe.cost_for_skillup(skill_level))
-    
+            alternatives = self.required_alternatives(skill_level)
+        else:
+            possible_recipes = self.possible_recipes(skill_level)
+            self.metrics.evaluated(skill_level, len(possible_recipes))
+            # A bounded heap; ties keep the earlier recipe first, like min()
+            alternatives = heapq.nsmallest(self.top_k, possible_recipes, key=lambda recipe: recipe.cost_for_skillup(skill_level))
+        self.alternatives[skill_level] = alternatives
+        return alternatives
+
+    def required_alternatives(self, skill_level) -> List[Recipe]:
+        recipe = self.recipe_by_id(self.required_recipes[skill_level])
+        return [recipe] if recipe is not None else []
+
+    def alternatives_to(self, target: int) -> List[Tuple[int, List[Recipe]]]:
+        """(skill_level, alternatives) for each step of `cheapest_way_to(target)`."""
+        self.extend_recipe_path(target)
+        return [(skill_level, self.alternatives[skill_level]) for skill_level in list(self.step_by_level)[:target]]
+
+    def exclude_recipes(self, recipe_ids: Iterable[int]) -> List[int]:
+        """Stops using `recipe_ids` and returns the skill levels whose recipe changed.
+
+        Each computed level falls back to its cheapest remaining alternative, so this
+        doesn't rebuild anything. Only a level whose alternatives are all excluded is
+        evaluated again. Required recipes are kept.
+        """
+        self.excluded_recipes.update(recipe_ids)
+        # Find every level's fallback before touching the path, in case a level drops out
+        fallbacks = {}
+        for skill_level in self.step_by_level:
+            if skill_level in self.required_recipes:
+                continue
+            alternatives = [recipe for recipe in self.alternatives[skill_level] if recipe.id not in self.excluded_recipes]
+            if not alternatives:
+                alternatives = self.cheapest_recipes_at(skill_level)
+                if not alternatives:
+                    # The level drops out of the path, which moves every later step
+                    return self.recompute_recipe_path()
+            fallbacks[skill_level] = alternatives
+
+        changed = []
+        for skill_level, alternatives in fallbacks.items():
+            self.alternatives[skill_level] = alternatives
+            step = self.step_by_level[skill_level]
+            if alternatives[0] is not self.computed_path[step]:
+                self.computed_path[step] = alternatives[0]
+                changed.append(skill_level)
+        if changed:
+            self.truncate_prefix_tables(self.step_by_level[changed[0]])
+        return changed
+
+    def recompute_recipe_path(self) -> List[int]:
+        """Computes the same range of skill levels again, and returns the skill levels whose recipe changed."""
+        previous = {skill_level: self.computed_path[step] for skill_level, step in self.step_by_level.items()}
+        last_level = self.next_level - 1
+        self.computed_path, self.step_by_level, self.next_level, self.alternatives = [], {}, 1, {}
+        self.reset_prefix_tables()
+        if last_level >= 1:
+            self.append_path_steps(last_level)
+        levels = sorted(previous.keys() | self.step_by_level.keys())
+        return [level for level in levels if previous.get(level) is not self.recipe_at(level)]
+
+    def recipe_at(self, skill_level) -> Optional[Recipe]:
+        step = self.step_by_level.get(skill_level)
+        return self.computed_path[step] if step is not None else None
+
     def recipe_by_id(self, recipe_id):
-        for recipe in self.recipes:
-            if recipe.id == recipe_id:
-                return recipe
-        return None
+        return self.recipes_by_id.get(recipe_id)
 
     def possible_recipes(self, skill_level) -> List[Recipe]:
-        possible_recipes: List[Recipe] = []
-        for recipe in self.recipes:
-            if not recipe.can_use(skill_level):
-                continue
-            if not recipe.can_receive_skillup(skill_level):
-                continue
-            if recipe.id in self.broken_recipes:
-                continue
-            possible_recipes.append(recipe)
-        return possible_recipes
+        recipes = [self.recipes[row] for row in self.rows_by_level.get(skill_level, ())]
+        if self.excluded_recipes:
+            return [recipe for recipe in recipes if recipe.id not in self.excluded_recipes]
+        return recipes
 
     def reagents_for_level(self, skill_level: int, recipe: Recipe) -> List[int]:
         multiplier = recipe.expected_times_per_skillup(skill_level)
@@ -87,55 +285,152 @@ class Profession:
         return self.total_cost_to(450)
 
     def total_cost_to(self, target: int):
-        total_cost = GoldAmount.from_copper(0)
-        for skill_level, recipe in enumerate(self.recipe_path, 1):
-            if skill_level == target:
-                break
-            skill_level = skill_level + 1
-            total_cost += recipe.price * recipe.expected_times_per_skillup(skill_level)
-        return total_cost
+        return self.total_cost_between(1, target)
+
+    def total_cost_between(self, from_level: int, target: int) -> GoldAmount:
+        """Returns the cost of leveling from `from_level` to `target`, from the prefix tables."""
+        start, end = self.steps_between(from_level, target)
+        self.extend_prefix_tables(max(start, end))
+        return GoldAmount.from_copper(self.cost_prefix[end] - self.cost_prefix[start])
 
     def reagents_required_to_max(self):
         return self.reagents_required_to(450)
 
     def reagents_required_to(self, target: int) -> Dict[Reagent,int]:
+        return self.reagents_required_between(1, target)
+
+    def reagents_required_between(self, from_level: int, target: int) -> Dict[Reagent, int]:
+        """Returns the reagents used leveling from `from_level` to `target`.
+
+        Each reagent's running quantity is only stored at the steps that use it, so this is
+        one binary search per reagent at each end of the range. With make_or_buy, reagents
+        cheaper to craft are replaced by what is bought to craft them.
+        """
+        start, end = self.steps_between(from_level, target)
+        self.extend_prefix_tables(max(start, end))
         reagents: Dict[Reagent, int] = {}
-        for skill_level, recipe in enumerate(self.recipe_path, 1):
-            if skill_level == target:
-                break
-            reagents = merge_dict(reagents, recipe.reagents)
+        for item_id, (steps, totals) in self.reagent_prefix.items():
+            quantity = running_total(steps, totals, end) - running_total(steps, totals, start)
+            if quantity > 0:
+                reagents[self.reagents_by_id[item_id]] = quantity
+        if self.make_or_buy is not None:
+            return self.make_or_buy.expand(reagents)
         return reagents
 
+    def steps_between(self, from_level: int, target: int) -> Tuple[int, int]:
+        """`steps_to` both ends of a range, raising ValueError if it runs backwards.
+
+        A `target` below 1 still means the whole path, as it does for `steps_to`.
+        """
+        if target >= 1 and from_level > target:
+            raise ValueError(f"{from_level} is not a valid starting level. Valid starting levels: up to the target level {target}.")
+        return self.steps_to(from_level), self.steps_to(target)
+
+    def steps_to(self, target: int) -> int:
+        """Number of `recipe_path` steps counted when leveling to `target`.
+
+        Matches the original walk over `recipe_path`, which stopped right before the
+        `target`-th step and otherwise ran to the end of the path.
+        """
+        if target >= 1:
+            self.extend_recipe_path(target)
+            if target <= len(self.computed_path):
+                return target - 1
+        return len(self.recipe_path)
+
+    def reset_prefix_tables(self):
+        """Drops the cumulative cost and reagent tables; call whenever `recipe_path` changes."""
+        self.cost_prefix = [0]
+        self.reagent_prefix = {}
+        self.reagents_by_id = {}
+
+    def truncate_prefix_tables(self, steps: int):
+        """Drops everything the cumulative tables hold beyond the first `steps` steps."""
+        del self.cost_prefix[steps + 1:]
+        for steps_using, totals in self.reagent_prefix.values():
+            keep = bisect_right(steps_using, steps)
+            del steps_using[keep:]
+            del totals[keep:]
+
+    def extend_prefix_tables(self, steps: int):
+        """Extends the cumulative tables so they cover the first `steps` steps of `recipe_path`.
+
+        The tables only grow as far as a query needs, so a step's expected attempts are
+        only evaluated once something asks for a range that includes it.
+        """
+        with self.metrics.phase("prefix_tables"):
+            for step in range(len(self.cost_prefix), steps + 1):
+                recipe = self.computed_path[step - 1]
+                cost = recipe.price * self.expected_crafts(step)
+                self.cost_prefix.append(self.cost_prefix[-1] + cost.to_copper())
+                for reagent, quantity in recipe.reagents.items():
+                    self.reagents_by_id[reagent.id] = reagent
+                    steps_using, totals = self.reagent_prefix.setdefault(reagent.id, ([], []))
+                    steps_using.append(step)
+                    totals.append((totals[-1] if totals else 0) + quantity)
+
+    def expected_crafts(self, step: int) -> int:
+        """Expected crafts paid for on the `step`-th step (counting from 1) of `recipe_path`."""
+        recipe = self.computed_path[step - 1]
+        # Step n is paid at skill level n + 1, as total_cost_to always has, but no later
+        # than the recipe's last level before gray, where the skillup chance drops to 0
+        return recipe.expected_times_per_skillup(min(step + 1, recipe.colors[3] - 1))
+
+
+def running_total(steps: List[int], totals: List[int], step: int) -> int:
+    """Returns the running total as of `step`, given the sorted steps where it changed."""
+    i = bisect_right(steps, step)
+    return totals[i - 1] if i else 0
+
+
+def load_recipe_data(recipe_json_path: str) -> list:
+    """Returns the recipes in `recipe_json_path`, from its compiled snapshot when that is up to date."""
+    recipe_data = recipe_snapshot.load_fresh(recipe_json_path)
+    if recipe_data is not None:
+        return recipe_data
+    with open(recipe_json_path) as f:
+        return json.load(f)
+
 
 def merge_dict(dict1, dict2):
     return {k: dict1.get(k, 0) + dict2.get(k, 0) for k in set(dict1) | set(dict2)}
 
 
-def print_combined_recipe(recipe_path):
+def print_combined_recipe(recipe_path, first_level: int = 1, out: Optional[TextIO] = None,
+                          alternatives: Optional[List[Tuple[int, List[Recipe]]]] = None):
     start = None
     prev = None
     result = []
-    for i, x in enumerate(recipe_path, 1):
+    last_level = first_level - 1 + len(recipe_path)
+    for i, x in enumerate(recipe_path, first_level):
         if x != prev:
             if start is not None:
                 result.append((start, i-1, prev, i-start))
             start = i
             prev = x
     if start is not None:
-        result.append((start, len(recipe_path)-1, prev, len(recipe_path)-start-1))
+        result.append((start, last_level-1, prev, last_level-start-1))
     total = GoldAmount.from_copper(0)
     for arr in result:
         start = arr[0]
         end = arr[1]
         recipe = arr[2]
         quantity = arr[3]
-        print(f"[{start:3}-{end+1:3}] {recipe.name[:35]:35} (x{quantity:2}). Cost = {recipe.price * quantity}")
+        print(f"[{start:3}-{end+1:3}] {recipe.name[:35]:35} (x{quantity:2}). Cost = {recipe.price * quantity}", file=out)
+        if alternatives is not None:
+            # The runners-up where the segment starts, priced per skillup there
+            skill_level, candidates = alternatives[start - first_level]
+            for candidate in candidates:
+                if candidate is not recipe:
+                    print(f"{'':11} or {candidate.name[:32]:32} at {candidate.cost_for_skillup(skill_level)} per skillup", file=out)
         total  += recipe.price * quantity
-    print("="*10)
-    print(f"Total cost = {total}")
+    print("="*10, file=out)
+    print(f"Total cost = {total}", file=out)
 
 class Enchanting(Profession):
-    def __init__(self, nexus_hub_api: NexusHubApi):
+    RECIPE_JSON_PATH = "data/enchanting.json"
+
+    def __init__(self, nexus_hub_api: NexusHubApi, engine: str = "scalar", recipe_data: Optional[list] = None, make_or_buy: bool = False, top_k: int = TOP_K):
         broken_recipes = [
             42613,
             28022,
@@ -155,17 +450,33 @@ class Enchanting(Profession):
         super().__init__(
             name="enchanting",
             nexus_hub_api=nexus_hub_api,
-            recipe_json_path="data/enchanting.json",
+            recipe_json_path=self.RECIPE_JSON_PATH,
             broken_recipes=broken_recipes,
             required_recipes=required_recipes,
+            engine=engine,
+            recipe_data=recipe_data,
+            make_or_buy=make_or_buy,
+            top_k=top_k,
         )
 
 class Engineering(Profession):
-    def __init__(self, nexus_hub_api: NexusHubApi):
+    RECIPE_JSON_PATH = "data/engineering.json"
+
+    def __init__(self, nexus_hub_api: NexusHubApi, engine: str = "scalar", recipe_data: Optional[list] = None, make_or_buy: bool = False, top_k: int = TOP_K):
         super().__init__(
             name="engineering",
             nexus_hub_api=nexus_hub_api,
-            recipe_json_path="data/engineering.json",
+            recipe_json_path=self.RECIPE_JSON_PATH,
+            engine=engine,
+            recipe_data=recipe_data,
+            make_or_buy=make_or_buy,
+            top_k=top_k,
         )
 
-        print(self.recipes)
\ No newline at end of file
+        print(self.recipes)
+
+
+PROFESSIONS = {
+    "enchanting": Enchanting,
+    "engineering": Engineering,
+}
@@ -0,0 +1,102 @@
+"""Offline benchmark of `Profession` on synthetic recipe sets.
+
+Generates professions of `--recipes` recipes over a pool of `--reagents` items, with
+color windows of varied width anywhere in 1-450, and prices them with
+`InMemoryPrices`, so nothing is read from the cache or the network. Each size times:
+
+- construction of the `Profession` (tables, recipes, indexes)
+- path computation (`recipe_path`)
+- `total_cost_to(450)` and `reagents_required_to(450)` on the computed path
+- JSON output of the `path` command
+
+`--json` writes the results; `--compare` prints the ratio to an earlier results file.
+
+    python profession_bench.py --recipes 1000 10000 100000 --json bench.json
+    python profession_bench.py --recipes 1000 10000 100000 --compare bench.json
+"""
+
+import argparse
+import io
+import json
+import time
+from typing import Callable, Dict, List
+
+import commands
+from in_memory_prices import InMemoryPrices
+from profession import ENGINES, Profession
+from test_helpers import synthetic_prices, synthetic_recipes
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench(recipe_data: List[dict], prices: InMemoryPrices, engine: str, repeat: int) -> Dict[str, float]:
+    """Returns the best time of each phase, in seconds."""
+    build = lambda: Profession("synthetic", prices, recipe_json_path=None, recipe_data=recipe_data, engine=engine)
+    results = {"construct": best_of(repeat, build)}
+
+    def compute_path():
+        profession = build()
+        start = time.perf_counter()
+        profession.recipe_path
+        return time.perf_counter() - start
+
+    results["recipe_path"] = min(compute_path() for _ in range(repeat))
+    profession = build()
+    profession.recipe_path
+
+    def total_cost():
+        profession.reset_prefix_tables()
+        profession.total_cost_to(450)
+
+    def reagents_required():
+        profession.reset_prefix_tables()
+        profession.reagents_required_to(450)
+
+    results["total_cost_to"] = best_of(repeat, total_cost)
+    results["reagents_required_to"] = best_of(repeat, reagents_required)
+    results["path_json"] = best_of(repeat, lambda: commands.run_command(profession, "path", format="json", out=io.StringIO()))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Profession on synthetic recipes")
+    parser.add_argument("--recipes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--reagents", type=int, default=500, help="Size of the reagent pool")
+    parser.add_argument("--engine", type=str, nargs="+", choices=ENGINES, default=["scalar"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    parser.add_argument("--compare", type=str, default=None, help="Results file of an earlier run to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    print(f"{'case':22} {'phase':22} {'best (ms)':>10} {'vs before':>10}")
+    for count in args.recipes:
+        recipe_data = synthetic_recipes(count, args.reagents, args.seed)
+        for engine in args.engine:
+            case = f"{engine}/{count}"
+            results[case] = bench(recipe_data, synthetic_prices(args.reagents, args.seed), engine, args.repeat)
+            for phase, seconds in results[case].items():
+                before = baseline.get(case, {}).get(phase)
+                ratio = f"{seconds / before:9.2f}x" if before else ""
+                print(f"{case:22} {phase:22} {seconds * 1000:10.1f} {ratio:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+from cost_matrix import numpy_available
+from gold_amount import GoldAmount
+from in_memory_prices import InMemoryPrices
+from nexushub_api import NexusHubApi
+from profession import Enchanting, Profession, merge_dict
+from test_helpers import RepricedNexusHubApi, realm_cache_dir, synthetic_prices, synthetic_recipes
+import unittest
+
+
+class EnchantingTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # The committed sulfuras cache covers every enchanting reagent, so this runs offline.
+        cls.cache_dir = realm_cache_dir()
+        cls.addClassCleanup(cls.cache_dir.cleanup)
+        cls.enchanting = Enchanting(nexus_hub_api=cls.sulfuras_api())
+
+    @classmethod
+    def sulfuras_api(cls):
+        return NexusHubApi("sulfuras", "horde", cache_dir=cls.cache_dir.name)
+
+    def test_possible_recipes_matches_full_scan(self):
+        for skill_level in range(1, 450):
+            expected = [
+                recipe for recipe in self.enchanting.recipes
+                if recipe.can_use(skill_level)
+                and recipe.can_receive_skillup(skill_level)
+                and recipe.id not in self.enchanting.broken_recipes
+            ]
+            self.assertEqual(self.enchanting.possible_recipes(skill_level), expected)
+
+    def test_recipe_by_id(self):
+        self.assertEqual(self.enchanting.recipe_by_id(7795).name, "Runed Silver Rod")
+        self.assertIsNone(self.enchanting.recipe_by_id(-1))
+
+    def test_prefix_tables_match_walking_the_path(self):
+        for target in [0, 1, 2, 50, 300, 449, 450, 451]:
+            total_cost = GoldAmount.from_copper(0)
+            reagents = {}
+            for skill_level, recipe in enumerate(self.enchanting.recipe_path, 1):
+                if skill_level == target:
+                    break
+                total_cost += recipe.price * recipe.expected_times_per_skillup(skill_level + 1)
+                reagents = merge_dict(reagents, recipe.reagents)
+            self.assertEqual(self.enchanting.total_cost_to(target), total_cost)
+            self.assertEqual(self.enchanting.reagents_required_to(target), reagents)
+
+    def test_range_queries(self):
+        self.assertEqual(
+            self.enchanting.total_cost_between(350, 450),
+            GoldAmount.from_copper(self.enchanting.total_cost_to(450).to_copper() - self.enchanting.total_cost_to(350).to_copper()),
+        )
+        to_350 = self.enchanting.reagents_required_to(350)
+        for reagent, quantity in self.enchanting.reagents_required_between(350, 450).items():
+            self.assertEqual(quantity, self.enchanting.reagents_required_to(450)[reagent] - to_350.get(reagent, 0))
+        self.assertEqual(self.enchanting.total_cost_between(300, 300), GoldAmount.from_copper(0))
+        with self.assertRaises(ValueError):
+            self.enchanting.total_cost_between(450, 350)
+        with self.assertRaises(ValueError):
+            self.enchanting.reagents_required_between(450, 350)
+
+    def test_path_is_computed_incrementally(self):
+        enchanting = Enchanting(nexus_hub_api=self.sulfuras_api())
+        self.assertEqual(enchanting.next_level, 1)
+        self.assertEqual(enchanting.total_cost_to(50), self.enchanting.total_cost_to(50))
+        self.assertLess(enchanting.next_level, 100)
+        self.assertEqual(enchanting.cheapest_way_to(300), self.enchanting.recipe_path[:300])
+        self.assertEqual(enchanting.recipe_path, self.enchanting.recipe_path)
+
+    def test_update_prices_matches_rebuild(self):
+        api = RepricedNexusHubApi(self.cache_dir.name)
+        enchanting = Enchanting(nexus_hub_api=api)
+        enchanting.total_cost_to(450)
+        enchanting.reagents_required_to(450)
+
+        api.prices = {10940: 50, 11083: 100000}  # Strange Dust, Soul Dust
+        changed = enchanting.update_prices(api.prices)
+        rebuilt = Enchanting(nexus_hub_api=api)
+        self.assertGreater(len(changed), 0)
+        self.assertEqual([recipe.id for recipe in enchanting.recipe_path], [recipe.id for recipe in rebuilt.recipe_path])
+        for target in [100, 300, 450]:
+            self.assertEqual(enchanting.total_cost_to(target), rebuilt.total_cost_to(target))
+            self.assertEqual(enchanting.reagents_required_to(target), rebuilt.reagents_required_to(target))
+
+    @unittest.skipUnless(numpy_available(), "numpy is not installed")
+    def test_numpy_engine_matches_scalar(self):
+        vectorized = Enchanting(nexus_hub_api=self.sulfuras_api(), engine="numpy")
+        self.assertEqual(
+            [recipe.id for recipe in vectorized.recipe_path],
+            [recipe.id for recipe in self.enchanting.recipe_path],
+        )
+        self.assertEqual(
+            [(level, [recipe.id for recipe in alternatives]) for level, alternatives in vectorized.alternatives_to(450)],
+            [(level, [recipe.id for recipe in alternatives]) for level, alternatives in self.enchanting.alternatives_to(450)],
+        )
+
+    def test_alternatives_are_the_cheapest_candidates(self):
+        for skill_level, alternatives in self.enchanting.alternatives_to(450):
+            if skill_level in self.enchanting.required_recipes:
+                continue
+            costs = sorted(recipe.cost_for_skillup(skill_level).to_copper() for recipe in self.enchanting.possible_recipes(skill_level))
+            self.assertEqual([recipe.cost_for_skillup(skill_level).to_copper() for recipe in alternatives], costs[:3])
+
+    def test_exclude_recipes_matches_rebuild(self):
+        enchanting = Enchanting(nexus_hub_api=self.sulfuras_api())
+        enchanting.total_cost_to(450)
+        # Two of the most used recipes on the path, and the one that replaces the first
+        changed = enchanting.exclude_recipes([7418, 7428, 13648])
+        rebuilt = Profession("enchanting", self.sulfuras_api(), Enchanting.RECIPE_JSON_PATH,
+                             broken_recipes=enchanting.broken_recipes + [7418, 7428, 13648],
+                             required_recipes=enchanting.required_recipes)
+        self.assertGreater(len(changed), 0)
+        self.assertEqual([recipe.id for recipe in enchanting.recipe_path], [recipe.id for recipe in rebuilt.recipe_path])
+        self.assertEqual(enchanting.total_cost_to(450), rebuilt.total_cost_to(450))
+        self.assertEqual(enchanting.reagents_required_to(450), rebuilt.reagents_required_to(450))
+
+
+
+class SyntheticProfessionTest(unittest.TestCase):
+
+    def test_update_prices_matches_rebuild(self):
+        recipe_data = synthetic_recipes(500, reagent_pool=50)
+        prices = synthetic_prices(reagent_pool=50)
+        profession = Profession("synthetic", prices, recipe_json_path=None, recipe_data=recipe_data)
+        profession.total_cost_to(450)
+        prices.set_price(7, 1)
+        profession.update_prices([7])
+        rebuilt = Profession("synthetic", prices, recipe_json_path=None, recipe_data=recipe_data)
+        self.assertEqual([recipe.id for recipe in profession.recipe_path], [recipe.id for recipe in rebuilt.recipe_path])
+        self.assertEqual(profession.total_cost_to(450), rebuilt.total_cost_to(450))
+        self.assertGreater(rebuilt.total_cost_to(450).to_copper(), 0)
+
+    def test_exclude_recipes_beyond_the_stored_alternatives(self):
+        recipe_data = synthetic_recipes(200, reagent_pool=50)
+        prices = synthetic_prices(reagent_pool=50)
+        profession = Profession("synthetic", prices, recipe_json_path=None, recipe_data=recipe_data, top_k=1)
+        path = profession.recipe_path
+        excluded = {recipe.id for recipe in path[:50]}
+        profession.exclude_recipes(excluded)
+        rebuilt = Profession("synthetic", prices, recipe_json_path=None, recipe_data=recipe_data, broken_recipes=list(excluded))
+        self.assertEqual([recipe.id for recipe in profession.recipe_path], [recipe.id for recipe in rebuilt.recipe_path])
+        self.assertEqual(profession.total_cost_to(450), rebuilt.total_cost_to(450))
+
+    def test_exclude_recipes_dropping_a_level(self):
+        profession = Profession("test", InMemoryPrices({1: 100, 2: 200, 3: 10000}), recipe_json_path=None, recipe_data=[
+            {"id": 1, "name": "A", "colors": [0, 10, 20, 30], "reagents": [[1, 1]]},
+            {"id": 2, "name": "B", "colors": [0, 10, 20, 30], "reagents": [[2, 2]]},
+            {"id": 3, "name": "C", "colors": [10, 15, 20, 40], "reagents": [[3, 1]]},
+        ])
+        profession.total_cost_to(39)
+        self.assertEqual(profession.next_level, 40)
+        self.assertEqual({recipe.id for recipe in profession.computed_path[:29]}, {1})
+
+        changed = profession.exclude_recipes([1, 3])
+        self.assertEqual(changed, list(range(1, 40)))
+        self.assertEqual([recipe.id for recipe in profession.computed_path], [2] * 29)
+        # Only the levels computed before are computed again
+        self.assertEqual(profession.next_level, 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Answer a stream of JSON queries, one per line, against warm professions.
+
+Each input line is an object such as
+
+    {"command": "total_cost", "profession": "enchanting", "server": "sulfuras", "faction": "horde", "from_level": 1, "target_level": 350}
+
+and gets exactly one output line, in input order, written and flushed as soon as it is
+known: `{"query": ..., "result": ...}` (the command's JSON answer), `{"query": ...,
+"output": ...}` for the "human-readable" format, or `{"query": ..., "error": ...}`, e.g.
+for a server that isn't in `data/servers.json`. Missing fields take the defaults given
+on the command line. Professions are built once per realm and kept in a
+`service.ProfessionCache`, and identical queries are answered once and repeated.
+
+    python main.py --command queries --server sulfuras < queries.jsonl
+"""
+
+from contextlib import redirect_stdout
+import io
+import json
+import sys
+from typing import Dict, Iterable, TextIO, Tuple
+
+import commands
+from service import ProfessionCache
+
+FIELDS = ("command", "server", "faction", "profession", "from_level", "target_level", "format")
+
+
+def normalize(query: dict, defaults: dict) -> dict:
+    """Fills in defaults and checks field types; raises ValueError for malformed queries."""
+    if not isinstance(query, dict):
+        raise ValueError(f"{json.dumps(query)} is not a valid query. Valid queries: JSON objects with fields {list(FIELDS)}.")
+    unknown = sorted(set(query) - set(FIELDS))
+    if unknown:
+        raise ValueError(f"{unknown[0]} is not a valid query field. Valid query fields: {list(FIELDS)}.")
+    if "command" not in query:
+        raise ValueError(f"{json.dumps(query)} is not a valid query. Valid queries: JSON objects with a command.")
+    normalized = {**defaults, **query}
+    for field in ("from_level", "target_level"):
+        normalized[field] = int(normalized[field])
+    return normalized
+
+
+def answer(profession, query: dict) -> dict:
+    out = io.StringIO()
+    # Progress messages (e.g. prices fetched on a cache miss) must not land between answers
+    with redirect_stdout(sys.stderr):
+        commands.run_command(
+            profession,
+            command=query["command"],
+            from_level=query["from_level"],
+            target_level=query["target_level"],
+            format=query["format"],
+            out=out,
+        )
+    if query["format"] == "json":
+        return {"query": query, "result": json.loads(out.getvalue())}
+    return {"query": query, "output": out.getvalue()}
+
+
+def answer_queries(lines: Iterable[str], out: TextIO, professions: ProfessionCache, defaults: dict) -> int:
+    """Writes one answer line per non-blank input line; returns how many queries were computed."""
+    # canonical query: (profession it was answered with, answer line)
+    answered: Dict[str, Tuple[object, str]] = {}
+    computed = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            query = normalize(json.loads(line), defaults)
+            key = json.dumps(query, sort_keys=True)
+            profession = professions.get(query["server"], query["faction"], query["profession"])
+            cached = answered.get(key)
+            # A profession rebuilt after its prices changed may answer differently
+            if cached is None or cached[0] is not profession:
+                cached = answered[key] = (profession, json.dumps(answer(profession, query)))
+                computed += 1
+            response = cached[1]
+        except ValueError as e:
+            response = json.dumps({"query": line.strip(), "error": str(e)})
+        except Exception as e:
+            response = json.dumps({"query": line.strip(), "error": f"{type(e).__name__}: {e}"})
+        out.write(response + "\n")
+        out.flush()
+    return computed
@@ -0,0 +1,77 @@
+from nexushub_api import NexusHubApi
+from profession import Enchanting
+from query_stream import answer_queries
+from service import ProfessionCache
+from test_helpers import realm_cache_dir
+import io
+import json
+import unittest
+
+DEFAULTS = {"server": "sulfuras", "faction": "horde", "profession": "enchanting", "from_level": 1, "target_level": 450, "format": "json"}
+
+
+class OneRealm:
+    """Stands in for a ProfessionCache holding a single warm profession."""
+
+    def __init__(self, cache_dir: str):
+        self.profession = Enchanting(nexus_hub_api=NexusHubApi("sulfuras", "horde", cache_dir=cache_dir))
+
+    def get(self, server, faction, profession_name):
+        return self.profession
+
+
+class QueryStreamTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cache_dir = realm_cache_dir()
+        cls.addClassCleanup(cache_dir.cleanup)
+        cls.professions = OneRealm(cache_dir.name)
+
+    def run_queries(self, lines):
+        out = io.StringIO()
+        computed = answer_queries(lines, out, self.professions, DEFAULTS)
+        return computed, [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_answers_in_order_and_deduplicates(self):
+        computed, answers = self.run_queries([
+            '{"command": "total_cost", "target_level": 100}',
+            '',
+            '{"target_level": 100, "command": "total_cost"}',
+            '{"command": "total_cost", "from_level": 100, "target_level": 200}',
+        ])
+        self.assertEqual(computed, 2)
+        self.assertEqual(len(answers), 3)
+        self.assertEqual(answers[0], answers[1])
+        self.assertEqual(answers[0]["result"]["total_cost"], self.professions.profession.total_cost_to(100).to_copper())
+        self.assertEqual(answers[2]["query"]["from_level"], 100)
+
+    def test_reports_bad_queries_and_continues(self):
+        computed, answers = self.run_queries([
+            'not json',
+            '{"command": "fly"}',
+            '{"target_level": 10}',
+            '{"command": "reagents", "target_level": 3, "format": "human-readable"}',
+        ])
+        self.assertEqual(computed, 1)
+        self.assertEqual([("error" in answer) for answer in answers], [True, True, True, False])
+        self.assertTrue(answers[3]["output"].startswith("Reagents required from 1-3"))
+
+    def test_reports_unknown_servers_per_query(self):
+        cache_dir = realm_cache_dir()
+        self.addCleanup(cache_dir.cleanup)
+        professions = ProfessionCache(capacity=1, cache_dir=cache_dir.name)
+        self.addCleanup(professions.close)
+        out = io.StringIO()
+        answer_queries([
+            '{"command": "total_cost", "server": "sulfurass", "target_level": 10}',
+            '{"command": "total_cost", "target_level": 10}',
+        ], out, professions, DEFAULTS)
+        answers = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertIn("sulfurass is not a valid server", answers[0]["error"])
+        self.assertIn("result", answers[1])
+        self.assertEqual(list(professions.entries), [("sulfuras", "horde", "enchanting")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+"""Compact binary snapshots of a profession's recipe JSON.
+
+The wowhead export carries many fields we never read (`cat`, `schools`, `popularity`,
+trainer rows without reagents, ...). A snapshot keeps only the recipes that have
+reagents, laid out as flat little-endian int32 arrays that can be read straight out of
+a memory map:
+
+    header      magic, format version, sha256 of the source JSON, counts
+    ids         [n]
+    colors      [n * 4]       orange, yellow, green, gray
+    nskillups   [n]           skill points per successful craft
+    offsets     [n + 1]       recipe i uses reagent rows offsets[i]:offsets[i + 1]
+    item_ids    [m]
+    quantities  [m]
+    name_ends   [n]           end of each recipe name in the utf-8 name blob
+    names       utf-8 blob
+
+A snapshot is only used while its source hash matches the JSON file next to it, and
+its size and offsets are checked before any column is read, so a truncated or corrupt
+snapshot is treated as stale too.
+
+    python recipe_snapshot.py data/enchanting.json data/engineering.json
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import List, Optional
+
+MAGIC = b"WRCP"
+VERSION = 2
+HEADER = struct.Struct("<4sI32sIII")  # magic, version, source sha256, recipes, reagent rows, name bytes
+
+
+def snapshot_path(recipe_json_path: str) -> str:
+    return os.path.splitext(recipe_json_path)[0] + ".snapshot"
+
+
+def source_hash(recipe_json_path: str) -> bytes:
+    with open(recipe_json_path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+class RecipeSnapshot:
+    """Recipe columns of one profession, backed by a memory-mapped snapshot file."""
+
+    source_hash: bytes
+    ids: memoryview
+    colors: memoryview
+    nskillups: memoryview
+    offsets: memoryview
+    item_ids: memoryview
+    quantities: memoryview
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.check_columns(path)
+        except (ValueError, struct.error):
+            self.buffer.close()
+            raise
+        view = memoryview(self.buffer)
+        position = HEADER.size
+
+        def take(count: int) -> memoryview:
+            nonlocal position
+            column = view[position:position + 4 * count].cast("i")
+            position += 4 * count
+            return column
+
+        self.ids = take(self.recipes)
+        self.colors = take(self.recipes * 4)
+        self.nskillups = take(self.recipes)
+        self.offsets = take(self.recipes + 1)
+        self.item_ids = take(self.rows)
+        self.quantities = take(self.rows)
+        self.name_ends = take(self.recipes)
+        self.names = view[position:position + self.name_bytes]
+
+    def check_columns(self, path: str):
+        """Checks the header, the file size and every offset, so that mapping and decoding the columns can't fail."""
+        magic, version, self.source_hash, self.recipes, self.rows, self.name_bytes = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recipe snapshot.")
+        if len(self.buffer) != HEADER.size + 4 * (8 * self.recipes + 1 + 2 * self.rows) + self.name_bytes:
+            raise ValueError(f"{path} is truncated.")
+
+        def column(start: int, count: int) -> List[int]:
+            values = array("i")
+            values.frombytes(self.buffer[HEADER.size + 4 * start:HEADER.size + 4 * (start + count)])
+            return values.tolist()
+
+        offsets = column(6 * self.recipes, self.recipes + 1)
+        if offsets[0] != 0 or offsets[-1] != self.rows or any(a > b for a, b in zip(offsets, offsets[1:])):
+            raise ValueError(f"{path} has invalid reagent offsets.")
+        name_ends = column(7 * self.recipes + 1 + 2 * self.rows, self.recipes)
+        if any(a > b for a, b in zip([0] + name_ends, name_ends + [self.name_bytes])):
+            raise ValueError(f"{path} has invalid name offsets.")
+        names = self.buffer[len(self.buffer) - self.name_bytes:]
+        try:
+            for start, end in zip([0] + name_ends, name_ends):
+                names[start:end].decode()
+        except UnicodeDecodeError:
+            raise ValueError(f"{path} has invalid names.")
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def name(self, i: int) -> str:
+        start = self.name_ends[i - 1] if i else 0
+        return bytes(self.names[start:self.name_ends[i]]).decode()
+
+    def to_recipe_data(self) -> List[dict]:
+        """Returns the recipes as trimmed JSON entries, the shape `Recipe.from_json` reads."""
+        colors = self.colors.tolist()
+        nskillups = self.nskillups.tolist()
+        offsets = self.offsets.tolist()
+        item_ids = self.item_ids.tolist()
+        quantities = self.quantities.tolist()
+        return [
+            {
+                "id": recipe_id,
+                "name": self.name(i),
+                "colors": colors[4 * i:4 * i + 4],
+                "nskillup": nskillups[i],
+                "reagents": [list(row) for row in zip(item_ids[offsets[i]:offsets[i + 1]], quantities[offsets[i]:offsets[i + 1]])],
+            }
+            for i, recipe_id in enumerate(self.ids.tolist())
+        ]
+
+    def close(self):
+        for column in (self.ids, self.colors, self.nskillups, self.offsets, self.item_ids, self.quantities, self.name_ends, self.names):
+            column.release()
+        self.buffer.close()
+
+
+def compile_snapshot(recipe_json_path: str, recipe_data: Optional[list] = None) -> str:
+    """Writes the snapshot for `recipe_json_path` and returns its path."""
+    with open(recipe_json_path, "rb") as f:
+        source = f.read()
+    if recipe_data is None:
+        recipe_data = json.loads(source)
+    # Same filter as Recipe.from_json: recipes without reagents are never used
+    recipes = [recipe for recipe in recipe_data if "reagents" in recipe]
+
+    ids, colors, nskillups, offsets, item_ids, quantities, name_ends = (array("i") for _ in range(7))
+    names = bytearray()
+    offsets.append(0)
+    for recipe in recipes:
+        if len(recipe["colors"]) != 4:
+            raise ValueError(f"Recipe {recipe['id']} ({recipe['name']}) does not have exactly 4 colors: {recipe['colors']}")
+        ids.append(int(recipe["id"]))
+        colors.extend(recipe["colors"])
+        nskillups.append(recipe.get("nskillup", 1))
+        for item_id, quantity in recipe["reagents"]:
+            item_ids.append(item_id)
+            quantities.append(quantity)
+        offsets.append(len(item_ids))
+        names += recipe["name"].encode()
+        name_ends.append(len(names))
+
+    path = snapshot_path(recipe_json_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, hashlib.sha256(source).digest(), len(ids), len(item_ids), len(names)))
+        for column in (ids, colors, nskillups, offsets, item_ids, quantities, name_ends):
+            if sys.byteorder != "little":
+                column.byteswap()
+            f.write(column.tobytes())
+        f.write(names)
+    os.replace(tmp_path, path)
+    return path
+
+
+def open_fresh(recipe_json_path: str) -> Optional[RecipeSnapshot]:
+    """Opens the snapshot of `recipe_json_path`, or returns None if there is no fresh snapshot."""
+    path = snapshot_path(recipe_json_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        snapshot = RecipeSnapshot(path)
+    except (ValueError, struct.error):
+        # Truncated or corrupt: treated like a stale snapshot
+        return None
+    if snapshot.source_hash != source_hash(recipe_json_path):
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def load_fresh(recipe_json_path: str) -> Optional[List[dict]]:
+    """Returns the recipe data from the snapshot of `recipe_json_path`, or None if there is no fresh snapshot."""
+    snapshot = open_fresh(recipe_json_path)
+    if snapshot is None:
+        return None
+    try:
+        return snapshot.to_recipe_data()
+    finally:
+        snapshot.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile profession recipe JSON into binary snapshots")
+    parser.add_argument("recipe_json_paths", nargs="+")
+    args = parser.parse_args()
+    for recipe_json_path in args.recipe_json_paths:
+        path = compile_snapshot(recipe_json_path)
+        print(f"{recipe_json_path} ({os.path.getsize(recipe_json_path):,} bytes) -> {path} ({os.path.getsize(path):,} bytes)")
+
+
+if __name__ == "__main__":
+    main()
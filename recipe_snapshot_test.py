@@ -0,0 +1,52 @@
+from recipe_snapshot import HEADER, compile_snapshot, load_fresh
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class RecipeSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.data_dir.cleanup)
+        self.recipe_json_path = os.path.join(self.data_dir.name, "enchanting.json")
+        shutil.copy("data/enchanting.json", self.recipe_json_path)
+
+    def test_round_trip(self):
+        self.assertIsNone(load_fresh(self.recipe_json_path))
+        compile_snapshot(self.recipe_json_path)
+        with open(self.recipe_json_path) as f:
+            expected = [
+                {key: recipe[key] for key in ("id", "name", "colors", "nskillup", "reagents")}
+                for recipe in json.load(f) if "reagents" in recipe
+            ]
+        self.assertEqual(load_fresh(self.recipe_json_path), expected)
+
+    def test_stale_snapshot_is_ignored(self):
+        compile_snapshot(self.recipe_json_path)
+        with open(self.recipe_json_path, "a") as f:
+            f.write("\n")
+        self.assertIsNone(load_fresh(self.recipe_json_path))
+
+    def test_corrupt_snapshot_is_ignored(self):
+        path = compile_snapshot(self.recipe_json_path)
+        with open(path, "rb") as f:
+            snapshot = f.read()
+        reagent_offsets = HEADER.size + 4 * 6 * 296  # after the ids, colors and nskillups of 296 recipes
+        corruptions = [
+            snapshot[:len(snapshot) // 2],
+            snapshot[:-1],
+            snapshot[:reagent_offsets] + (10 ** 6).to_bytes(4, "little") + snapshot[reagent_offsets + 4:],
+            snapshot[:-4] + b"\xff\xfe\xfd\xfc",
+            b"",
+        ]
+        for corrupted in corruptions:
+            with open(path, "wb") as f:
+                f.write(corrupted)
+            self.assertIsNone(load_fresh(self.recipe_json_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
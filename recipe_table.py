@@ -0,0 +1,126 @@
+"""A profession's recipes as parallel columns, shared by every realm.
+
+Recipe ids, colors and skill points per craft are flat int arrays, and reagents use a
+CSR layout like the snapshot's: recipe i uses reagent rows offsets[i]:offsets[i + 1] of
+`item_ids` and `quantities`. Nothing here depends on prices, so `load_recipe_table`
+keeps one table per recipe file for the whole process. Each realm's `Profession` only
+adds its priced `Recipe` objects on top.
+"""
+
+from array import array
+import json
+import os
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Tuple
+
+import recipe_snapshot
+
+
+class RecipeTable:
+    ids: array
+    colors: array  # 4 per recipe: orange, yellow, green, gray
+    nskillups: array
+    offsets: array
+    item_ids: array
+    quantities: array
+    names: List[str]
+
+    def __init__(self):
+        self.ids, self.colors, self.nskillups, self.offsets, self.item_ids, self.quantities = (array("i") for _ in range(6))
+        self.offsets.append(0)
+        self.names = []
+        self.color_lists: Dict[int, List[int]] = {}
+        self.skill_indexes: Dict[FrozenSet[int], Dict[int, array]] = {}
+
+    @staticmethod
+    def from_json(recipes_json: list) -> "RecipeTable":
+        """Builds the table from recipe JSON entries, skipping recipes without reagents as `Recipe.from_json` does."""
+        table = RecipeTable()
+        for recipe in recipes_json:
+            if "reagents" not in recipe:
+                continue
+            table.ids.append(int(recipe["id"]))
+            table.colors.extend(recipe["colors"][:4])
+            table.nskillups.append(recipe.get("nskillup", 1))
+            for item_id, quantity in recipe["reagents"]:
+                table.item_ids.append(item_id)
+                table.quantities.append(quantity)
+            table.offsets.append(len(table.item_ids))
+            table.names.append(recipe["name"])
+        return table
+
+    @staticmethod
+    def from_snapshot(snapshot: recipe_snapshot.RecipeSnapshot) -> "RecipeTable":
+        """Copies the columns out of a snapshot, so the table outlives its memory map."""
+        table = RecipeTable()
+        for name in ("ids", "colors", "nskillups", "offsets", "item_ids", "quantities"):
+            setattr(table, name, array("i", getattr(snapshot, name)))
+        table.names = [snapshot.name(i) for i in range(len(snapshot))]
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def colors_of(self, row: int) -> List[int]:
+        """The recipe's colors, as one list shared by every `Recipe` built from this row."""
+        colors = self.color_lists.get(row)
+        if colors is None:
+            colors = self.color_lists[row] = self.colors[4 * row:4 * row + 4].tolist()
+        return colors
+
+    def reagents_of(self, row: int) -> Iterator[Tuple[int, int]]:
+        """Yields (item_id, quantity) for the recipe's reagents."""
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return zip(self.item_ids[start:end], self.quantities[start:end])
+
+    def reagent_ids(self) -> List[int]:
+        return sorted(set(self.item_ids))
+
+    def rows_by_level(self, broken_recipes: Iterable[int] = ()) -> Dict[int, array]:
+        """skill_level: rows of the recipes that can give a skillup there, leaving out `broken_recipes`.
+
+        A recipe is a candidate from just above its orange level up to (excluding) its gray
+        level, so it only lands in the buckets covered by that window. Rows keep their order
+        within a bucket. Built once per set of broken recipes.
+        """
+        broken_recipes = frozenset(broken_recipes)
+        index = self.skill_indexes.get(broken_recipes)
+        if index is None:
+            index = {}
+            for row, recipe_id in enumerate(self.ids):
+                if recipe_id in broken_recipes:
+                    continue
+                for skill_level in range(self.colors[4 * row] + 1, self.colors[4 * row + 3]):
+                    index.setdefault(skill_level, array("i")).append(row)
+            self.skill_indexes[broken_recipes] = index
+        return index
+
+    def rows_by_reagent(self) -> Dict[int, List[int]]:
+        """item_id: rows of the recipes using it, in row order."""
+        rows: Dict[int, List[int]] = {}
+        for row in range(len(self)):
+            for item_id in self.item_ids[self.offsets[row]:self.offsets[row + 1]]:
+                rows.setdefault(item_id, []).append(row)
+        return rows
+
+
+# recipe_json_path: (mtime_ns of the JSON file, table)
+tables: Dict[str, Tuple[int, RecipeTable]] = {}
+
+
+def load_recipe_table(recipe_json_path: str) -> RecipeTable:
+    """Returns the table for `recipe_json_path`, reusing the one already loaded while the file is unchanged."""
+    mtime_ns = os.stat(recipe_json_path).st_mtime_ns
+    cached = tables.get(recipe_json_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    snapshot = recipe_snapshot.open_fresh(recipe_json_path)
+    if snapshot is not None:
+        try:
+            table = RecipeTable.from_snapshot(snapshot)
+        finally:
+            snapshot.close()
+    else:
+        with open(recipe_json_path) as f:
+            table = RecipeTable.from_json(json.load(f))
+    tables[recipe_json_path] = (mtime_ns, table)
+    return table
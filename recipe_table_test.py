@@ -0,0 +1,44 @@
+from nexushub_api import NexusHubApi
+from profession import Enchanting
+from recipe_table import RecipeTable, load_recipe_table
+from test_helpers import realm_cache_dir
+import unittest
+
+
+class RecipeTableTest(unittest.TestCase):
+
+    def test_columns(self):
+        table = RecipeTable.from_json([
+            {"id": 1, "name": "Trainer row", "colors": [0, 0, 0, 0]},
+            {"id": 2, "name": "Two", "colors": [1, 5, 10, 15], "reagents": [[10, 3], [11, 1]]},
+            {"id": 3, "name": "Three", "colors": [8, 9, 10, 12], "nskillup": 2, "reagents": [[10, 1]]},
+        ])
+        self.assertEqual(list(table.ids), [2, 3])
+        self.assertEqual(list(table.offsets), [0, 2, 3])
+        self.assertEqual(list(table.reagents_of(0)), [(10, 3), (11, 1)])
+        self.assertEqual(table.colors_of(1), [8, 9, 10, 12])
+        self.assertEqual(list(table.nskillups), [1, 2])
+        self.assertEqual(table.rows_by_reagent(), {10: [0, 1], 11: [0]})
+        self.assertEqual(list(table.rows_by_level()[10]), [0, 1])
+        self.assertEqual(list(table.rows_by_level([3])[10]), [0])
+        self.assertEqual(list(table.rows_by_level()[12]), [0])
+        self.assertNotIn(15, table.rows_by_level())
+
+    def test_realms_share_one_table(self):
+        cache_dir = realm_cache_dir()
+        self.addCleanup(cache_dir.cleanup)
+        sulfuras = Enchanting(nexus_hub_api=NexusHubApi("sulfuras", "horde", cache_dir=cache_dir.name))
+        other = Enchanting(nexus_hub_api=NexusHubApi("sulfuras", "horde", cache_dir=cache_dir.name))
+        self.assertIs(sulfuras.table, load_recipe_table(Enchanting.RECIPE_JSON_PATH))
+        self.assertIs(sulfuras.table, other.table)
+        self.assertIs(sulfuras.rows_by_level, other.rows_by_level)
+        self.assertIs(sulfuras.recipes[0].colors, other.recipes[0].colors)
+        # Recipes of one realm share each reagent object
+        reagents = {}
+        for recipe in sulfuras.recipes:
+            for reagent in recipe.reagents:
+                self.assertIs(reagents.setdefault(reagent.id, reagent), reagent)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -44,6 +44,7 @@ class Recipe:
     reagents: Dict[Reagent, int]
     colors: List[int]  # exactly 4: orange, yellow, green, gray
     price: GoldAmount
+    nskillup: int = 1  # skill points gained per successful craft
 
     @staticmethod
     def load_all():
@@ -63,6 +64,11 @@ class Recipe:
             recipes.append(recipe)
         return recipes
 
+    @staticmethod
+    def reagent_ids(recipes_json) -> List[int]:
+        """Returns every distinct reagent item id used by the given recipe JSON entries."""
+        return sorted({item_id for recipe in recipes_json if "reagents" in recipe for (item_id, _) in recipe["reagents"]})
+
     @staticmethod
     def from_json(json, nexus_hub_api: NexusHubApi):
         # https://www.wowhead.com/wotlk/spells/professions/engineering
@@ -77,6 +83,20 @@ class Recipe:
             reagents,
             json["colors"],
             Recipe.price(reagents),
+            json.get("nskillup", 1),
+        )
+
+    @staticmethod
+    def from_table(table, row: int, nexus_hub_api: NexusHubApi):
+        """Builds the recipe in `row` of a `RecipeTable`, sharing its name and colors with every other realm."""
+        reagents = {nexus_hub_api.get_item(item_id): quantity for (item_id, quantity) in table.reagents_of(row)}
+        return Recipe(
+            table.ids[row],
+            table.names[row],
+            reagents,
+            table.colors_of(row),
+            Recipe.price(reagents),
+            table.nskillups[row],
         )
 
     @staticmethod
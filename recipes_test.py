@@ -1,3 +1,4 @@
+from gold_amount import GoldAmount
 from recipes import Recipe
 import unittest
 
@@ -12,6 +13,7 @@ class RecipeTest(unittest.TestCase):
             colors=[
                 1, 5, 7, 10
             ],
+            price=GoldAmount.from_copper(0),
         )
 
         # 100% chance to level up when orange 
@@ -0,0 +1,102 @@
+"""Import auction house scan exports into a realm's item cache.
+
+A scan file is either CSV with a header row or JSON lines, one record per line, with
+the fields `itemId`, `marketValue`, `minBuyout`, `quantity` and `scannedAt` (and
+optionally `name`). Files are streamed record by record, so their size does not matter;
+only the latest record of each item one of our professions uses is kept, and those are
+upserted into the cache `NexusHubApi` reads from. Every record also goes into the
+item's price history, merged in a bounded batch at a time. A priced run afterwards
+needs no network calls for the imported items.
+
+    python main.py --command import --server sulfuras --faction horde --scan_file scan.csv
+"""
+
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+from nexushub_api import NexusHubApi
+from price_series import PriceSeries, parse_timestamp
+from profession import PROFESSIONS, load_recipe_data
+from recipes import Recipe
+
+# Scan records held before they are merged into the items' price histories
+HISTORY_BUFFER_SIZE = 4096
+
+
+def referenced_item_ids(profession_names: Iterable[str] = PROFESSIONS) -> Set[int]:
+    """Returns every reagent item id used by the given professions."""
+    item_ids = set()
+    for name in profession_names:
+        item_ids.update(Recipe.reagent_ids(load_recipe_data(PROFESSIONS[name].RECIPE_JSON_PATH)))
+    return item_ids
+
+
+def read_scan(scan_path: str) -> Iterator[dict]:
+    """Yields the records of a CSV or JSON lines scan file, one at a time."""
+    with open(scan_path, newline="") as f:
+        first_line = f.readline()
+        f.seek(0)
+        if first_line.lstrip().startswith("{"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def import_scan(scan_path: str, nexus_hub_api: NexusHubApi, item_ids: Set[int],
+                history_buffer_size: int = HISTORY_BUFFER_SIZE) -> int:
+    """Upserts the latest price of every item in `item_ids` found in the scan; returns how many were written.
+
+    Records older than what the cache already holds for an item are ignored. Every record
+    is added to its item's price history, `history_buffer_size` records at a time, so
+    memory use depends on the number of items rather than the size of the scan.
+    """
+    latest: Dict[int, Tuple[float, dict]] = {}  # item_id: (scan time, record)
+    points: Dict[int, list] = {}
+    imported: Set[int] = set()
+    buffered = 0
+    for record in read_scan(scan_path):
+        item_id = int(record["itemId"])
+        if item_id not in item_ids:
+            continue
+        # Timestamps are compared as times, since exports differ in offsets and fractional seconds
+        scanned_at = parse_timestamp(record["scannedAt"])
+        if item_id not in latest or scanned_at > latest[item_id][0]:
+            latest[item_id] = (scanned_at, record)
+        points.setdefault(item_id, []).append((scanned_at, int(record["marketValue"]), int(record.get("quantity") or 0)))
+        buffered += 1
+        if buffered >= history_buffer_size:
+            imported.update(upsert_latest(nexus_hub_api, latest, points))
+            add_history(nexus_hub_api, points)
+            buffered = 0
+
+    imported.update(upsert_latest(nexus_hub_api, latest, points))
+    add_history(nexus_hub_api, points)
+    nexus_hub_api.save_cache()
+    return len(imported)
+
+
+def upsert_latest(nexus_hub_api: NexusHubApi, latest: Dict[int, Tuple[float, dict]], item_ids: Iterable[int]) -> List[int]:
+    """Writes the latest scanned price of each item, unless the cache holds a newer one; returns the items written.
+
+    Runs before an item's history is merged, since the JSON cache keeps the history on the item's entry.
+    """
+    written = []
+    for item_id in item_ids:
+        scanned_at, record = latest[item_id]
+        cached = nexus_hub_api.cache.get(item_id)
+        if cached is not None and cached.get("scannedAt") and parse_timestamp(cached["scannedAt"]) >= scanned_at:
+            continue
+        name = record.get("name") or (cached or {}).get("name") or f"Item {item_id}"
+        nexus_hub_api.cache[item_id] = {"name": name, "marketValue": int(record["marketValue"]), "scannedAt": record["scannedAt"]}
+        written.append(item_id)
+    return written
+
+
+def add_history(nexus_hub_api: NexusHubApi, points: Dict[int, list]):
+    """Merges the buffered (timestamp, market value, quantity) points into each item's history and empties the buffer."""
+    for item_id, item_points in points.items():
+        nexus_hub_api.add_history(item_id, PriceSeries.from_points(item_points))
+    points.clear()
@@ -0,0 +1,91 @@
+from profession import Enchanting
+from scan_import import import_scan, referenced_item_ids
+from test_helpers import OfflineNexusHubApi
+import json
+import os
+import tempfile
+import unittest
+
+
+class ScanImportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def write_scan(self, name, lines):
+        path = os.path.join(self.cache_dir.name, name)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        return path
+
+    def test_imports_latest_price_of_referenced_items(self):
+        scan = self.write_scan("scan.csv", [
+            "itemId,marketValue,minBuyout,quantity,scannedAt",
+            "10940,1000,900,50,2023-02-26T00:00:00.000Z",
+            "10940,1200,1100,40,2023-02-27T00:00:00.000Z",
+            "10940,800,700,40,2023-02-25T00:00:00.000Z",
+            "999999,5,5,1,2023-02-27T00:00:00.000Z",
+        ])
+        api = OfflineNexusHubApi("test", "horde", cache_dir=self.cache_dir.name)
+        self.assertEqual(import_scan(scan, api, referenced_item_ids()), 1)
+        self.assertEqual(api.get_item(10940).price.to_copper(), 1200)
+        self.assertNotIn(999999, api.cache)
+
+        older = self.write_scan("older.jsonl", [json.dumps({"itemId": 10940, "marketValue": 1, "scannedAt": "2023-01-01T00:00:00.000Z"})])
+        self.assertEqual(import_scan(older, api, referenced_item_ids()), 0)
+        self.assertEqual(api.get_item(10940).price.to_copper(), 1200)
+
+    def test_history_is_merged_in_bounded_batches(self):
+        scan = self.write_scan("scan.jsonl", [
+            json.dumps({"itemId": item_id, "marketValue": day * 100 + item_id, "quantity": 1, "scannedAt": f"2023-02-{day:02}T00:00:00Z"})
+            for day in range(1, 11) for item_id in (10940, 10938)
+        ])
+        batched = OfflineNexusHubApi("batched", "horde", cache_dir=self.cache_dir.name)
+        import_scan(scan, batched, {10940, 10938}, history_buffer_size=3)
+        whole = OfflineNexusHubApi("whole", "horde", cache_dir=self.cache_dir.name)
+        import_scan(scan, whole, {10940, 10938})
+        for item_id in (10940, 10938):
+            self.assertEqual(len(batched.cache.series(item_id)), 10)
+            self.assertEqual(batched.cache.series(item_id), whole.cache.series(item_id))
+
+    def test_json_cache_history_is_merged_in_bounded_batches(self):
+        scan = self.write_scan("scan.jsonl", [
+            json.dumps({"itemId": item_id, "marketValue": day * 100 + item_id, "quantity": 1, "scannedAt": f"2023-02-{day:02}T00:00:00Z"})
+            for day in range(1, 11) for item_id in (10940, 10938)
+        ])
+        api = OfflineNexusHubApi("test", "horde", cache_dir=self.cache_dir.name, cache_backend="json")
+        self.assertEqual(import_scan(scan, api, {10940, 10938}, history_buffer_size=3), 2)
+        for item_id in (10940, 10938):
+            self.assertEqual(len(api.cache.series(item_id)), 10)
+            self.assertEqual(api.get_item(item_id).price.to_copper(), 1000 + item_id)
+        api.close()
+        reloaded = OfflineNexusHubApi("test", "horde", cache_dir=self.cache_dir.name, cache_backend="json")
+        self.assertEqual(len(reloaded.cache.series(10940)), 10)
+
+    def test_compares_scan_times_not_strings(self):
+        scan = self.write_scan("scan.jsonl", [
+            json.dumps({"itemId": 10940, "marketValue": 1000, "scannedAt": "2023-02-26T23:30:00.500Z"}),
+            json.dumps({"itemId": 10940, "marketValue": 2000, "scannedAt": "2023-02-27T01:00:00+02:00"}),  # 23:00Z
+        ])
+        api = OfflineNexusHubApi("test", "horde", cache_dir=self.cache_dir.name)
+        self.assertEqual(import_scan(scan, api, {10940}), 1)
+        self.assertEqual(api.get_item(10940).price.to_copper(), 1000)
+
+        older = self.write_scan("older.jsonl", [json.dumps({"itemId": 10940, "marketValue": 1, "scannedAt": "2023-02-27T00:00:00+01:00"})])
+        self.assertEqual(import_scan(older, api, {10940}), 0)
+
+    def test_priced_run_needs_no_network(self):
+        scan = self.write_scan("scan.jsonl", [
+            json.dumps({"itemId": item_id, "marketValue": item_id, "minBuyout": item_id, "quantity": 1, "scannedAt": "2023-02-26T00:00:00.000Z"})
+            for item_id in sorted(referenced_item_ids(["enchanting"]))
+        ])
+        api = OfflineNexusHubApi("test", "horde", cache_dir=self.cache_dir.name)
+        import_scan(scan, api, referenced_item_ids(["enchanting"]))
+        enchanting = Enchanting(nexus_hub_api=OfflineNexusHubApi("test", "horde", cache_dir=self.cache_dir.name))
+        self.assertEqual(len(enchanting.recipe_path), 449)
+        self.assertGreater(enchanting.total_cost_to(100).to_copper(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
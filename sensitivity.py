@@ -0,0 +1,143 @@
+"""Which reagent prices drive the leveling cost, and how far each can move.
+
+Both answers come out of one pass over the path instead of rebuilding `Profession` with
+tweaked prices once per reagent:
+
+- Contribution. A step's cost is its recipe's price times the step's expected crafts,
+  and a recipe's price is linear in its reagents' prices. So the total cost moves by
+  `quantity` copper per copper of a reagent's price, where `quantity` is how many of
+  it the path uses counting expected crafts, and `quantity * price` is the reagent's
+  share of the total. The shares add up to `total_cost_between`.
+- Break-even. Each level picks its recipe on its own, by cost per skillup. Moving one
+  reagent's price by d changes a candidate's cost there by d * (its quantity of the
+  reagent) / (its skillup chance), so the price at which a candidate overtakes the
+  chosen recipe is one division per (level, candidate, reagent). The break-even price is
+  the nearest such price above and below the current one, over every level of the range.
+
+Break-even prices are computed on exact costs and ignore the rounding to whole copper
+that the path comparison does, so they can be off by a copper.
+"""
+
+from dataclasses import dataclass
+import math
+import sys
+from typing import Dict, List, Optional, TextIO, Tuple
+
+from gold_amount import GoldAmount
+from recipes import Recipe
+
+
+@dataclass
+class BreakEven:
+    price: int  # copper price at which the level switches recipe
+    skill_level: int
+    recipe: Recipe  # the recipe the level switches to
+
+    def __dict__(self):
+        return {"price": self.price, "skill_level": self.skill_level, "recipe_id": self.recipe.id}
+
+
+@dataclass
+class ReagentSensitivity:
+    id: int
+    name: str
+    price: int  # current copper price
+    quantity: int  # used on the path, counting expected crafts
+    contribution: int  # copper of the total cost spent on this reagent
+    share: float  # contribution / total cost
+    up: Optional[BreakEven] = None  # nearest higher price that changes the path
+    down: Optional[BreakEven] = None  # nearest lower price that changes the path
+
+    def __dict__(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "price": self.price,
+            "quantity": self.quantity,
+            "contribution": self.contribution,
+            "share": self.share,
+            "up": self.up.__dict__() if self.up else None,
+            "down": self.down.__dict__() if self.down else None,
+        }
+
+
+def reagent_sensitivity(profession, from_level: int = 1, target: int = 450) -> List[ReagentSensitivity]:
+    """Returns every reagent of the recipes that can be picked from `from_level` to `target`, biggest contribution first."""
+    start, end = profession.steps_to(from_level), profession.steps_to(target)
+    start, end = min(start, end), max(start, end)
+    levels = list(profession.step_by_level)[start:end]
+
+    reagents = {}  # item_id: Reagent
+    quantities: Dict[int, Dict[int, int]] = {}  # id(recipe): item_id: quantity
+
+    def quantities_of(recipe: Recipe) -> Dict[int, int]:
+        recipe_quantities = quantities.get(id(recipe))
+        if recipe_quantities is None:
+            recipe_quantities = quantities[id(recipe)] = {reagent.id: quantity for reagent, quantity in recipe.reagents.items()}
+            for reagent in recipe.reagents:
+                reagents.setdefault(reagent.id, reagent)
+        return recipe_quantities
+
+    used: Dict[int, int] = {}
+    for step in range(start + 1, end + 1):
+        crafts = profession.expected_crafts(step)
+        for item_id, quantity in quantities_of(profession.computed_path[step - 1]).items():
+            used[item_id] = used.get(item_id, 0) + quantity * crafts
+
+    # item_id: (price delta, skill level, recipe switched to), nearest above and below 0
+    up: Dict[int, Tuple[float, int, Recipe]] = {}
+    down: Dict[int, Tuple[float, int, Recipe]] = {}
+    for skill_level in levels:
+        if skill_level in profession.required_recipes:
+            continue
+        chosen = profession.recipe_at(skill_level)
+        chosen_probability = chosen.levelup_probability(skill_level)
+        chosen_cost = chosen.price.to_copper() / chosen_probability
+        chosen_quantities = quantities_of(chosen)
+        for candidate in profession.possible_recipes(skill_level):
+            if candidate is chosen:
+                continue
+            probability = candidate.levelup_probability(skill_level)
+            if probability == 0:
+                continue
+            gap = max(candidate.price.to_copper() / probability - chosen_cost, 0)
+            candidate_quantities = quantities_of(candidate)
+            for item_id in chosen_quantities.keys() | candidate_quantities.keys():
+                # How much faster the chosen recipe's cost grows with this reagent's price
+                slope = chosen_quantities.get(item_id, 0) / chosen_probability - candidate_quantities.get(item_id, 0) / probability
+                if slope > 0:
+                    delta = gap / slope
+                    if item_id not in up or delta < up[item_id][0]:
+                        up[item_id] = (delta, skill_level, candidate)
+                elif slope < 0:
+                    delta = gap / slope
+                    if item_id not in down or delta > down[item_id][0]:
+                        down[item_id] = (delta, skill_level, candidate)
+
+    total = sum(used[item_id] * reagents[item_id].price.to_copper() for item_id in used)
+    results = []
+    for item_id, reagent in reagents.items():
+        price = reagent.price.to_copper()
+        quantity = used.get(item_id, 0)
+        result = ReagentSensitivity(item_id, reagent.name, price, quantity, quantity * price,
+                                    quantity * price / total if total else 0.0)
+        if item_id in up:
+            delta, skill_level, recipe = up[item_id]
+            result.up = BreakEven(math.ceil(price + delta), skill_level, recipe)
+        if item_id in down and price + down[item_id][0] >= 0:
+            delta, skill_level, recipe = down[item_id]
+            result.down = BreakEven(math.floor(price + delta), skill_level, recipe)
+        results.append(result)
+    results.sort(key=lambda result: (-result.contribution, result.id))
+    return results
+
+
+def print_sensitivity(results: List[ReagentSensitivity], out: Optional[TextIO] = None):
+    out = out or sys.stdout
+    for result in results:
+        line = f"{result.name[:30]:30} {str(GoldAmount.from_copper(result.price)):>12} x{result.quantity:5} = {str(GoldAmount.from_copper(result.contribution)):>14} ({result.share:6.1%})"
+        if result.up:
+            line += f", path changes above {GoldAmount.from_copper(result.up.price)} (level {result.up.skill_level}: {result.up.recipe.name})"
+        if result.down:
+            line += f", below {GoldAmount.from_copper(result.down.price)} (level {result.down.skill_level}: {result.down.recipe.name})"
+        print(line, file=out)
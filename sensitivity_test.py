@@ -0,0 +1,46 @@
+from profession import Enchanting
+from sensitivity import reagent_sensitivity
+from test_helpers import RepricedNexusHubApi, realm_cache_dir
+import unittest
+
+
+class SensitivityTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = realm_cache_dir()
+        cls.addClassCleanup(cls.cache_dir.cleanup)
+        cls.api = RepricedNexusHubApi(cls.cache_dir.name)
+        cls.enchanting = Enchanting(nexus_hub_api=cls.api)
+        cls.results = reagent_sensitivity(cls.enchanting)
+
+    def test_contributions_add_up_to_total_cost(self):
+        self.assertEqual(sum(result.contribution for result in self.results), self.enchanting.total_cost_to(450).to_copper())
+        self.assertEqual(self.results, sorted(self.results, key=lambda result: -result.contribution))
+        self.assertAlmostEqual(sum(result.share for result in self.results), 1)
+
+    def test_contribution_is_the_marginal_cost(self):
+        top = self.results[0]
+        api = RepricedNexusHubApi(self.cache_dir.name)
+        enchanting = Enchanting(nexus_hub_api=api)
+        total = enchanting.total_cost_to(450).to_copper()
+        # Stay below the break-even price, so the path doesn't change
+        api.prices = {top.id: top.price + min(100, (top.up.price - top.price) // 2)}
+        self.assertEqual(enchanting.update_prices(api.prices), [])
+        self.assertEqual(enchanting.total_cost_to(450).to_copper() - total, top.quantity * (api.prices[top.id] - top.price))
+
+    def test_break_even_prices_switch_the_reported_level(self):
+        for result in [result for result in self.results if result.up][:3]:
+            for price, breaks_even in [(result.up.price - 2, False), (result.up.price + 2, True)]:
+                api = RepricedNexusHubApi(self.cache_dir.name)
+                api.prices = {result.id: price}
+                enchanting = Enchanting(nexus_hub_api=api)
+                enchanting.total_cost_to(450)
+                switched = enchanting.recipe_at(result.up.skill_level).id != self.enchanting.recipe_at(result.up.skill_level).id
+                self.assertEqual(switched, breaks_even, (result.name, price))
+                if breaks_even:
+                    self.assertEqual(enchanting.recipe_at(result.up.skill_level).id, result.up.recipe.id)
+
+
+if __name__ == "__main__":
+    unittest.main()
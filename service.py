@@ -0,0 +1,133 @@
+"""Local HTTP/JSON service answering the `reagents`, `path` and `total_cost` commands.
+
+Computed professions are kept warm in a bounded LRU keyed by (server, faction,
+profession), so only the first query for a realm pays for building the `Profession`.
+An entry is rebuilt when the realm's price cache files change on disk.
+
+    python main.py --command serve --port 8080
+    curl 'localhost:8080/total_cost?server=sulfuras&faction=horde&profession=enchanting&target_level=450'
+"""
+
+from collections import OrderedDict
+from contextlib import redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import io
+import json
+import sys
+import threading
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import commands
+from nexushub_api import NexusHubApi
+from profession import PROFESSIONS, Profession
+
+
+class ProfessionCache:
+    """LRU of computed professions that drops entries whose price cache changed on disk."""
+
+    def __init__(self, capacity: int = 8, engine: str = "scalar", ttl: Optional[float] = None, cache_dir: str = "cache"):
+        self.capacity = capacity
+        self.engine = engine
+        self.ttl = ttl
+        self.cache_dir = cache_dir
+        # Known server slugs, read on the first query
+        self.servers: Optional[List[str]] = None
+        # (server, faction, profession): (profession, api, price cache version when built)
+        self.entries: "OrderedDict[Tuple[str, str, str], Tuple[Profession, NexusHubApi, tuple]]" = OrderedDict()
+
+    def get(self, server: str, faction: str, profession_name: str) -> Profession:
+        if profession_name not in PROFESSIONS:
+            raise ValueError(f"{profession_name} is not a valid profession. Valid professions: {list(PROFESSIONS)}.")
+        if self.servers is None:
+            self.servers = NexusHubApi.fetch_servers()
+        # An unknown realm would go to the network for every price and take an LRU slot
+        if server.lower() not in self.servers:
+            raise ValueError(f"{server} is not a valid server. Valid servers: {self.servers}.")
+        key = (server.lower(), faction.lower(), profession_name)
+        entry = self.entries.get(key)
+        if entry is not None:
+            profession, api, version = entry
+            if api.cache.version() == version:
+                self.entries.move_to_end(key)
+                return profession
+            self.evict(key)
+
+        # Stale prices are refreshed in the background; the writes they cause rebuild the entry on a later query
+        api = NexusHubApi(server=server, faction=faction, ttl=self.ttl, cache_dir=self.cache_dir)
+        # Progress messages belong in the service log, not in a response
+        with redirect_stdout(sys.stderr):
+            profession = PROFESSIONS[profession_name](nexus_hub_api=api, engine=self.engine)
+        # Anything fetched while building is already written; flush it so the version is stable
+        api.save_cache()
+        self.entries[key] = (profession, api, api.cache.version())
+        while len(self.entries) > self.capacity:
+            self.evict(next(iter(self.entries)))
+        return profession
+
+    def evict(self, key):
+        _, api, _ = self.entries.pop(key)
+        api.close()
+
+    def close(self):
+        for key in list(self.entries):
+            self.evict(key)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """GET /<command>?server=&faction=&profession=&from_level=&target_level=&format="""
+
+    professions: ProfessionCache
+    # Professions are not thread-safe (their prefix tables grow on demand), so queries run one at a time
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        command = url.path.strip("/")
+        format = query.get("format", "json")
+        try:
+            with self.lock:
+                profession = self.professions.get(
+                    query.get("server", "faerlina"),
+                    query.get("faction", "horde"),
+                    query.get("profession", "enchanting"),
+                )
+                out = io.StringIO()
+                commands.run_command(
+                    profession,
+                    command=command,
+                    from_level=int(query.get("from_level", 1)),
+                    target_level=int(query.get("target_level", 450)),
+                    format=format,
+                    out=out,
+                )
+        except ValueError as e:
+            self.respond(400, json.dumps({"error": str(e)}), "application/json")
+            return
+        except Exception as e:
+            self.respond(500, json.dumps({"error": f"{type(e).__name__}: {e}"}), "application/json")
+            return
+        self.respond(200, out.getvalue(), "application/json" if format == "json" else "text/plain")
+
+    def respond(self, status: int, body: str, content_type: str):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, cache_size: int = 8, engine: str = "scalar", ttl: Optional[float] = None):
+    professions = ProfessionCache(capacity=cache_size, engine=engine, ttl=ttl)
+    handler = type("Handler", (ServiceHandler,), {"professions": professions})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving {commands.COMMANDS} on http://{host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        professions.close()
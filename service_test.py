@@ -0,0 +1,46 @@
+from price_store import PriceStore, store_path
+from service import ProfessionCache
+from test_helpers import realm_cache_dir
+import unittest
+
+
+class ProfessionCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        cache_dir = realm_cache_dir()
+        self.addCleanup(cache_dir.cleanup)
+        self.professions = ProfessionCache(capacity=1, cache_dir=cache_dir.name)
+        self.addCleanup(self.professions.close)
+
+    def test_reuses_warm_profession(self):
+        enchanting = self.professions.get("sulfuras", "horde", "enchanting")
+        self.assertIs(self.professions.get("Sulfuras", "horde", "enchanting"), enchanting)
+
+    def test_evicts_least_recently_used(self):
+        enchanting = self.professions.get("sulfuras", "horde", "enchanting")
+        self.professions.get("faerlina", "horde", "enchanting")
+        self.assertEqual(list(self.professions.entries), [("faerlina", "horde", "enchanting")])
+        self.assertIsNot(self.professions.get("sulfuras", "horde", "enchanting"), enchanting)
+
+    def test_rebuilds_when_price_cache_changes(self):
+        enchanting = self.professions.get("sulfuras", "horde", "enchanting")
+        _, api, _ = self.professions.entries[("sulfuras", "horde", "enchanting")]
+        # Another process rewrites one of the realm's prices
+        store = PriceStore(store_path(api.cache_dir))
+        self.addCleanup(store.close)
+        item_id, item_data = next(iter(api.cache.items()))
+        store.upsert_many("sulfuras", "horde", [(item_id, item_data)])
+        self.assertIsNot(self.professions.get("sulfuras", "horde", "enchanting"), enchanting)
+
+    def test_rejects_unknown_profession(self):
+        with self.assertRaises(ValueError):
+            self.professions.get("sulfuras", "horde", "fishing")
+
+    def test_rejects_unknown_server(self):
+        with self.assertRaises(ValueError):
+            self.professions.get("sulfurass", "horde", "enchanting")
+        self.assertEqual(len(self.professions.entries), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
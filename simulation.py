@@ -0,0 +1,190 @@
+"""Monte Carlo simulation of leveling along a computed recipe path.
+
+`total_cost_to` charges each level `round(1 / p)` crafts, where `p` is the recipe's
+skillup chance there. That hides the spread and, at low chances, is not even the mean.
+Here the number of crafts a level takes is drawn from the geometric distribution it
+follows, for many runs at once. The path is split into segments of consecutive levels
+crafting the same recipe. A segment's crafts, cost and reagents all scale together, so
+each segment only tracks its craft counts, kept as exact integer histograms.
+
+Crafts are drawn in batches of `batch_size` runs by inverting the geometric CDF,
+`floor(log(u) / log(1 - p)) + 1`, which is about twice as fast as `Generator.geometric`.
+Levels with a guaranteed skillup take no draws at all. Between a recipe's orange and
+yellow levels `levelup_probability` exceeds 1; those levels are guaranteed too, where
+`round(1 / p)` charges them no craft at all.
+
+    python main.py --command simulate --server sulfuras --runs 1000000
+"""
+
+from dataclasses import dataclass
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from gold_amount import GoldAmount
+from nexushub_api import Reagent
+from recipes import Recipe
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class Distribution:
+    mean: float
+    percentiles: Dict[int, float]  # percentile: value
+
+    def __dict__(self):
+        return {"mean": self.mean, **{f"p{percentile}": value for percentile, value in self.percentiles.items()}}
+
+
+@dataclass
+class Segment:
+    first_level: int
+    last_level: int  # the segment levels from `first_level` up to `last_level + 1`
+    recipe: Recipe
+    crafts: Distribution
+    cost: Distribution  # in copper
+
+    def __dict__(self):
+        return {
+            "first_level": self.first_level,
+            "last_level": self.last_level,
+            "recipe": self.recipe.id,
+            "crafts": self.crafts.__dict__(),
+            "cost": self.cost.__dict__(),
+            "reagents": {reagent.id: scale(self.crafts, quantity).__dict__() for reagent, quantity in self.recipe.reagents.items()},
+        }
+
+
+@dataclass
+class Simulation:
+    runs: int
+    segments: List[Segment]
+    total_cost: Distribution  # in copper, over the whole range
+    reagents: Dict[Reagent, Distribution]  # quantity used over the whole range
+
+    def __dict__(self):
+        return {
+            "runs": self.runs,
+            "total_cost": self.total_cost.__dict__(),
+            "reagents": {reagent.id: distribution.__dict__() for reagent, distribution in self.reagents.items()},
+            "segments": [segment.__dict__() for segment in self.segments],
+        }
+
+
+def scale(distribution: Distribution, factor: float) -> Distribution:
+    return Distribution(distribution.mean * factor, {percentile: value * factor for percentile, value in distribution.percentiles.items()})
+
+
+def path_segments(profession, from_level: int, target: int) -> List[Tuple[int, int, Recipe, List[float]]]:
+    """Splits the path from `from_level` to `target` into (first level, last level, recipe, skillup chances)."""
+    profession.extend_recipe_path(target)
+    segments = []
+    for skill_level in range(from_level, target):
+        step = profession.step_by_level.get(skill_level)
+        if step is None:
+            continue
+        recipe = profession.computed_path[step]
+        if segments and segments[-1][2] is recipe and segments[-1][1] == skill_level - 1:
+            first_level, _, _, chances = segments[-1]
+            segments[-1] = (first_level, skill_level, recipe, chances)
+        else:
+            segments.append((skill_level, skill_level, recipe, []))
+        segments[-1][3].append(recipe.levelup_probability(skill_level))
+    return segments
+
+
+def histogram_distribution(counts, percentiles: Sequence[int] = PERCENTILES) -> Distribution:
+    """Mean and percentiles of integer samples given as `counts[value]`."""
+    import numpy as np
+
+    cumulative = np.cumsum(counts)
+    runs = cumulative[-1]
+    mean = float(np.dot(np.arange(len(counts)), counts) / runs)
+    # Smallest value that at least `percentile`% of the runs do not exceed
+    return Distribution(mean, {percentile: float(np.searchsorted(cumulative, math.ceil(runs * percentile / 100))) for percentile in percentiles})
+
+
+def sample_distribution(samples, percentiles: Sequence[int] = PERCENTILES) -> Distribution:
+    import numpy as np
+
+    values = np.percentile(samples, percentiles, method="inverted_cdf")
+    return Distribution(float(samples.mean()), dict(zip(percentiles, map(float, values))))
+
+
+def simulate(profession, from_level: int = 1, target: int = 450, runs: int = 100_000,
+             seed: Optional[int] = None, batch_size: int = 1 << 16) -> Simulation:
+    """Simulates `runs` independent levelings from `from_level` to `target` along the profession's path."""
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("Simulations require numpy (pip install numpy).")
+    rng = np.random.default_rng(seed)
+    segments = path_segments(profession, from_level, target)
+    prices = np.array([recipe.price.to_copper() for _, _, recipe, _ in segments], dtype=np.float64)
+    reagents = sorted({reagent for _, _, recipe, _ in segments for reagent in recipe.reagents}, key=lambda reagent: reagent.id)
+    # quantities[r, s]: how many of reagent r one craft of segment s uses
+    quantities = np.zeros((len(reagents), len(segments)), dtype=np.float64)
+    row = {reagent: i for i, reagent in enumerate(reagents)}
+    for s, (_, _, recipe, _) in enumerate(segments):
+        for reagent, quantity in recipe.reagents.items():
+            quantities[row[reagent], s] = quantity
+
+    total_costs = np.empty(runs, dtype=np.float64)
+    craft_counts = [np.zeros(1, dtype=np.int64) for _ in segments]
+    reagent_counts = [np.zeros(1, dtype=np.int64) for _ in reagents]
+    draws = np.empty(batch_size, dtype=np.float64)
+    for start in range(0, runs, batch_size):
+        size = min(batch_size, runs - start)
+        u = draws[:size]
+        crafts = np.zeros((len(segments), size), dtype=np.float64)
+        for s, (_, _, _, chances) in enumerate(segments):
+            for chance in chances:
+                if chance >= 1:
+                    crafts[s] += 1
+                    continue
+                rng.random(out=u)
+                np.subtract(1.0, u, out=u)  # (0, 1], so the log is finite
+                np.log(u, out=u)
+                u *= 1 / math.log1p(-chance)
+                np.floor(u, out=u)
+                crafts[s] += u
+                crafts[s] += 1
+        total_costs[start:start + size] = prices @ crafts
+        for s in range(len(segments)):
+            craft_counts[s] = add_counts(craft_counts[s], np.bincount(crafts[s].astype(np.int64)))
+        for r, used in enumerate(quantities @ crafts):
+            reagent_counts[r] = add_counts(reagent_counts[r], np.bincount(used.astype(np.int64)))
+
+    simulated = []
+    for (first_level, last_level, recipe, _), counts, price in zip(segments, craft_counts, prices):
+        crafts = histogram_distribution(counts)
+        simulated.append(Segment(first_level, last_level, recipe, crafts, scale(crafts, float(price))))
+    return Simulation(
+        runs=runs,
+        segments=simulated,
+        total_cost=sample_distribution(total_costs),
+        reagents={reagent: histogram_distribution(counts) for reagent, counts in zip(reagents, reagent_counts)},
+    )
+
+
+def add_counts(counts, more):
+    if len(more) > len(counts):
+        counts, more = more, counts
+    counts[:len(more)] += more
+    return counts
+
+
+def print_simulation(simulation: Simulation, out=None):
+    """Prints each segment's crafts and cost, then the spread of the total."""
+    def gold(copper):
+        return GoldAmount.from_copper(copper)
+
+    header = "  ".join(f"p{percentile:<2}" for percentile in PERCENTILES)
+    print(f"Simulated {simulation.runs} runs. Crafts and cost per segment: mean, {header}", file=out)
+    for segment in simulation.segments:
+        crafts = " ".join(f"{segment.crafts.percentiles[percentile]:4.0f}" for percentile in PERCENTILES)
+        print(f"[{segment.first_level:3}-{segment.last_level + 1:3}] {segment.recipe.name[:35]:35} "
+              f"x{segment.crafts.mean:7.1f} {crafts}  {gold(segment.cost.mean)} / {gold(segment.cost.percentiles[99])} (p99)", file=out)
+    print("="*10, file=out)
+    total = simulation.total_cost
+    print(f"Total cost: mean {gold(total.mean)}, " + ", ".join(f"p{percentile} {gold(total.percentiles[percentile])}" for percentile in PERCENTILES), file=out)
@@ -0,0 +1,46 @@
+from profession import Profession
+from simulation import histogram_distribution, simulate
+from test_helpers import FixedPriceApi
+import unittest
+
+
+class SimulationTest(unittest.TestCase):
+
+    def setUp(self):
+        # Recipe 1 is guaranteed up to 10 and fades out at 30; recipe 2 uses two of item 7 per craft
+        self.profession = Profession("test", FixedPriceApi(), recipe_json_path=None, recipe_data=[
+            {"id": 1, "name": "Recipe 1", "colors": [0, 10, 20, 30], "reagents": [[1, 100]]},
+            {"id": 2, "name": "Recipe 2", "colors": [15, 20, 25, 50], "reagents": [[7, 2]]},
+        ])
+
+    def test_guaranteed_levels_take_one_craft(self):
+        result = simulate(self.profession, 1, 10, runs=1000, seed=0)
+        self.assertEqual(len(result.segments), 1)
+        self.assertEqual(result.segments[0].crafts.mean, 9)
+        self.assertEqual(result.total_cost.percentiles, {50: 900, 90: 900, 99: 900})
+
+    def test_matches_expected_crafts(self):
+        result = simulate(self.profession, 1, 40, runs=50_000, seed=0, batch_size=4096)
+        expected = 0
+        for skill_level in range(1, 40):
+            recipe = self.profession.cheapest_way_to_level_at(skill_level)
+            expected += recipe.price.to_copper() / min(recipe.levelup_probability(skill_level), 1)
+        self.assertAlmostEqual(result.total_cost.mean / expected, 1, places=2)
+        self.assertAlmostEqual(sum(segment.cost.mean for segment in result.segments), result.total_cost.mean)
+        for distribution in [result.total_cost] + [segment.crafts for segment in result.segments]:
+            self.assertLessEqual(distribution.percentiles[50], distribution.percentiles[90])
+            self.assertLessEqual(distribution.percentiles[90], distribution.percentiles[99])
+        # Item 7 is only used by recipe 2, two per craft
+        crafts = [segment.crafts for segment in result.segments if segment.recipe.id == 2]
+        item_7 = next(distribution for reagent, distribution in result.reagents.items() if reagent.id == 7)
+        self.assertAlmostEqual(item_7.mean, 2 * sum(distribution.mean for distribution in crafts))
+
+    def test_histogram_percentiles(self):
+        # Values 0..9, once each
+        distribution = histogram_distribution([1] * 10, percentiles=(10, 50, 100))
+        self.assertEqual(distribution.mean, 4.5)
+        self.assertEqual(distribution.percentiles, {10: 0, 50: 4, 100: 9})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+"""Startup-time benchmark for the CLI: importing `main`, and import plus a first answer.
+
+Each case runs in a fresh interpreter, so module imports, cache loading and path
+computation are all counted. Use `--json` to write the timings somewhere a later run
+can be compared against.
+
+    python startup_bench.py --server sulfuras --repeat 10 --json startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def cases(server: str, faction: str):
+    answer = [sys.executable, "main.py", "--server", server, "--faction", faction]
+    return {
+        "import main": [sys.executable, "-c", "import main"],
+        "total_cost 1-50": answer + ["--command", "total_cost", "--target_level", "50"],
+        "total_cost 1-450": answer + ["--command", "total_cost", "--target_level", "450"],
+        "path 350-450 (json)": answer + ["--command", "path", "--from_level", "350", "--format", "json"],
+    }
+
+
+def time_command(command, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup")
+    parser.add_argument("--server", type=str, default="sulfuras")
+    parser.add_argument("--faction", type=str, default="horde")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=str, default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'case':24} {'min (ms)':>9} {'median (ms)':>12}")
+    for name, command in cases(args.server, args.faction).items():
+        timings = time_command(command, args.repeat)
+        results[name] = {"min": min(timings), "median": statistics.median(timings), "runs": timings}
+        print(f"{name:24} {min(timings) * 1000:9.1f} {statistics.median(timings) * 1000:12.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
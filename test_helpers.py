@@ -0,0 +1,92 @@
+"""Fixtures and fake price sources shared by the test modules and the benchmarks."""
+
+import glob
+import os
+import random
+import shutil
+import tempfile
+import threading
+from typing import List
+
+from gold_amount import GoldAmount
+from in_memory_prices import InMemoryPrices
+from nexushub_api import NexusHubApi, Reagent
+
+CACHE_DIR = "cache"
+
+
+def realm_cache_dir() -> tempfile.TemporaryDirectory:
+    """A temporary cache directory holding copies of the committed realm caches.
+
+    Tests price against these copies, so they run offline and never write to `cache/`.
+    """
+    cache_dir = tempfile.TemporaryDirectory()
+    for json_cache_path in glob.glob(os.path.join(CACHE_DIR, "item_cache_*_*.json")):
+        shutil.copy(json_cache_path, cache_dir.name)
+    return cache_dir
+
+
+def synthetic_recipes(count: int, reagent_pool: int = 500, seed: int = 0) -> List[dict]:
+    """Returns `count` recipe JSON entries with random color windows and 1-5 reagents each."""
+    rng = random.Random(seed)
+    recipes = []
+    for i in range(count):
+        orange = rng.randint(0, 440)
+        yellow = orange + rng.randint(0, 25)
+        green = yellow + rng.randint(1, 25)
+        gray = green + rng.randint(1, 25)
+        recipes.append({
+            "id": i + 1,
+            "name": f"Synthetic Recipe {i + 1}",
+            "colors": [orange, yellow, green, gray],
+            "reagents": [[rng.randint(1, reagent_pool), rng.randint(1, 10)] for _ in range(rng.randint(1, 5))],
+        })
+    return recipes
+
+
+def synthetic_prices(reagent_pool: int = 500, seed: int = 0) -> InMemoryPrices:
+    rng = random.Random(seed)
+    return InMemoryPrices({item_id: rng.randint(1, 100_000) for item_id in range(1, reagent_pool + 1)})
+
+
+class FixedPriceApi:
+    """Prices every item at 1 copper."""
+
+    def prefetch(self, item_ids):
+        pass
+
+    def get_item(self, item_id):
+        return Reagent(id=item_id, price=GoldAmount.from_copper(1), name=f"Item {item_id}")
+
+
+class FakeNexusHubApi(NexusHubApi):
+    """Answers price requests locally and records which items were requested."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested = []
+        self.lock = threading.Lock()
+
+    def fetch_data_from_api(self, item_id):
+        with self.lock:
+            self.requested.append(item_id)
+        return {"name": f"Item {item_id}", "data": [{"marketValue": item_id * 10, "scannedAt": "2023-02-26T00:22:18.000Z"}]}
+
+
+class OfflineNexusHubApi(NexusHubApi):
+    """Serves only what is cached, failing the test on any request."""
+
+    def fetch_data_from_api(self, item_id):
+        raise AssertionError(f"Unexpected request for item {item_id}")
+
+
+class RepricedNexusHubApi(NexusHubApi):
+    """Serves the sulfuras cache in `cache_dir` with some market values replaced."""
+
+    def __init__(self, cache_dir: str):
+        super().__init__("sulfuras", "horde", cache_dir=cache_dir)
+        self.prices = {}
+
+    def get_item_data(self, item_id):
+        item_data = super().get_item_data(item_id)
+        return dict(item_data, marketValue=self.prices.get(item_id, item_data["marketValue"]))
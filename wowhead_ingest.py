@@ -0,0 +1,222 @@
+"""Builds `data/<profession>.json` from saved wowhead profession pages.
+
+A saved page is several megabytes of HTML, but all we need is the one JS array assigned
+to `listviewspells`. Each file is read in chunks: the scanner looks for the assignment,
+then tokenizes the array as it streams in, quoting bare JS object keys so the result is
+valid JSON, and stops reading at the closing bracket. No DOM is built.
+
+Every entry is then validated and trimmed to the fields the calculator reads. Trainer
+rows without reagents are dropped, and invalid entries (e.g. a color window where the
+gray level is not above the yellow one, which would make `levelup_probability` divide
+by zero) are reported and left out. Files are processed in parallel, one per worker.
+
+    python wowhead_ingest.py pages/enchanting.html pages/engineering.html --out_dir data
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+import json
+import os
+import re
+import sys
+from typing import Iterable, List, Optional, TextIO, Tuple
+
+CHUNK_SIZE = 1 << 16
+LISTVIEW_VARIABLE = "listviewspells"
+# Fields of an entry read by `Profession`, `RecipeTable` and the crafting graph
+RECIPE_FIELDS = ("id", "name", "colors", "reagents", "nskillup", "creates")
+
+TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|[A-Za-z_$][\w$]*|-?[\d.][\w.+-]*|\s+|.', re.S)
+JS_LITERALS = {"true": "true", "false": "false", "null": "null", "undefined": "null"}
+
+
+def read_listview(f: TextIO, variable: str = LISTVIEW_VARIABLE) -> list:
+    """Returns the array assigned to `variable` in the page read from `f`, as parsed JSON."""
+    assignment = re.compile(r"\b" + re.escape(variable) + r"\s*=\s*\[")
+    buffer = ""
+    while True:
+        chunk = f.read(CHUNK_SIZE)
+        buffer += chunk
+        match = assignment.search(buffer)
+        if match:
+            break
+        if not chunk:
+            raise ValueError(f"No {variable} array found")
+        # Keep enough of the tail for an assignment split across chunks
+        buffer = buffer[-len(variable) - 64:]
+
+    parts = ["["]
+    stack = ["["]
+    expecting_key = False
+    buffer, pos, eof = buffer[match.end():], 0, False
+    while stack:
+        token = TOKEN.match(buffer, pos)
+        # A token touching the end of the buffer may continue in the next chunk
+        if not eof and (token is None or token.end() == len(buffer) or token.group() == '"'):
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+        if token is None:
+            raise ValueError(f"{variable} array is not terminated")
+        text = token.group()
+        pos = token.end()
+        char = text[0]
+        if char.isspace():
+            continue
+        if char in "{[":
+            stack.append(char)
+            expecting_key = char == "{"
+        elif char in "}]":
+            stack.pop()
+            expecting_key = False
+        elif char == ",":
+            expecting_key = stack[-1] == "{"
+        elif char == ":":
+            expecting_key = False
+        elif char.isalpha() or char in "_$":
+            if expecting_key:
+                text = f'"{text}"'
+            elif text in JS_LITERALS:
+                text = JS_LITERALS[text]
+            else:
+                raise ValueError(f"Unexpected {text!r} in {variable} array")
+        parts.append(text)
+    return json.loads("".join(parts))
+
+
+def is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def normalize_recipe(entry: dict) -> dict:
+    """Returns the entry trimmed to `RECIPE_FIELDS`, raising ValueError if it can't be used."""
+    if not is_int(entry.get("id")):
+        raise ValueError(f"{entry.get('id')!r} is not a valid recipe id")
+    if not isinstance(entry.get("name"), str):
+        raise ValueError(f"{entry.get('name')!r} is not a valid recipe name")
+
+    colors = entry.get("colors")
+    if not isinstance(colors, list) or len(colors) != 4 or not all(is_int(level) and level >= 0 for level in colors):
+        raise ValueError(f"{colors!r} is not a valid color list. Expected 4 skill levels: orange, yellow, green, gray")
+    if colors != sorted(colors):
+        raise ValueError(f"{colors!r} is not a valid color list. Levels must not decrease")
+    if colors[3] <= colors[1]:
+        raise ValueError(f"{colors!r} is not a valid color list. Gray level must be above yellow level")
+
+    reagents = entry["reagents"]
+    if not isinstance(reagents, list) or not reagents or not all(
+            isinstance(reagent, list) and len(reagent) == 2 and all(is_int(n) and n > 0 for n in reagent) for reagent in reagents):
+        raise ValueError(f"{reagents!r} is not a valid reagent list. Expected [item_id, quantity] pairs")
+
+    nskillup = entry.get("nskillup", 1)
+    if not is_int(nskillup) or nskillup < 1:
+        raise ValueError(f"{nskillup!r} is not a valid number of skill points per craft")
+
+    creates = entry.get("creates")
+    if creates is not None and (not isinstance(creates, list) or not creates or not all(is_int(n) for n in creates)):
+        raise ValueError(f"{creates!r} is not a valid created item. Expected [item_id, min_count, max_count]")
+
+    return {key: entry[key] for key in RECIPE_FIELDS if key in entry}
+
+
+@dataclass
+class IngestResult:
+    # Built in worker processes and pickled back, so no __dict__() helper here
+    profession: str
+    html_path: str
+    json_path: Optional[str] = None
+    recipes: int = 0
+    skipped: int = 0  # entries without reagents (trainer ranks, ...)
+    invalid: List[Tuple[object, str]] = field(default_factory=list)  # (id, reason)
+    error: Optional[str] = None
+
+
+def profession_of(html_path: str) -> str:
+    """The profession a saved page is for, taken from its file name (`enchanting.html` -> `enchanting`)."""
+    return os.path.basename(html_path).split(".", 1)[0].lower()
+
+
+def ingest_file(html_path: str, out_dir: str = "data", variable: str = LISTVIEW_VARIABLE) -> IngestResult:
+    """Extracts, validates and writes the recipes of one saved page."""
+    result = IngestResult(profession_of(html_path), html_path)
+    try:
+        with open(html_path, encoding="utf-8", errors="replace") as f:
+            entries = read_listview(f, variable)
+    except (OSError, ValueError) as e:
+        result.error = f"{type(e).__name__}: {e}"
+        return result
+
+    recipes = {}
+    for entry in entries:
+        if not isinstance(entry, dict) or "reagents" not in entry:
+            result.skipped += 1
+            continue
+        try:
+            recipe = normalize_recipe(entry)
+        except ValueError as e:
+            result.invalid.append((entry.get("id"), str(e)))
+            continue
+        if recipe["id"] in recipes:
+            result.invalid.append((recipe["id"], "Duplicate recipe id"))
+            continue
+        recipes[recipe["id"]] = recipe
+
+    result.recipes = len(recipes)
+    result.json_path = os.path.join(out_dir, f"{result.profession}.json")
+    tmp_path = result.json_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(sorted(recipes.values(), key=lambda recipe: recipe["id"]), f, indent=4)
+        f.write("\n")
+    os.replace(tmp_path, result.json_path)
+    return result
+
+
+def ingest_files(html_paths: Iterable[str], out_dir: str = "data", workers: Optional[int] = None,
+                 variable: str = LISTVIEW_VARIABLE) -> List[IngestResult]:
+    """Ingests every page in parallel and returns the results in the order of `html_paths`."""
+    html_paths = list(html_paths)
+    professions = [profession_of(path) for path in html_paths]
+    duplicates = sorted({name for name in professions if professions.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"{duplicates} have more than one page. Pass one page per profession")
+    os.makedirs(out_dir, exist_ok=True)
+    if len(html_paths) <= 1:
+        return [ingest_file(path, out_dir, variable) for path in html_paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(ingest_file, html_paths, [out_dir] * len(html_paths), [variable] * len(html_paths)))
+
+
+def print_results(results: List[IngestResult], out: TextIO = sys.stdout):
+    for result in results:
+        if result.error is not None:
+            print(f"{result.html_path}: {result.error}", file=out)
+            continue
+        print(f"{result.html_path} -> {result.json_path}: {result.recipes} recipes, {result.skipped} skipped, "
+              f"{len(result.invalid)} invalid", file=out)
+        for recipe_id, reason in result.invalid:
+            print(f"    {recipe_id}: {reason}", file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build profession recipe JSON from saved wowhead pages")
+    parser.add_argument("html_paths", nargs="+", help="Saved pages, named after their profession (e.g. enchanting.html)")
+    parser.add_argument("--out_dir", type=str, default="data")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--variable", type=str, default=LISTVIEW_VARIABLE, help="JS variable holding the recipe array")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args()
+    results = ingest_files(args.html_paths, args.out_dir, args.workers, args.variable)
+    if args.json:
+        json.dump([asdict(result) for result in results], sys.stdout, indent=2)
+        print()
+    else:
+        print_results(results)
+    if any(result.error is not None for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
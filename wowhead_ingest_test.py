@@ -0,0 +1,78 @@
+from recipe_table import RecipeTable
+import io
+import json
+import os
+import re
+import tempfile
+import unittest
+import wowhead_ingest
+
+PAGE = """<html><head><script>var g_items = {};</script></head><body>
+<script type="text/javascript">//<![CDATA[
+var listviewspells = [{"cat":11,id:7411,"name":"Enchanting","rank":"Apprentice",skill:[333]},
+{id:7418,name:"Enchant Bracer - Minor Health","colors":[0,70,90,110],reagents:[[10940,1]],"popularity":48,quality:-1},
+{id:7421,name:"Runed Copper Rod","colors":[1,5,7,10],reagents:[[6217,1],[2772,1]],creates:[6218,1,1],nskillup:1},
+{id:9999,name:"Broken, \\"quoted\\" [name]","colors":[0,300,300,300],reagents:[[1,1]],known:true,extra:undefined}];
+new Listview({template: 'spell', id: 'spells', data: listviewspells});
+//]]></script></body></html>"""
+
+
+class WowheadIngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write_page(self, name, page=PAGE):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w") as f:
+            f.write(page)
+        return path
+
+    def test_read_listview_quotes_bare_keys_across_chunks(self):
+        for chunk_size in (1, 7, 1 << 16):
+            wowhead_ingest.CHUNK_SIZE, old = chunk_size, wowhead_ingest.CHUNK_SIZE
+            try:
+                entries = wowhead_ingest.read_listview(io.StringIO(PAGE))
+            finally:
+                wowhead_ingest.CHUNK_SIZE = old
+            self.assertEqual([entry["id"] for entry in entries], [7411, 7418, 7421, 9999])
+            self.assertEqual(entries[3]["name"], 'Broken, "quoted" [name]')
+            self.assertIsNone(entries[3]["extra"])
+
+    def test_missing_listview(self):
+        with self.assertRaises(ValueError):
+            wowhead_ingest.read_listview(io.StringIO("<html></html>"))
+
+    def test_ingest_validates_and_trims(self):
+        result = wowhead_ingest.ingest_file(self.write_page("enchanting.html"), self.dir.name)
+        self.assertEqual((result.recipes, result.skipped), (2, 1))
+        self.assertEqual([recipe_id for recipe_id, _ in result.invalid], [9999])
+        with open(result.json_path) as f:
+            recipes = json.load(f)
+        self.assertEqual(recipes[1], {"id": 7421, "name": "Runed Copper Rod", "colors": [1, 5, 7, 10],
+                                      "reagents": [[6217, 1], [2772, 1]], "nskillup": 1, "creates": [6218, 1, 1]})
+        self.assertEqual(len(RecipeTable.from_json(recipes)), 2)
+
+    def test_ingest_files_in_parallel(self):
+        broken = self.write_page("tailoring.html", "<html>no recipes</html>")
+        paths = [self.write_page("enchanting.html"), self.write_page("engineering.html"), broken]
+        results = wowhead_ingest.ingest_files(paths, self.dir.name, workers=2)
+        self.assertEqual([result.profession for result in results], ["enchanting", "engineering", "tailoring"])
+        self.assertTrue(os.path.exists(os.path.join(self.dir.name, "engineering.json")))
+        self.assertIsNotNone(results[2].error)
+
+    def test_round_trips_enchanting_data(self):
+        with open("data/enchanting.json") as f:
+            recipes_json = json.load(f)
+        # wowhead leaves most keys unquoted
+        page = "<script>var listviewspells = " + re.sub(r'"(\w+)":', r"\1:", json.dumps(recipes_json)) + ";</script>"
+        result = wowhead_ingest.ingest_file(self.write_page("enchanting.html", page), self.dir.name)
+        with open(result.json_path) as f:
+            ingested = json.load(f)
+        self.assertEqual(RecipeTable.from_json(ingested).ids.tolist(),
+                         sorted(recipe["id"] for recipe in recipes_json if "reagents" in recipe))
+
+
+if __name__ == "__main__":
+    unittest.main()